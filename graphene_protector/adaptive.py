@@ -0,0 +1,128 @@
+__all__ = [
+    "AdaptiveLimits",
+    "InFlightSignal",
+    "EventLoopLagSignal",
+]
+
+import asyncio
+import threading
+from dataclasses import replace
+from time import monotonic
+from typing import Callable, Optional
+
+from .misc import MISSING, Limits
+
+
+def _scale(value, factor: float):
+    if value is None or value is MISSING or not value:
+        return value
+    return max(1, int(value * factor))
+
+
+class AdaptiveLimits:
+    """
+    Scales the complexity and gas limits down while the load signal is at
+    or above high and restores them stepwise when it drops to low or below
+    (hysteresis). The signal is sampled at most once per interval
+    """
+
+    def __init__(
+        self,
+        signal: Callable[[], float],
+        *,
+        high: float = 1.0,
+        low: float = 0.7,
+        decrease: float = 0.75,
+        min_factor: float = 0.1,
+        interval: float = 1.0,
+    ):
+        assert low <= high, "low must not be greater than high"
+        assert 0 < decrease < 1, "decrease must be between 0 and 1"
+        self.signal = signal
+        self.high = high
+        self.low = low
+        self.decrease = decrease
+        self.min_factor = min_factor
+        self.interval = interval
+        self.factor = 1.0
+        self._last_update = None
+
+    def update(self) -> float:
+        now = monotonic()
+        if (
+            self._last_update is not None
+            and now - self._last_update < self.interval
+        ):
+            return self.factor
+        self._last_update = now
+        load = self.signal()
+        if load >= self.high:
+            self.factor = max(self.min_factor, self.factor * self.decrease)
+        elif load <= self.low and self.factor < 1.0:
+            self.factor = min(1.0, self.factor / self.decrease)
+        return self.factor
+
+    def scale(self, limits: Limits) -> Optional[Limits]:
+        """returns the scaled limits, None if the limits apply unchanged"""
+        factor = self.update()
+        if factor >= 1.0:
+            return None
+        return replace(
+            limits,
+            complexity=_scale(limits.complexity, factor),
+            gas=_scale(limits.gas, factor),
+        )
+
+
+class InFlightSignal:
+    """
+    Requests in flight relative to capacity. Use it as (async) context
+    manager around the request handling
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> float:
+        return self.in_flight / self.capacity
+
+    def __enter__(self):
+        with self._lock:
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *args):
+        with self._lock:
+            self.in_flight -= 1
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *args):
+        self.__exit__(*args)
+
+
+class EventLoopLagSignal:
+    """
+    Lag of the event loop relative to target (seconds). The lag is measured
+    by the task returned by start()
+    """
+
+    def __init__(self, target: float = 0.1, interval: float = 0.5):
+        self.target = target
+        self.interval = interval
+        self.lag = 0.0
+
+    def __call__(self) -> float:
+        return self.lag / self.target
+
+    async def measure(self):
+        while True:
+            start = monotonic()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, monotonic() - start - self.interval)
+
+    def start(self) -> asyncio.Task:
+        return asyncio.ensure_future(self.measure())
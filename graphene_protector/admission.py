@@ -0,0 +1,163 @@
+__all__ = ["AdmissionController"]
+
+import asyncio
+import threading
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+
+class AdmissionController:
+    """
+    Weighted semaphore shared by threads and asyncio tasks. Queries acquire
+    their costs as weight and are admitted as soon as the weight fits into
+    the free capacity, so cheap queries do not wait behind expensive ones.
+    Queries which cannot be admitted within max_wait (or when max_queue
+    queries are waiting) are rejected. Waiting blocks the thread of sync
+    executions, so by default (max_wait=0) they are rejected immediately
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        *,
+        max_wait: float = 0.0,
+        max_queue: Optional[int] = None,
+    ):
+        self.capacity = capacity
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.free = capacity
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._async_waiters: List[
+            Tuple[asyncio.AbstractEventLoop, asyncio.Future]
+        ] = []
+        # counters
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.waited = 0
+        self.wait_time = 0.0
+        # moving average of the time a weight is held, used as retry hint
+        self.hold_time = 0.0
+
+    def _weight(self, weight: int) -> int:
+        # weights above the capacity would never be admitted
+        return min(max(weight, 1), self.capacity)
+
+    def _try_acquire(self, weight: int) -> bool:
+        if weight <= self.free:
+            self.free -= weight
+            self.admitted += 1
+            return True
+        return False
+
+    def _enqueue(self) -> bool:
+        if self.max_queue is not None and self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            return False
+        self.queue_depth += 1
+        if self.queue_depth > self.max_queue_depth:
+            self.max_queue_depth = self.queue_depth
+        return True
+
+    def _dequeue(self, start: float, admitted: bool):
+        self.queue_depth -= 1
+        self.waited += 1
+        self.wait_time += monotonic() - start
+        if not admitted:
+            self.rejected += 1
+
+    def acquire(self, weight: int) -> Optional[float]:
+        """
+        Returns the start time for release, None if rejected
+        """
+        weight = self._weight(weight)
+        with self._lock:
+            if self._try_acquire(weight):
+                return monotonic()
+            if not self.max_wait or not self._enqueue():
+                if not self.max_wait:
+                    self.rejected += 1
+                return None
+            start = monotonic()
+            admitted = self._condition.wait_for(
+                lambda: self._try_acquire(weight), self.max_wait
+            )
+            self._dequeue(start, admitted)
+            return monotonic() if admitted else None
+
+    async def acquire_async(self, weight: int) -> Optional[float]:
+        """
+        Returns the start time for release, None if rejected
+        """
+        weight = self._weight(weight)
+        with self._lock:
+            if self._try_acquire(weight):
+                return monotonic()
+            if not self.max_wait or not self._enqueue():
+                if not self.max_wait:
+                    self.rejected += 1
+                return None
+        start = monotonic()
+        deadline = start + self.max_wait
+        loop = asyncio.get_running_loop()
+        admitted = False
+        try:
+            while True:
+                waiter = (loop, loop.create_future())
+                with self._lock:
+                    if self._try_acquire(weight):
+                        admitted = True
+                        break
+                    self._async_waiters.append(waiter)
+                try:
+                    await asyncio.wait_for(waiter[1], deadline - monotonic())
+                except asyncio.TimeoutError:
+                    break
+                finally:
+                    with self._lock:
+                        if waiter in self._async_waiters:
+                            self._async_waiters.remove(waiter)
+            with self._lock:
+                if not admitted:
+                    # last chance, the capacity can be freed while timing out
+                    admitted = self._try_acquire(weight)
+        finally:
+            # also when cancelled (e.g. the client disconnected)
+            with self._lock:
+                self._dequeue(start, admitted)
+        return monotonic() if admitted else None
+
+    def release(self, weight: int, start: float):
+        weight = self._weight(weight)
+        with self._lock:
+            self.free += weight
+            self.hold_time += (monotonic() - start - self.hold_time) * 0.1
+            self._condition.notify_all()
+            waiters = self._async_waiters
+            self._async_waiters = []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def retry_after(self) -> float:
+        """hint in seconds when a rejected query should be retried"""
+        return max(round(self.hold_time, 3), 0.001)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "capacity": self.capacity,
+            "free": self.free,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "waited": self.waited,
+            "wait_time": self.wait_time,
+        }
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
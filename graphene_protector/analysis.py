@@ -0,0 +1,373 @@
+__all__ = ["FieldCost", "SchemaCostReport", "analyze_schema"]
+
+import argparse
+import importlib
+import json
+import re
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from graphql.type import (
+    GraphQLInterfaceType,
+    GraphQLObjectType,
+    GraphQLUnionType,
+)
+
+from .base import (
+    _annotated_field,
+    _get_graphql_schema,
+    _is_limited,
+    _override_gas,
+    _type_cost_index,
+    _type_costs_gas,
+    _type_costs_limits,
+    follow_of_type,
+    gas_for_field,
+    limits_for_field,
+)
+from .cache import limits_key
+from .misc import (
+    DEFAULT_LIMITS,
+    MISSING,
+    MISSING_LIMITS,
+    Limits,
+    _deco_options,
+    default_path_ignore_pattern,
+)
+
+
+@dataclass(**_deco_options)
+class FieldCost:
+    # None: unbounded
+    max_depth: Optional[int] = 0
+    selections: Optional[int] = 0
+    gas: Optional[int] = 0
+
+
+@dataclass(**_deco_options)
+class SchemaCostReport:
+    # worst case per root field ("Query.person")
+    fields: Dict[str, FieldCost] = field(default_factory=dict)
+    # cycles of types which are not bound by the limits
+    unbounded: List[Tuple[str, ...]] = field(default_factory=list)
+
+
+def _add(a, b):
+    if a is None or b is None:
+        return None
+    return a + b
+
+
+def _max(a, b):
+    if a is None or b is None:
+        return None
+    return max(a, b)
+
+
+def _cap(value, limit):
+    if not _is_limited(limit):
+        return value
+    if value is None:
+        return limit
+    return min(value, limit)
+
+
+def _normalize_cycle(cycle: Tuple[str, ...]) -> Tuple[str, ...]:
+    start = cycle.index(min(cycle))
+    return cycle[start:] + cycle[:start]
+
+
+class _Analyzer:
+    def __init__(
+        self,
+        graphql_schema,
+        path_ignore_pattern: re.Pattern,
+        get_gas_for_field,
+        get_limits_for_field,
+        path_context: int,
+    ):
+        self.graphql_schema = graphql_schema
+        self.path_ignore_pattern = path_ignore_pattern
+        self.get_gas_for_field = get_gas_for_field
+        self.get_limits_for_field = get_limits_for_field
+        self.path_context = path_context
+        self.memo = {}
+        self.cycles = set()
+
+    def gas(self, annotated, parent, fieldname, graphql_path) -> int:
+        try:
+            return self.get_gas_for_field(
+                annotated,
+                parent=parent,
+                fieldname=fieldname,
+                graphql_path=graphql_path,
+            )
+        except Exception:
+            # callables which require a concrete query
+            return 0
+
+    def type_cost(
+        self,
+        graphql_type,
+        limits: Limits,
+        level_depth: int,
+        seen_limits: FrozenSet[int],
+        graphql_path: str,
+        stack: List[Tuple[str, int, FrozenSet[int]]],
+    ) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        """(max depth, selections, gas) of selecting every field once"""
+        graphql_type = follow_of_type(graphql_type)
+        if isinstance(graphql_type, (GraphQLUnionType, GraphQLInterfaceType)):
+            # like the validation: the most expensive possible type
+            retval = (level_depth, 0, 0)
+            for possible_type in self.graphql_schema.get_possible_types(
+                graphql_type
+            ):
+                depth, selections, gas = self.type_cost(
+                    possible_type,
+                    limits,
+                    level_depth,
+                    seen_limits,
+                    graphql_path,
+                    stack,
+                )
+                retval = (
+                    _max(retval[0], depth),
+                    _max(retval[1], selections),
+                    _max(retval[2], gas),
+                )
+            return retval
+        if not isinstance(graphql_type, GraphQLObjectType):
+            return level_depth, 0, 0
+        name = graphql_type.name
+        for index, (
+            stack_name,
+            stack_level_depth,
+            stack_seen_limits,
+        ) in enumerate(stack):
+            # counters can only be reset once per sub limits
+            if (
+                stack_name == name
+                and stack_seen_limits == seen_limits
+                and (
+                    not _is_limited(limits.depth)
+                    or stack_level_depth == level_depth
+                )
+            ):
+                # recursion without progress towards a limit
+                self.cycles.add(
+                    _normalize_cycle(
+                        tuple(entry[0] for entry in stack[index:])
+                    )
+                )
+                return None, None, None
+        key = (
+            name,
+            level_depth,
+            limits_key(limits),
+            seen_limits,
+            tuple(graphql_path.split("/")[-self.path_context :]),
+        )
+        if key in self.memo:
+            return self.memo[key]
+        stack.append((name, level_depth, seen_limits))
+        retval = (level_depth, 0, 0)
+        try:
+            for fieldname, graphql_field in graphql_type.fields.items():
+                if fieldname.startswith("__"):
+                    continue
+                cost = self.field_cost(
+                    graphql_type,
+                    fieldname,
+                    graphql_field,
+                    limits,
+                    level_depth,
+                    seen_limits,
+                    graphql_path,
+                    stack,
+                )
+                if cost is None:
+                    continue
+                retval = (
+                    _max(retval[0], cost[0]),
+                    _add(retval[1], cost[1]),
+                    _add(retval[2], cost[2]),
+                )
+        finally:
+            stack.pop()
+        self.memo[key] = retval
+        return retval
+
+    def field_cost(
+        self,
+        parent,
+        fieldname,
+        graphql_field,
+        limits: Limits,
+        level_depth: int,
+        seen_limits: FrozenSet[int],
+        graphql_path: str,
+        stack: List[Tuple[str, int, FrozenSet[int]]],
+    ) -> Optional[Tuple[Optional[int], Optional[int], Optional[int]]]:
+        """None if the field cannot be selected within the limits"""
+        annotated = _annotated_field(self.graphql_schema, parent, fieldname)
+        _npath = "{}/{}".format(graphql_path, fieldname)
+        gas = self.gas(annotated, parent, fieldname, _npath)
+        contributes = not self.path_ignore_pattern.match(_npath)
+        field_type = follow_of_type(graphql_field.type)
+        if not isinstance(
+            field_type,
+            (GraphQLObjectType, GraphQLInterfaceType, GraphQLUnionType),
+        ):
+            return level_depth, int(contributes), gas
+        merged_limits, sub_limits = self.get_limits_for_field(
+            annotated,
+            limits,
+            parent=parent,
+            fieldname=fieldname,
+            graphql_path=_npath,
+        )
+        allow_restart_counters = True
+        if sub_limits is not MISSING_LIMITS:
+            if id(sub_limits) in seen_limits:
+                allow_restart_counters = False
+            else:
+                seen_limits = seen_limits | {id(sub_limits)}
+        if sub_limits.depth is MISSING or not allow_restart_counters:
+            sub_level_depth = level_depth + contributes
+        else:
+            sub_level_depth = 1
+        if (
+            _is_limited(merged_limits.depth)
+            and sub_level_depth > merged_limits.depth
+        ):
+            return None
+        depth, selections, sub_gas = self.type_cost(
+            field_type,
+            merged_limits,
+            sub_level_depth,
+            seen_limits,
+            _npath,
+            stack,
+        )
+        if (
+            sub_limits.depth is not MISSING
+            and "depth" not in sub_limits.passthrough
+        ):
+            depth = level_depth if depth is not None else None
+        if sub_limits.selections is not MISSING and (
+            "selections" not in sub_limits.passthrough
+        ):
+            selections = 0 if selections is not None else None
+        if (
+            sub_limits.gas is not MISSING
+            and "gas" not in sub_limits.passthrough
+        ):
+            sub_gas = 0 if sub_gas is not None else None
+        return depth, selections, _add(gas, sub_gas)
+
+
+def analyze_schema(
+    schema,
+    limits: Optional[Limits] = None,
+    path_ignore_pattern=None,
+    *,
+    path_context: int = 3,
+) -> SchemaCostReport:
+    """
+    Static worst-case analysis of a schema (graphene, strawberry,
+    graphql-core or SchemaMixin). For every root field the max depth,
+    selections and gas of a query selecting every field once within the
+    limits are calculated (aliases and repeated fields are governed by
+    the aliases and selections limits). Field limits, passthrough,
+    the sub limits loop detection and path ignoring are followed.
+    The limits and the ignore pattern default to the ones of the schema.
+    Results for the same type are reused when the last path_context path
+    components are the same
+    """
+    if limits is None:
+        limits = getattr(
+            schema, "get_protector_default_limits", lambda: None
+        )()
+    if limits is None:
+        limits = DEFAULT_LIMITS
+    if path_ignore_pattern is None:
+        path_ignore_pattern = getattr(
+            schema,
+            "get_protector_path_ignore_pattern",
+            lambda: default_path_ignore_pattern,
+        )()
+    if isinstance(path_ignore_pattern, str):
+        path_ignore_pattern = re.compile(path_ignore_pattern)
+    graphql_schema = _get_graphql_schema(schema)
+    get_gas_for_field = gas_for_field
+    get_limits_for_field = limits_for_field
+    type_cost_index = _type_cost_index(graphql_schema)
+    if type_cost_index:
+        get_gas_for_field = _type_costs_gas(get_gas_for_field, type_cost_index)
+        get_limits_for_field = _type_costs_limits(
+            get_limits_for_field, type_cost_index
+        )
+    overrides = getattr(schema, "get_protector_gas_overrides", lambda: None)()
+    if overrides:
+        get_gas_for_field = _override_gas(get_gas_for_field, overrides)
+    analyzer = _Analyzer(
+        graphql_schema,
+        path_ignore_pattern,
+        get_gas_for_field,
+        get_limits_for_field,
+        path_context,
+    )
+    report = SchemaCostReport()
+    for root_type in (
+        graphql_schema.query_type,
+        graphql_schema.mutation_type,
+        graphql_schema.subscription_type,
+    ):
+        if root_type is None:
+            continue
+        for fieldname, graphql_field in root_type.fields.items():
+            if fieldname.startswith("__"):
+                continue
+            cost = analyzer.field_cost(
+                root_type,
+                fieldname,
+                graphql_field,
+                limits,
+                0,
+                frozenset(),
+                "",
+                [(root_type.name, 0, frozenset())],
+            )
+            if cost is None:
+                cost = (0, 0, 0)
+            report.fields["{}.{}".format(root_type.name, fieldname)] = (
+                FieldCost(
+                    max_depth=cost[0],
+                    selections=_cap(cost[1], limits.selections),
+                    gas=_cap(cost[2], limits.gas),
+                )
+            )
+    report.unbounded = sorted(analyzer.cycles)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=(
+            "worst-case costs of a schema, fails on unbounded recursions"
+        )
+    )
+    parser.add_argument("schema", help="module:attribute of the schema")
+    args = parser.parse_args(argv)
+    module, attribute = args.schema.split(":", 1)
+    schema = getattr(importlib.import_module(module), attribute)
+    report = analyze_schema(schema)
+    json.dump(asdict(report), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 1 if report.unbounded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,50 +5,101 @@ __all__ = [
     "merge_limits",
     "gas_for_field",
     "limits_for_field",
+    "check_document_shape",
+    "check_introspection",
     "check_resource_usage",
     "gas_usage",
     "LimitsValidationRule",
     "decorate_limits",
     "decorate_limits_async",
+    "decorate_subscribe",
     "SchemaMixin",
 ]
 
+import copy
 import re
+import threading
+from collections import OrderedDict
 from collections.abc import Callable
+from contextvars import ContextVar
 from dataclasses import fields, replace
 from functools import partial, wraps
-from typing import List, Tuple, Union
+from time import perf_counter
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple, Union
 
 from graphql import GraphQLInterfaceType, GraphQLObjectType, GraphQLUnionType
 from graphql.error import GraphQLError
 from graphql.execution import ExecutionResult
 from graphql.language import (
     DefinitionNode,
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
     FragmentSpreadNode,
     InlineFragmentNode,
     Node,
     OperationDefinitionNode,
-    parse,
+    OperationType,
+    VariableNode,
 )
+from graphql.type import assert_valid_schema
 from graphql.type.definition import GraphQLType
-from graphql.validation import ValidationContext, ValidationRule, validate
-
+from graphql.utilities import TypeInfo, print_schema, value_from_ast_untyped
+from graphql.validation import ValidationContext, ValidationRule
+
+from .cache import (
+    SharedVerdictCache,
+    VerdictCache,
+    VerdictSnapshot,
+    fingerprint,
+    limits_key,
+    parse_document,
+    query_fingerprint,
+    verdict_key,
+)
+from .gas import BatchGas, GasBatch, _protector_gas_batch
 from .misc import (
     DEFAULT_LIMITS,
     MISSING,
     MISSING_LIMITS,
+    AliasesLimitReached,
+    CircuitOpen,
     ComplexityLimitReached,
+    ConcurrencyLimitReached,
+    DefinitionsLimitReached,
     DepthLimitReached,
+    DocumentUsagesResult,
     EarlyStop,
+    Explanation,
+    FragmentDefinitionsLimitReached,
+    FragmentSpreadsLimitReached,
     GasLimitReached,
     Limits,
+    PathCost,
+    RootFieldsLimitReached,
     SelectionsLimitReached,
+    SubscriptionsLimitReached,
     UsagesResult,
+    Verdict,
     default_path_ignore_pattern,
 )
+from .subscription import SubscriptionBudgets, ThrottledSubscription
 
 _default_path_ignore_pattern = re.compile(default_path_ignore_pattern)
 _empty = frozenset()
+# variables of the current operation, required for evaluating directives
+_protector_variables: ContextVar[Optional[dict]] = ContextVar(
+    "graphene_protector_variables", default=None
+)
+# gas callables without declared purity (cache_on) called by the current
+# check, the verdict must not be cached then
+_protector_impure_gas: ContextVar[Optional[list]] = ContextVar(
+    "graphene_protector_impure_gas", default=None
+)
+# limits profile of the current operation (see get_protector_limits_profile)
+_protector_profile: ContextVar[Optional[str]] = ContextVar(
+    "graphene_protector_profile", default=None
+)
 
 
 def follow_of_type(field: GraphQLType) -> GraphQLType:
@@ -101,7 +152,7 @@ def gas_for_field(schema_field, **kwargs) -> int:
         if hasattr(schema_field, "_graphene_protector_gas"):
             retval = getattr(schema_field, "_graphene_protector_gas")
             if callable(retval):
-                retval = retval(schema_field=schema_field, **kwargs)
+                retval = _call_gas(retval, schema_field=schema_field, **kwargs)
             return retval
         if hasattr(schema_field, "__func__"):
             schema_field = getattr(schema_field, "__func__")
@@ -110,6 +161,14 @@ def gas_for_field(schema_field, **kwargs) -> int:
     return 0
 
 
+def _call_gas(gas, **kwargs) -> int:
+    if not isinstance(gas, (_MemoizedGas, BatchGas)):
+        impure = _protector_impure_gas.get()
+        if impure is not None:
+            impure.append(gas)
+    return gas(**kwargs)
+
+
 def limits_for_field(field, old_limits, **kwargs) -> Tuple[Limits, Limits]:
     # retrieve optional limitation attributes defined for the current
     # operation
@@ -119,6 +178,225 @@ def limits_for_field(field, old_limits, **kwargs) -> Tuple[Limits, Limits]:
     return merge_limits(old_limits, effective_limits), effective_limits
 
 
+def check_document_shape(
+    document: DocumentNode,
+    *,
+    limits: Limits,
+    on_error: Callable[[GraphQLError], None],
+) -> DocumentUsagesResult:
+    """
+    Linear pre-pass over the document (fragments are not expanded).
+    Catches alias amplification and fragment bombs before the tree walk
+    """
+    retval = DocumentUsagesResult(definitions=len(document.definitions))
+    if limits.definitions and retval.definitions > limits.definitions:
+        on_error(
+            DefinitionsLimitReached(
+                "Query has too many definitions",
+                document,
+                used_resources=retval,
+            )
+        )
+    fragments = {}
+    for definition in document.definitions:
+        if isinstance(definition, FragmentDefinitionNode):
+            fragments[definition.name.value] = definition
+    retval.fragment_definitions = len(fragments)
+    if (
+        limits.fragment_definitions
+        and retval.fragment_definitions > limits.fragment_definitions
+    ):
+        on_error(
+            FragmentDefinitionsLimitReached(
+                "Query has too many fragment definitions",
+                document,
+                used_resources=retval,
+            )
+        )
+    for definition in document.definitions:
+        # e.g. type system definitions
+        if not getattr(definition, "selection_set", None):
+            continue
+        if isinstance(definition, OperationDefinitionNode):
+            root_fields = 0
+            seen_fragments = set()
+            stack = [definition.selection_set]
+            while stack:
+                for selection in stack.pop().selections:
+                    if isinstance(selection, FieldNode):
+                        root_fields += 1
+                    elif isinstance(selection, InlineFragmentNode):
+                        stack.append(selection.selection_set)
+                    else:
+                        name = selection.name.value
+                        # fields of the same fragment are merged
+                        if name not in seen_fragments and name in fragments:
+                            seen_fragments.add(name)
+                            stack.append(fragments[name].selection_set)
+            if root_fields > retval.root_fields:
+                retval.root_fields = root_fields
+            if limits.root_fields and root_fields > limits.root_fields:
+                on_error(
+                    RootFieldsLimitReached(
+                        "Operation has too many root fields",
+                        definition,
+                        used_resources=retval,
+                    )
+                )
+        stack = [definition.selection_set]
+        while stack:
+            for selection in stack.pop().selections:
+                if isinstance(selection, FieldNode):
+                    if selection.alias:
+                        retval.aliases += 1
+                elif isinstance(selection, FragmentSpreadNode):
+                    retval.fragment_spreads += 1
+                if getattr(selection, "selection_set", None):
+                    stack.append(selection.selection_set)
+    # counted over the whole document, report them once
+    if limits.aliases and retval.aliases > limits.aliases:
+        on_error(
+            AliasesLimitReached(
+                "Query has too many aliases",
+                document,
+                used_resources=retval,
+            )
+        )
+    if (
+        limits.fragment_spreads
+        and retval.fragment_spreads > limits.fragment_spreads
+    ):
+        on_error(
+            FragmentSpreadsLimitReached(
+                "Query has too many fragment spreads",
+                document,
+                used_resources=retval,
+            )
+        )
+    return retval
+
+
+def _directive_condition(directive, variables) -> Optional[bool]:
+    # None: condition cannot be resolved statically
+    for argument in directive.arguments or ():
+        if argument.name.value != "if":
+            continue
+        value = argument.value
+        if isinstance(value, VariableNode):
+            value = (variables or {}).get(value.name.value)
+            return value if isinstance(value, bool) else None
+        return getattr(value, "value", None)
+    # if is optional for defer and stream
+    return True
+
+
+def _is_pruned(node, variables) -> bool:
+    for directive in node.directives:
+        name = directive.name.value
+        if name == "skip":
+            if _directive_condition(directive, variables) is True:
+                return True
+        elif name == "include":
+            if _directive_condition(directive, variables) is False:
+                return True
+    return False
+
+
+def _operation_variables(
+    definition: OperationDefinitionNode, variables: Optional[dict]
+) -> Optional[dict]:
+    # defaults of the operation apply to not provided variables
+    defaults = {
+        variable_definition.variable.name.value: value_from_ast_untyped(
+            variable_definition.default_value
+        )
+        for variable_definition in definition.variable_definitions or ()
+        if variable_definition.default_value is not None
+    }
+    if not defaults:
+        return variables
+    return {**defaults, **(variables or {})}
+
+
+def _is_deferred(node, variables) -> bool:
+    for directive in node.directives:
+        if directive.name.value in {"defer", "stream"}:
+            # not resolvable conditions are charged on the initial response
+            return _directive_condition(directive, variables) is True
+    return False
+
+
+def check_introspection(
+    node: Node,
+    validation_context: ValidationContext,
+    *,
+    limits: Limits,
+    on_error: Callable[[GraphQLError], None],
+    variables: Optional[dict] = None,
+) -> UsagesResult:
+    """
+    Check an introspection field (e.g. __schema) against the introspection
+    limits. Introspection is bounded independently of the schema limits
+    """
+    retval = UsagesResult(max_level_depth=1)
+    # selection_set, level_depth, fragments on the path (loop protection)
+    stack = [(node.selection_set, 1, _empty)]
+    while stack:
+        selection_set, level_depth, seen_fragments = stack.pop()
+        for selection in selection_set.selections:
+            if selection.directives and _is_pruned(selection, variables):
+                continue
+            if isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = validation_context.get_fragment(name)
+                if fragment is None or name in seen_fragments:
+                    continue
+                stack.append(
+                    (
+                        fragment.selection_set,
+                        level_depth,
+                        seen_fragments | {name},
+                    )
+                )
+            elif isinstance(selection, InlineFragmentNode):
+                stack.append(
+                    (selection.selection_set, level_depth, seen_fragments)
+                )
+            elif selection.selection_set:
+                if level_depth + 1 > retval.max_level_depth:
+                    retval.max_level_depth = level_depth + 1
+                if (
+                    limits.introspection_depth
+                    and retval.max_level_depth > limits.introspection_depth
+                ):
+                    on_error(
+                        DepthLimitReached(
+                            "Introspection is too deep",
+                            node,
+                            used_resources=retval,
+                        )
+                    )
+                    # don't descend further in case of full validation
+                    continue
+                stack.append(
+                    (selection.selection_set, level_depth + 1, seen_fragments)
+                )
+            else:
+                retval.selections += 1
+                if (
+                    limits.introspection_selections
+                    and retval.selections > limits.introspection_selections
+                ):
+                    on_error(
+                        SelectionsLimitReached(
+                            "Introspection selects too much",
+                            node,
+                            used_resources=retval,
+                        )
+                    )
+    return retval
+
+
 def _check_resource_usage(
     schema,
     node: Node,
@@ -136,6 +414,9 @@ def _check_resource_usage(
     auto_snakecase=False,
     camelcase_path=True,
     path_ignore_pattern: re.Pattern = _default_path_ignore_pattern,
+    variables: Optional[dict] = None,
+    explain: Optional[List[Optional[PathCost]]] = None,
+    cost_model=None,
 ) -> UsagesResult:
     # level 0: starts on query level. Every query is level 1
     retval = UsagesResult(
@@ -146,23 +427,47 @@ def _check_resource_usage(
     if limits.depth and retval.max_level_depth > limits.depth:
         on_error(DepthLimitReached("Query is too deep", used_resources=retval))
     for field in node.selection_set.selections:
+        # @defer and @stream parts are charged on their own budget
+        deferred = False
+        if field.directives:
+            # @skip/@include branches which are not executed
+            if _is_pruned(field, variables):
+                continue
+            deferred = _is_deferred(field, variables)
         if isinstance(field, InlineFragmentNode):
-            fieldname = field.type_condition.name.value
+            if field.type_condition:
+                fieldname = field.type_condition.name.value
+            else:
+                # without type condition the fragment is on the parent type
+                fieldname = getattr(
+                    getattr(schema, "_meta", schema), "name", ""
+                )
         else:
             fieldname = field.name.value
-        # ignore introspection queries
+        # introspection is checked against the introspection limits
         if fieldname.startswith("__"):
+            if getattr(field, "selection_set", None):
+                check_introspection(
+                    field,
+                    validation_context,
+                    limits=limits,
+                    on_error=on_error,
+                    variables=variables,
+                )
             continue
         if auto_snakecase and not hasattr(schema, fieldname):
             fieldname = to_snake_case(fieldname)
         if isinstance(field, FragmentSpreadNode):
             field = validation_context.get_fragment(field.name.value)
 
+        # the parent type itself, e.g. for fragments
+        type_fallback = False
         try:
             schema_field = getattr(schema, fieldname)
         except AttributeError:
             _name = None
-            if hasattr(field, "name"):
+            # fragment definitions have a name but are no fields
+            if isinstance(field, FieldNode):
                 _name = field.name
                 if hasattr(_name, "value"):
                     _name = _name.value
@@ -174,11 +479,24 @@ def _check_resource_usage(
                 schema_field = schema.fields[_name]
             else:
                 schema_field = schema
-
-        # add gas for field
-        retval.gas_used += get_gas_for_field(
-            schema_field, parent=schema, fieldname=fieldname, graphql_path=graphql_path
+                type_fallback = True
+
+        # add gas for field, annotations of types are applied to the fields
+        # returning them (see _type_cost_index), not again on fragments
+        gas_used = (
+            0
+            if type_fallback
+            else get_gas_for_field(
+                schema_field,
+                parent=schema,
+                fieldname=fieldname,
+                graphql_path=graphql_path,
+            )
         )
+        if deferred:
+            retval.deferred_gas += gas_used
+        else:
+            retval.gas_used += gas_used
 
         if isinstance(field, (GraphQLUnionType, GraphQLInterfaceType)):
             merged_limits = limits
@@ -203,11 +521,16 @@ def _check_resource_usage(
                     auto_snakecase=auto_snakecase,
                     camelcase_path=camelcase_path,
                     path_ignore_pattern=path_ignore_pattern,
+                    variables=variables,
+                    explain=explain,
+                    cost_model=cost_model,
                     get_limits_for_field=get_limits_for_field,
                     get_gas_for_field=get_gas_for_field,
-                    level_depth=level_depth + 1
-                    if field_contributes_to_score
-                    else level_depth,
+                    level_depth=(
+                        level_depth + 1
+                        if field_contributes_to_score
+                        else level_depth
+                    ),
                     # don't increase complexity, in unions it stays the same
                     level_complexity=level_complexity,
                     seen_limits=seen_limits,
@@ -219,11 +542,17 @@ def _check_resource_usage(
                 # we know here, that there are no individual sub_limits
 
                 # called per query, selection
+                if cost_model is None:
+                    complexity = (
+                        local_result.max_level_complexity - level_complexity
+                    ) * local_result.selections
+                else:
+                    complexity = cost_model.complexity(
+                        field, local_result, level_depth, variables
+                    )
                 if (
                     merged_limits.complexity
-                    and (local_result.max_level_complexity - level_complexity)
-                    * local_result.selections
-                    > merged_limits.complexity
+                    and complexity > merged_limits.complexity
                 ):
                     on_error(
                         ComplexityLimitReached(
@@ -231,13 +560,19 @@ def _check_resource_usage(
                             node,
                             used_resources=replace(
                                 retval,
-                                max_level_complexity=(
-                                    local_result.max_level_complexity - level_complexity
-                                )
-                                * local_result.selections,
+                                max_level_complexity=complexity,
                             ),
                         )
                     )
+                if cost_model is None:
+                    retval.complexity = max(
+                        retval.complexity, complexity, local_result.complexity
+                    )
+                else:
+                    retval.complexity = max(
+                        cost_model.combine(retval.complexity, complexity),
+                        local_result.complexity,
+                    )
                 # find max of selections for unions
                 if local_result.selections > local_union_selections:
                     local_union_selections = local_result.selections
@@ -256,13 +591,23 @@ def _check_resource_usage(
             del local_union_selections
             del local_gas
         elif field.selection_set:
-            merged_limits, sub_limits = get_limits_for_field(
-                schema_field,
-                limits,
-                parent=schema,
-                fieldname=fieldname,
-                graphql_path=graphql_path,
-            )
+            if type_fallback:
+                merged_limits, sub_limits = limits, MISSING_LIMITS
+            else:
+                merged_limits, sub_limits = get_limits_for_field(
+                    schema_field,
+                    limits,
+                    parent=schema,
+                    fieldname=fieldname,
+                    graphql_path=graphql_path,
+                )
+            if deferred:
+                # the deferred part is checked against its own budget
+                merged_limits = replace(
+                    merged_limits,
+                    selections=merged_limits.deferred_selections,
+                    gas=merged_limits.deferred_gas,
+                )
             allow_restart_counters = True
             field_contributes_to_score = True
             _npath = "{}/{}".format(
@@ -286,6 +631,10 @@ def _check_resource_usage(
                 sub_field_type = schema_field
             else:
                 sub_field_type = follow_of_type(schema_field.type)
+            if explain is not None:
+                # reserve the slot, so parents are listed before children
+                explain_index = len(explain)
+                explain.append(None)
             yield partial(
                 _check_resource_usage,
                 sub_field_type,
@@ -296,26 +645,53 @@ def _check_resource_usage(
                 auto_snakecase=auto_snakecase,
                 camelcase_path=camelcase_path,
                 path_ignore_pattern=path_ignore_pattern,
+                variables=variables,
+                explain=explain,
+                cost_model=cost_model,
                 get_limits_for_field=get_limits_for_field,
                 get_gas_for_field=get_gas_for_field,
                 # field_contributes_to_score will be casted to 1 for True
-                level_depth=level_depth + field_contributes_to_score
-                if sub_limits.depth is MISSING or not allow_restart_counters
-                else 1,
-                level_complexity=level_complexity + field_contributes_to_score
-                if sub_limits.complexity is MISSING or not allow_restart_counters
-                else 1,
+                level_depth=(
+                    level_depth + field_contributes_to_score
+                    if sub_limits.depth is MISSING
+                    or not allow_restart_counters
+                    else 1
+                ),
+                level_complexity=(
+                    level_complexity + field_contributes_to_score
+                    if sub_limits.complexity is MISSING
+                    or not allow_restart_counters
+                    else 1
+                ),
                 seen_limits=seen_limits,
                 graphql_path=_npath,
                 get_result=get_result,
             )
             local_result = get_result()
             # called per query, selection
+            if cost_model is None:
+                complexity = (
+                    local_result.max_level_depth - level_depth
+                ) * local_result.selections
+            else:
+                complexity = cost_model.complexity(
+                    field, local_result, level_depth, variables
+                )
+            if explain is not None:
+                explain[explain_index] = PathCost(
+                    path=_npath,
+                    max_level_depth=local_result.max_level_depth,
+                    complexity=max(complexity, local_result.complexity),
+                    selections=local_result.selections,
+                    gas_used=gas_used + local_result.gas_used,
+                    deferred=deferred,
+                    limits=merged_limits,
+                    reset=sub_limits is not MISSING_LIMITS
+                    and allow_restart_counters,
+                )
             if (
                 merged_limits.complexity
-                and (local_result.max_level_depth - level_depth)
-                * local_result.selections
-                > merged_limits.complexity
+                and complexity > merged_limits.complexity
             ):
                 on_error(
                     ComplexityLimitReached(
@@ -323,13 +699,17 @@ def _check_resource_usage(
                         node,
                         used_resources=replace(
                             retval,
-                            max_level_complexity=(
-                                local_result.max_level_depth - level_depth
-                            )
-                            * local_result.selections,
+                            max_level_complexity=complexity,
                         ),
                     )
                 )
+            if cost_model is None:
+                if complexity > retval.complexity:
+                    retval.complexity = complexity
+            else:
+                retval.complexity = cost_model.combine(
+                    retval.complexity, complexity
+                )
             # increase level counter only if limits are not redefined
             if (
                 sub_limits.depth is MISSING or "depth" in sub_limits.passthrough
@@ -340,22 +720,55 @@ def _check_resource_usage(
                 or "complexity" in sub_limits.passthrough
             ) and local_result.max_level_complexity > retval.max_level_complexity:
                 retval.max_level_complexity = local_result.max_level_complexity
+            if (
+                sub_limits.complexity is MISSING
+                or "complexity" in sub_limits.passthrough
+            ) and local_result.complexity > retval.complexity:
+                retval.complexity = local_result.complexity
 
             # ignore fields with selection_set itself for selection_count
             # because we have depth for that
+            if deferred:
+                if (
+                    sub_limits.deferred_selections is MISSING
+                    or "deferred_selections" in sub_limits.passthrough
+                ):
+                    retval.deferred_selections += local_result.selections
+                if (
+                    sub_limits.deferred_gas is MISSING
+                    or "deferred_gas" in sub_limits.passthrough
+                ):
+                    retval.deferred_gas += local_result.gas_used
+            else:
+                if (
+                    sub_limits.selections is MISSING
+                    or "selections" in sub_limits.passthrough
+                ):
+                    retval.selections += local_result.selections
+                if (
+                    sub_limits.gas is MISSING
+                    or "gas" in sub_limits.passthrough
+                ):
+                    retval.gas_used += local_result.gas_used
+            if (
+                sub_limits.deferred_selections is MISSING
+                or "deferred_selections" in sub_limits.passthrough
+            ):
+                retval.deferred_selections += local_result.deferred_selections
             if (
-                sub_limits.selections is MISSING
-                or "selections" in sub_limits.passthrough
+                sub_limits.deferred_gas is MISSING
+                or "deferred_gas" in sub_limits.passthrough
             ):
-                retval.selections += local_result.selections
-            if sub_limits.gas is MISSING or "gas" in sub_limits.passthrough:
-                retval.gas_used += local_result.gas_used
+                retval.deferred_gas += local_result.deferred_gas
             del schema_field
         else:
             # gas for field itself already calculated in parent field.selection_set
             if not path_ignore_pattern.match(graphql_path):
                 # field_contributes_to_score
-                retval.selections += 1
+                if deferred:
+                    retval.deferred_selections += 1
+                else:
+                    retval.selections += 1
 
         if limits.selections and retval.selections > limits.selections:
             on_error(
@@ -367,6 +780,25 @@ def _check_resource_usage(
             on_error(
                 GasLimitReached("Query uses too much gas", node, used_resources=retval)
             )
+        if (
+            limits.deferred_selections
+            and retval.deferred_selections > limits.deferred_selections
+        ):
+            on_error(
+                SelectionsLimitReached(
+                    "Deferred parts of query select too much",
+                    node,
+                    used_resources=retval,
+                )
+            )
+        if limits.deferred_gas and retval.deferred_gas > limits.deferred_gas:
+            on_error(
+                GasLimitReached(
+                    "Deferred parts of query use too much gas",
+                    node,
+                    used_resources=retval,
+                )
+            )
     yield retval
 
 
@@ -382,9 +814,21 @@ def check_resource_usage(
     path_ignore_pattern: re.Pattern = _default_path_ignore_pattern,
     get_limits_for_field=limits_for_field,
     get_gas_for_field=gas_for_field,
+    variables: Optional[dict] = None,
+    explain: Optional[List[Optional[PathCost]]] = None,
+    cost_model=None,
 ):
+    """
+    Checks the selections of node against the limits. If explain is a list,
+    the costs of the operation and of every field with selections are
+    appended (pre-order). Slots of fields aborted by an error stay None.
+    cost_model (see cost.CostModel) replaces the builtin complexity
+    """
     result_stack = []
     seen_limits = set()
+    if explain is not None:
+        explain_index = len(explain)
+        explain.append(None)
 
     fn_stack = [
         _check_resource_usage(
@@ -396,6 +840,9 @@ def check_resource_usage(
             auto_snakecase=auto_snakecase,
             camelcase_path=camelcase_path,
             path_ignore_pattern=path_ignore_pattern,
+            variables=variables,
+            explain=explain,
+            cost_model=cost_model,
             get_gas_for_field=get_gas_for_field,
             get_limits_for_field=get_limits_for_field,
             seen_limits=seen_limits,
@@ -416,10 +863,95 @@ def check_resource_usage(
                 result_stack.append(next_el)
         except StopIteration:
             fn_stack.pop()
-    return result_stack.pop()
+    retval = result_stack.pop()
+    if (
+        cost_model is not None
+        and cost_model.check_operation
+        and limits.complexity
+        and retval.complexity > limits.complexity
+    ):
+        on_error(
+            ComplexityLimitReached(
+                "Query is too complex", node, used_resources=retval
+            )
+        )
+    if explain is not None:
+        explain[explain_index] = PathCost(
+            max_level_depth=retval.max_level_depth,
+            complexity=retval.complexity,
+            selections=retval.selections,
+            gas_used=retval.gas_used,
+            limits=limits,
+        )
+    return retval
+
+
+# keyword arguments of gas callables
+_gas_arguments = frozenset(
+    {"schema_field", "parent", "fieldname", "graphql_path"}
+)
+
 
+class _MemoizedGas:
+    """
+    Gas callable which is pure in the cache_on arguments. The arguments
+    are determined by schema and document, so the verdict key covers them
+    """
+
+    def __init__(self, fn, cache_on: Tuple[str, ...], maxsize: int):
+        unknown = set(cache_on).difference(_gas_arguments)
+        if unknown:
+            raise ValueError(
+                "invalid cache_on arguments: %s" % ", ".join(sorted(unknown))
+            )
+        self.fn = fn
+        self.cache_on = tuple(cache_on)
+        self.maxsize = maxsize
+        # LRU, like VerdictCache
+        self.cache: "OrderedDict[tuple, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, **kwargs):
+        key = tuple(kwargs.get(name) for name in self.cache_on)
+        try:
+            with self._lock:
+                value = self.cache[key]
+                self.cache.move_to_end(key)
+            return value
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable
+            return self.fn(**kwargs)
+        value = self.fn(**kwargs)
+        with self._lock:
+            self.cache[key] = value
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        return value
+
+    def cache_clear(self):
+        with self._lock:
+            self.cache.clear()
+
+
+def gas_usage(
+    gas_used: Union[Callable[[], int], int],
+    *,
+    cache_on: Optional[Tuple[str, ...]] = None,
+    maxsize: int = 1024,
+):
+    """
+    Annotate the gas of a field or type. Callables receive schema_field,
+    parent, fieldname and graphql_path as keyword arguments. Results of
+    callables which are pure in the cache_on arguments are memoized
+    (e.g. cache_on=("parent", "fieldname")), verdicts which depend on
+    other callables are not cached
+    """
+    if cache_on is not None and callable(gas_used):
+        gas_used = _MemoizedGas(gas_used, cache_on, maxsize)
 
-def gas_usage(gas_used: Union[Callable[[], int], int]):
     def wrapper(schema_field):
         setattr(schema_field, "_graphene_protector_gas", gas_used)
         return schema_field
@@ -427,6 +959,283 @@ def gas_usage(gas_used: Union[Callable[[], int], int]):
     return wrapper
 
 
+def _annotated_field(graphql_schema, graphql_type, field_name):
+    # the object carrying the gas_usage and limits annotations
+    strawberry_schema = getattr(graphql_schema, "_strawberry_schema", None)
+    if strawberry_schema is not None:
+        definition = strawberry_schema.schema_converter.type_map[
+            graphql_type.name
+        ].definition
+        if not hasattr(definition, "get_field"):
+            return definition
+        return definition.get_field(
+            to_snake_case(field_name)
+        ) or definition.get_field(field_name)
+    graphene_type = getattr(graphql_type, "graphene_type", None)
+    if graphene_type is not None:
+        for name in (field_name, to_snake_case(field_name)):
+            if hasattr(graphene_type, name):
+                return getattr(graphene_type, name)
+        return None
+    return graphql_type.fields[field_name]
+
+
+def _type_name(graphql_type) -> str:
+    # graphene types or graphql-core types
+    return getattr(
+        getattr(graphql_type, "_meta", None), "name", None
+    ) or getattr(graphql_type, "name", "")
+
+
+def _annotated_type(graphql_schema, graphql_type):
+    # the object carrying the type level gas_usage and limits annotations
+    strawberry_schema = getattr(graphql_schema, "_strawberry_schema", None)
+    if strawberry_schema is not None:
+        converted = strawberry_schema.schema_converter.type_map.get(
+            graphql_type.name
+        )
+        if converted is None:
+            return None
+        return getattr(converted.definition, "origin", None)
+    return getattr(graphql_type, "graphene_type", graphql_type)
+
+
+def _type_cost_index(graphql_schema) -> Dict[Tuple[str, str], tuple]:
+    """
+    (type gas, type limits) of the type returned by a field per
+    (type name, field name), for types decorated with gas_usage or Limits.
+    Built once per schema
+    """
+    cached = getattr(graphql_schema, "_protector_type_cost_index", None)
+    if cached is not None:
+        return cached
+    type_costs = {}
+    for type_name, graphql_type in graphql_schema.type_map.items():
+        if type_name.startswith("__") or not isinstance(
+            graphql_type,
+            (GraphQLObjectType, GraphQLInterfaceType, GraphQLUnionType),
+        ):
+            continue
+        annotated = _annotated_type(graphql_schema, graphql_type)
+        gas = getattr(annotated, "_graphene_protector_gas", None)
+        limits = getattr(annotated, "_graphene_protector_limits", None)
+        if gas is not None or limits is not None:
+            type_costs[type_name] = (gas, limits)
+    index = {}
+    if type_costs:
+        for type_name, graphql_type in graphql_schema.type_map.items():
+            if type_name.startswith("__") or not isinstance(
+                graphql_type, (GraphQLObjectType, GraphQLInterfaceType)
+            ):
+                continue
+            for field_name, graphql_field in graphql_type.fields.items():
+                type_cost = type_costs.get(
+                    follow_of_type(graphql_field.type).name
+                )
+                if type_cost is None:
+                    continue
+                gas, limits = type_cost
+                if limits is not None:
+                    field_limits = _extract_limits(
+                        _annotated_field(
+                            graphql_schema, graphql_type, field_name
+                        )
+                    )
+                    # field limits are more specific
+                    if field_limits is not MISSING_LIMITS:
+                        limits = merge_limits(limits, field_limits)
+                index[(type_name, field_name)] = (gas, limits)
+                index[(type_name, to_snake_case(field_name))] = (gas, limits)
+    graphql_schema._protector_type_cost_index = index
+    return index
+
+
+def _gas_annotation(annotated):
+    while annotated is not None:
+        if hasattr(annotated, "_graphene_protector_gas"):
+            return getattr(annotated, "_graphene_protector_gas")
+        annotated = getattr(annotated, "__func__", None)
+    return None
+
+
+def _has_batch_gas(graphql_schema) -> bool:
+    """the schema uses BatchGas providers, checked once per schema"""
+    cached = getattr(graphql_schema, "_protector_has_batch_gas", None)
+    if cached is not None:
+        return cached
+    found = False
+    for type_name, graphql_type in graphql_schema.type_map.items():
+        if found:
+            break
+        if type_name.startswith("__") or not isinstance(
+            graphql_type,
+            (GraphQLObjectType, GraphQLInterfaceType, GraphQLUnionType),
+        ):
+            continue
+        annotations = [_annotated_type(graphql_schema, graphql_type)]
+        if not isinstance(graphql_type, GraphQLUnionType):
+            annotations.extend(
+                _annotated_field(graphql_schema, graphql_type, field_name)
+                for field_name in graphql_type.fields
+            )
+        found = any(
+            isinstance(_gas_annotation(annotated), BatchGas)
+            for annotated in annotations
+        )
+    graphql_schema._protector_has_batch_gas = found
+    return found
+
+
+def _gas_key(gas):
+    # stable representation, callables by name (their results can change)
+    if isinstance(gas, BatchGas):
+        return ("BatchGas", gas.name, gas.default)
+    if isinstance(gas, _MemoizedGas):
+        gas = gas.fn
+    if callable(gas):
+        return "%s.%s" % (
+            getattr(gas, "__module__", None),
+            getattr(gas, "__qualname__", type(gas).__qualname__),
+        )
+    return gas
+
+
+def _annotations_key(graphql_schema) -> tuple:
+    """
+    gas and limits annotations of the fields and the type costs, part of
+    the schema hash
+    """
+    annotations = []
+    for type_name, graphql_type in sorted(graphql_schema.type_map.items()):
+        if type_name.startswith("__") or not isinstance(
+            graphql_type, (GraphQLObjectType, GraphQLInterfaceType)
+        ):
+            continue
+        for field_name in sorted(graphql_type.fields):
+            annotated = _annotated_field(
+                graphql_schema, graphql_type, field_name
+            )
+            gas = _gas_annotation(annotated)
+            limits = _extract_limits(annotated)
+            if gas is None and limits is MISSING_LIMITS:
+                continue
+            annotations.append(
+                (
+                    type_name,
+                    field_name,
+                    _gas_key(gas),
+                    None if limits is MISSING_LIMITS else limits_key(limits),
+                )
+            )
+    for (type_name, field_name), (gas, limits) in sorted(
+        _type_cost_index(graphql_schema).items()
+    ):
+        annotations.append(
+            (
+                type_name,
+                field_name,
+                _gas_key(gas),
+                None if limits is None else limits_key(limits),
+            )
+        )
+    return tuple(annotations)
+
+
+async def _prefetch_gas(superself, args, kwargs) -> Optional[GasBatch]:
+    """
+    Collects the keys of the BatchGas providers of the document and loads
+    them in one batch per provider. None if there is nothing to load.
+    Raises GraphQLError if loading fails
+    """
+    if not kwargs.get("check_limits", True):
+        return None
+    query = _extract_query(args, kwargs)
+    if not query:
+        return None
+    schema = _get_graphql_schema(superself)
+    if not _has_batch_gas(schema):
+        return None
+    try:
+        parsed = parse_document(query)
+    except GraphQLError:
+        return None
+    superself.protector_decorate_graphql_schema(schema)
+    batch = GasBatch()
+    token = _protector_gas_batch.set(batch)
+    try:
+        _validate_limits(schema, parsed.document)
+    finally:
+        _protector_gas_batch.reset(token)
+    if not batch.keys:
+        return None
+    try:
+        await batch.resolve(_extract_context(kwargs))
+    except Exception as error:
+        raise GraphQLError(
+            "Gas could not be loaded", original_error=error
+        ) from error
+    return batch
+
+
+def _gas_batch_key():
+    batch = _protector_gas_batch.get()
+    if batch is None:
+        return None
+    return batch.key()
+
+
+def _type_costs_gas(get_gas_for_field, index):
+    def wrapper(field, parent, fieldname, **kwargs):
+        gas = get_gas_for_field(
+            field, parent=parent, fieldname=fieldname, **kwargs
+        )
+        type_cost = index.get((_type_name(parent), fieldname))
+        if type_cost is None or not type_cost[0]:
+            return gas
+        type_gas = type_cost[0]
+        if callable(type_gas):
+            type_gas = _call_gas(
+                type_gas,
+                schema_field=field,
+                parent=parent,
+                fieldname=fieldname,
+                **kwargs,
+            )
+        return gas + type_gas
+
+    return wrapper
+
+
+def _type_costs_limits(get_limits_for_field, index):
+    def wrapper(field, old_limits, parent, fieldname, **kwargs):
+        type_cost = index.get((_type_name(parent), fieldname))
+        if type_cost is None or type_cost[1] is None:
+            return get_limits_for_field(
+                field, old_limits, parent=parent, fieldname=fieldname, **kwargs
+            )
+        # the identity of the limits is stable (required for loop detection)
+        return merge_limits(old_limits, type_cost[1]), type_cost[1]
+
+    return wrapper
+
+
+def _override_gas(get_gas_for_field, overrides: Dict[str, Dict[str, int]]):
+    # overrides: {type name: {field name: gas}}
+    def wrapper(field, parent, fieldname, **kwargs):
+        type_overrides = overrides.get(_type_name(parent))
+        if type_overrides:
+            if fieldname in type_overrides:
+                return type_overrides[fieldname]
+            camelcase = to_camel_case(fieldname)
+            if camelcase in type_overrides:
+                return type_overrides[camelcase]
+        return get_gas_for_field(
+            field, parent=parent, fieldname=fieldname, **kwargs
+        )
+
+    return wrapper
+
+
 class LimitsValidationRule(ValidationRule):
     default_limits = None
     path_ignore_pattern = None
@@ -435,6 +1244,11 @@ class LimitsValidationRule(ValidationRule):
     # But no priority as this code works also
     auto_snakecase = None
     camelcase_path = None
+    # collect the costs per path and attach them to the errors,
+    # implies full_validation
+    explain = None
+    # replaces the builtin complexity (see cost.CostModel)
+    cost_model = None
 
     def __init__(self, context):
         super().__init__(context)
@@ -442,11 +1256,21 @@ class LimitsValidationRule(ValidationRule):
         # if not set use schema to get defaults or set in case no limits
         # are found to DEFAULT:LIMITS
         if not self.default_limits:
+            # limits of the active profile
             self.default_limits = getattr(
                 schema,
-                "get_protector_default_limits",
-                lambda: DEFAULT_LIMITS,
+                "get_protector_limits",
+                getattr(
+                    schema,
+                    "get_protector_default_limits",
+                    lambda: DEFAULT_LIMITS,
+                ),
             )()
+        else:
+            # resolve MISSING, e.g. fields added in newer versions
+            self.default_limits = merge_limits(
+                DEFAULT_LIMITS, self.default_limits
+            )
         if not self.path_ignore_pattern:
             self.path_ignore_pattern = getattr(
                 schema,
@@ -455,6 +1279,15 @@ class LimitsValidationRule(ValidationRule):
             )()
             if not isinstance(self.path_ignore_pattern, re.Pattern):
                 self.path_ignore_pattern = re.compile(self.path_ignore_pattern)
+        if self.explain is None:
+            self.explain = getattr(
+                schema,
+                "get_protector_explain",
+                lambda: False,
+            )()
+        if self.explain:
+            # complete costs instead of the costs up to the first error
+            self.full_validation = True
         if self.full_validation is None:
             self.full_validation = getattr(
                 schema,
@@ -474,6 +1307,21 @@ class LimitsValidationRule(ValidationRule):
                 "get_protector_camelcase_path",
                 lambda: self.auto_snakecase,
             )()
+        if self.cost_model is None:
+            self.cost_model = getattr(
+                schema,
+                "get_protector_cost_model",
+                lambda: None,
+            )()
+        self.gas_overrides = getattr(
+            schema, "get_protector_gas_overrides", lambda: None
+        )()
+        self.type_cost_index = _type_cost_index(schema)
+        # usages per operation name
+        self.usages: Dict[Optional[str], UsagesResult] = {}
+        # costs per path per operation name, only with explain
+        self.explanations: Dict[Optional[str], List[PathCost]] = {}
+        self.reported_errors: List[GraphQLError] = []
 
     def enter(self, node, key, parent, path, ancestors):
         if parent is not None:
@@ -481,6 +1329,15 @@ class LimitsValidationRule(ValidationRule):
         schema = self.context.schema
 
         document: List[DefinitionNode] = self.context.document
+        if getattr(self, "protector_on", True):
+            try:
+                check_document_shape(
+                    document,
+                    limits=self.default_limits,
+                    on_error=self.report_error,
+                )
+            except EarlyStop:
+                return None
         for definition in document.definitions:
             if not isinstance(definition, OperationDefinitionNode):
                 continue
@@ -514,14 +1371,38 @@ class LimitsValidationRule(ValidationRule):
                     ).definition
                     # e.g. union
                     if not hasattr(definition, "get_field"):
-                        return gas_for_field(definition)
+                        return gas_for_field(
+                            definition,
+                            parent=parent,
+                            fieldname=fieldname,
+                            **kwargs,
+                        )
 
                     nfield = definition.get_field(fieldname)
-                    return gas_for_field(nfield)
+                    # callables (e.g. BatchGas keys) depend on them
+                    return gas_for_field(
+                        nfield, parent=parent, fieldname=fieldname, **kwargs
+                    )
+
+            if self.type_cost_index:
+                get_gas_for_field = _type_costs_gas(
+                    get_gas_for_field, self.type_cost_index
+                )
+                get_limits_for_field = _type_costs_limits(
+                    get_limits_for_field, self.type_cost_index
+                )
+            if self.gas_overrides:
+                get_gas_for_field = _override_gas(
+                    get_gas_for_field, self.gas_overrides
+                )
 
             if getattr(self, "protector_on", True):
+                explain = [] if self.explain else None
+                errors_before = len(self.reported_errors)
                 try:
-                    check_resource_usage(
+                    self.usages[
+                        definition.name.value if definition.name else None
+                    ] = check_resource_usage(
                         maintype,
                         definition,
                         self.context,
@@ -532,62 +1413,523 @@ class LimitsValidationRule(ValidationRule):
                         auto_snakecase=self.auto_snakecase,
                         camelcase_path=self.camelcase_path,
                         path_ignore_pattern=self.path_ignore_pattern,
+                        variables=_operation_variables(
+                            definition, _protector_variables.get()
+                        ),
+                        explain=explain,
+                        cost_model=self.cost_model,
                     )
                 except EarlyStop:
                     pass
+                if explain is not None:
+                    paths = [path_cost for path_cost in explain if path_cost]
+                    self.explanations[
+                        definition.name.value if definition.name else None
+                    ] = paths
+                    extension = _explain_extension(paths)
+                    for error in self.reported_errors[errors_before:]:
+                        error.extensions["explain"] = extension
 
     def report_error(self, error):
+        self.reported_errors.append(error)
         self.context.report_error(error)
         if not self.full_validation:
             raise EarlyStop()
 
 
-_rules = [LimitsValidationRule]
+class _ExplainValidationRule(LimitsValidationRule):
+    explain = True
+
+
+def _explain_extension(paths: List[PathCost]) -> List[dict]:
+    # json serializable variant of the path costs
+    return [
+        {
+            "path": path_cost.path,
+            "maxLevelDepth": path_cost.max_level_depth,
+            "complexity": path_cost.complexity,
+            "selections": path_cost.selections,
+            "gasUsed": path_cost.gas_used,
+            "deferred": path_cost.deferred,
+            "reset": path_cost.reset,
+            "limits": {
+                limit_field.name: getattr(path_cost.limits, limit_field.name)
+                for limit_field in fields(Limits)
+                if limit_field.name != "passthrough"
+                and _is_limited(getattr(path_cost.limits, limit_field.name))
+            },
+        }
+        for path_cost in paths
+    ]
+
+
+def _run_limits_rule(schema, document_ast, rule):
+    assert_valid_schema(schema)
+    errors = []
+    context = ValidationContext(
+        schema, document_ast, TypeInfo(schema), errors.append
+    )
+    visitor = rule(context)
+    visitor.enter(document_ast, None, None, [], [])
+    return errors, visitor
+
+
+def _validate_limits(schema, document_ast, rule=LimitsValidationRule):
+    """
+    Variant of validate for the limits rule. The rule only inspects the
+    document node so there is no need to visit every node.
+    Returns the errors and the usages per operation
+    """
+    errors, visitor = _run_limits_rule(schema, document_ast, rule)
+    return errors, visitor.usages
+
+
+def _validate_limits_cacheable(
+    schema, document_ast, rule=LimitsValidationRule
+):
+    """
+    _validate_limits, additionally returns whether the verdict can be
+    cached: not if gas callables without cache_on were called
+    """
+    impure = []
+    token = _protector_impure_gas.set(impure)
+    try:
+        errors, usages = _validate_limits(schema, document_ast, rule)
+    finally:
+        _protector_impure_gas.reset(token)
+    return errors, usages, not impure
+
+
+def _extract_query(args, kwargs):
+    if kwargs.get("query"):
+        return kwargs["query"]
+    if args:
+        return args[0]
+    return None
+
+
+def _is_introspection_document(document_ast) -> bool:
+    # introspection only, without variables
+    has_operation = False
+    for definition in document_ast.definitions:
+        if not isinstance(definition, OperationDefinitionNode):
+            continue
+        if (
+            definition.operation != OperationType.QUERY
+            or definition.variable_definitions
+        ):
+            return False
+        for selection in definition.selection_set.selections:
+            if not isinstance(
+                selection, FieldNode
+            ) or not selection.name.value.startswith("__"):
+                return False
+        has_operation = True
+    return has_operation
+
+
+# arguments which can change the result of an introspection query
+_introspection_uncacheable_kwargs = (
+    "context",
+    "context_value",
+    "root",
+    "root_value",
+    "middleware",
+    "validation_rules",
+    "field_resolver",
+    "type_resolver",
+    "execution_context_class",
+)
+
+
+def _is_introspection_cacheable(superself, args, kwargs) -> bool:
+    if superself.protector_introspection_cache_size <= 0 or len(args) > 1:
+        return False
+    return all(
+        kwargs.get(name) is None for name in _introspection_uncacheable_kwargs
+    )
+
+
+def _copy_result(result: ExecutionResult) -> ExecutionResult:
+    # callers may modify the result
+    return ExecutionResult(
+        data=copy.deepcopy(result.data),
+        errors=result.errors,
+        extensions=copy.deepcopy(result.extensions),
+    )
+
+
+def _get_cached_introspection(superself, args, kwargs):
+    cache = superself.get_protector_introspection_cache()
+    if not cache or not _is_introspection_cacheable(superself, args, kwargs):
+        return None
+    query = _extract_query(args, kwargs)
+    if not isinstance(query, str):
+        return None
+    entry = cache.get((query, kwargs.get("operation_name")))
+    if entry is None:
+        return None
+    limits, result = entry
+    # limits can be changed dynamically
+    if limits != superself.get_protector_limits():
+        return None
+    return _copy_result(result)
+
+
+def _cache_introspection(superself, args, kwargs, document_ast, result):
+    if (
+        document_ast is None
+        or result.errors
+        or not _is_introspection_cacheable(superself, args, kwargs)
+        or not _is_introspection_document(document_ast)
+    ):
+        return
+    cache = superself.get_protector_introspection_cache()
+    with _introspection_cache_lock:
+        while len(cache) >= superself.protector_introspection_cache_size:
+            cache.pop(next(iter(cache)))
+        cache[(_extract_query(args, kwargs), kwargs.get("operation_name"))] = (
+            superself.get_protector_limits(),
+            _copy_result(result),
+        )
+
+
+_introspection_cache_lock = threading.Lock()
+
+
+def _get_graphql_schema(superself):
+    if hasattr(superself, "graphql_schema"):
+        return getattr(superself, "graphql_schema")
+    elif hasattr(superself, "_schema"):
+        return getattr(superself, "_schema")
+    return superself
+
+
+def _check_load_limits(verdict: Verdict, limits: Limits) -> Verdict:
+    # verdicts are stored with the costs for the default limits
+    errors = []
+    for usage in verdict.usages.values():
+        if (
+            _is_limited(limits.complexity)
+            and usage.complexity > limits.complexity
+        ):
+            errors.append(
+                ComplexityLimitReached(
+                    "Query is too complex", used_resources=usage
+                )
+            )
+        elif _is_limited(limits.gas) and usage.gas_used > limits.gas:
+            errors.append(
+                GasLimitReached(
+                    "Query uses too much gas", used_resources=usage
+                )
+            )
+    if not errors:
+        return verdict
+    return Verdict(errors=tuple(errors), usages=verdict.usages)
+
+
+def _check_query(
+    superself, schema, query, parsed, operation_name=None
+) -> Verdict:
+    # the shared path of the limit checks of SchemaMixin schemas, not taken
+    # by protector_per_operation_validation=False, custom validation rules
+    # of the strawberry extension and check_many (no heavy hitters there)
+    verdict = _check_query_cached(superself, schema, query, parsed)
+    if not verdict.errors:
+        limits = superself.get_protector_load_limits()
+        if limits is not None:
+            verdict = _check_load_limits(verdict, limits)
+    heavy_hitters = superself.get_protector_heavy_hitters()
+    # also cached verdicts, the rule only runs on cache misses
+    if heavy_hitters is not None and isinstance(query, str):
+        heavy_hitters.record(
+            query_fingerprint(query),
+            (
+                _select_usage(verdict.usages, operation_name)
+                if verdict.usages
+                else UsagesResult()
+            ),
+            query=query,
+            rejected=bool(verdict.errors),
+        )
+    return verdict
+
+
+def _gas_overrides_key(superself) -> Optional[bytes]:
+    overrides = superself.get_protector_gas_overrides()
+    if not overrides:
+        return None
+    # cached by identity of the table
+    cached = getattr(superself, "_protector_gas_overrides_key", None)
+    if cached is None or cached[0] is not overrides:
+        cached = (
+            overrides,
+            fingerprint(
+                tuple(
+                    (type_name, tuple(sorted(fields.items())))
+                    for type_name, fields in sorted(overrides.items())
+                )
+            ),
+        )
+        superself._protector_gas_overrides_key = cached
+    return cached[1]
+
+
+def _cost_model_key(superself, document):
+    cost_model = superself.get_protector_cost_model()
+    if cost_model is None:
+        return None
+    return cost_model.key(_protector_variables.get(), document)
+
+
+def _check_query_cached(superself, schema, query, parsed) -> Verdict:
+    cache = superself.get_protector_verdict_cache()
+    snapshot = superself.get_protector_verdict_snapshot()
+    key = None
+    if cache is not None or snapshot is not None:
+        key = verdict_key(
+            query,
+            superself.get_protector_limits(),
+            parsed,
+            _protector_variables.get(),
+            superself.get_protector_path_ignore_pattern(),
+            superself.get_protector_full_validation(),
+            _gas_overrides_key(superself),
+            bool(superself.get_protector_explain()),
+            _cost_model_key(superself, parsed.document),
+            _gas_batch_key(),
+        )
+        if key is not None and cache is not None:
+            verdict = cache.get(key, parsed.document)
+            if verdict is not None:
+                return verdict
+        if key is not None and snapshot is not None:
+            verdict = snapshot.get(key, parsed.document)
+            if verdict is not None:
+                if cache is not None:
+                    cache.set(key, verdict, parsed.document)
+                return verdict
+    errors, usages, cacheable = _validate_limits_cacheable(
+        schema, parsed.document
+    )
+    verdict = Verdict(errors=tuple(errors), usages=usages)
+    if key is not None and cache is not None and cacheable:
+        cache.set(key, verdict, parsed.document)
+    return verdict
 
 
 def _decorate_limits_helper(
     superself, args, kwargs, protector_per_operation_validation
 ):
+    """
+    Returns the validation errors, the usages per operation (None if
+    not validated here) and the parsed document (None if not parsed)
+    """
     check_limits = kwargs.pop("check_limits", True)
-    if kwargs.get("query") or len(args):
-        try:
-            query = kwargs.get("query", args[0])
-        except IndexError:
-            pass
-        if query:
-            try:
-                document_ast = parse(query)
-            except GraphQLError as error:
-                return ExecutionResult(data=None, errors=[error])
-            if hasattr(superself, "graphql_schema"):
-                schema = getattr(superself, "graphql_schema")
-            elif hasattr(superself, "_schema"):
-                schema = getattr(superself, "_schema")
-            else:
-                schema = superself
-            # required for protector_per_operation_validation = False
-            superself.protector_decorate_graphql_schema(schema)
-            if check_limits:
-                if protector_per_operation_validation:
-                    return validate(
-                        schema,
-                        document_ast,
-                        _rules,
-                    )
-            else:
-                schema.protector_on = False
-    return _empty
+    query = _extract_query(args, kwargs)
+    if not query:
+        return _empty, None, None
+    try:
+        parsed = parse_document(query)
+    except GraphQLError as error:
+        return [error], None, None
+    schema = _get_graphql_schema(superself)
+    # required for protector_per_operation_validation = False
+    superself.protector_decorate_graphql_schema(schema)
+    if check_limits:
+        if protector_per_operation_validation:
+            verdict = _check_query(
+                superself, schema, query, parsed, kwargs.get("operation_name")
+            )
+            return list(verdict.errors), verdict.usages, parsed.document
+    else:
+        schema.protector_on = False
+    return _empty, None, parsed.document
+
+
+def _extract_variables(kwargs):
+    # strawberry and graphql-core use variable_values, graphene variables
+    variables = kwargs.get("variable_values")
+    if variables is None:
+        variables = kwargs.get("variables")
+    return variables
+
+
+def _set_limits_profile(superself, context, operation_name):
+    if not superself.protector_limits_profiles:
+        return None
+    return _protector_profile.set(
+        superself.get_protector_limits_profile(context, operation_name)
+    )
+
+
+def _reset_limits_profile(token):
+    if token is not None:
+        _protector_profile.reset(token)
+
+
+def _extract_context(kwargs):
+    # strawberry and graphql-core use context_value, graphene context
+    if "context_value" in kwargs:
+        return kwargs["context_value"]
+    return kwargs.get("context")
+
+
+def _select_usage(usages, operation_name) -> UsagesResult:
+    if operation_name in usages:
+        return usages[operation_name]
+    # the most expensive
+    return max(usages.values(), key=lambda x: x.selections + x.gas_used)
+
+
+def _admission_weight(superself, usages, kwargs) -> int:
+    if not usages:
+        # costs are unknown
+        return 1
+    return superself.get_protector_admission_weight(
+        _select_usage(usages, kwargs.get("operation_name"))
+    )
+
+
+def _admission_rejected(admission, usages, kwargs) -> ExecutionResult:
+    return ExecutionResult(
+        errors=[
+            ConcurrencyLimitReached(
+                "Server is busy",
+                used_resources=(
+                    _select_usage(usages, kwargs.get("operation_name"))
+                    if usages
+                    else UsagesResult()
+                ),
+                retry_after=admission.retry_after(),
+            )
+        ]
+    )
+
+
+def _circuit_fingerprint(breaker, args, kwargs) -> Optional[str]:
+    if breaker is None:
+        return None
+    query = _extract_query(args, kwargs)
+    if not isinstance(query, str):
+        return None
+    try:
+        parsed = parse_document(query)
+    except GraphQLError:
+        return None
+    # per executed operation: variables are parameters of the operation,
+    # except the ones of directives which change the executed selections
+    variables = _extract_variables(kwargs) or {}
+    return fingerprint(
+        (
+            parsed.canonical,
+            kwargs.get("operation_name"),
+            tuple(variables.get(name) for name in parsed.directive_variables),
+        )
+    ).hex()
+
+
+def _circuit_rejected(breaker, fingerprint, usages, kwargs) -> ExecutionResult:
+    return ExecutionResult(
+        errors=[
+            CircuitOpen(
+                "Query is temporarily rejected",
+                used_resources=(
+                    _select_usage(usages, kwargs.get("operation_name"))
+                    if usages
+                    else UsagesResult()
+                ),
+                retry_after=breaker.retry_after(fingerprint),
+            )
+        ]
+    )
+
+
+def _call_guarded(breaker, fingerprint, fn, *args, **kwargs):
+    if fingerprint is None:
+        return fn(*args, **kwargs)
+    start = perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    except Exception as error:
+        # cancellations and interrupts are no failures of the query
+        breaker.record(
+            fingerprint,
+            breaker.is_failure(
+                ExecutionResult(errors=[error]), perf_counter() - start
+            ),
+        )
+        raise
+    breaker.record(
+        fingerprint, breaker.is_failure(result, perf_counter() - start)
+    )
+    return result
+
+
+async def _call_guarded_async(breaker, fingerprint, fn, *args, **kwargs):
+    if fingerprint is None:
+        return await fn(*args, **kwargs)
+    start = perf_counter()
+    try:
+        result = await fn(*args, **kwargs)
+    except Exception as error:
+        # cancellations and interrupts are no failures of the query
+        breaker.record(
+            fingerprint,
+            breaker.is_failure(
+                ExecutionResult(errors=[error]), perf_counter() - start
+            ),
+        )
+        raise
+    breaker.record(
+        fingerprint, breaker.is_failure(result, perf_counter() - start)
+    )
+    return result
 
 
 def decorate_limits(fn, protector_per_operation_validation):
     @wraps(fn)
     def wrapper(superself, *args, **kwargs):
-        validation_errors = _decorate_limits_helper(
-            superself, args, kwargs, protector_per_operation_validation
+        # keep variables also for validations which happen inside of fn
+        token = _protector_variables.set(_extract_variables(kwargs))
+        profile_token = _set_limits_profile(
+            superself, _extract_context(kwargs), kwargs.get("operation_name")
         )
-        if validation_errors:
-            return ExecutionResult(errors=validation_errors)
-        return fn(superself, *args, **kwargs)
+        try:
+            result = _get_cached_introspection(superself, args, kwargs)
+            if result is not None:
+                return result
+            validation_errors, usages, document_ast = _decorate_limits_helper(
+                superself, args, kwargs, protector_per_operation_validation
+            )
+            if validation_errors:
+                return ExecutionResult(errors=validation_errors)
+            breaker = superself.get_protector_circuit_breaker()
+            fingerprint = _circuit_fingerprint(breaker, args, kwargs)
+            if fingerprint is not None and not breaker.allow(fingerprint):
+                return _circuit_rejected(breaker, fingerprint, usages, kwargs)
+            admission = superself.get_protector_admission()
+            if admission is None:
+                result = _call_guarded(
+                    breaker, fingerprint, fn, superself, *args, **kwargs
+                )
+            else:
+                weight = _admission_weight(superself, usages, kwargs)
+                start = admission.acquire(weight)
+                if start is None:
+                    return _admission_rejected(admission, usages, kwargs)
+                try:
+                    result = _call_guarded(
+                        breaker, fingerprint, fn, superself, *args, **kwargs
+                    )
+                finally:
+                    admission.release(weight, start)
+            _cache_introspection(superself, args, kwargs, document_ast, result)
+            return result
+        finally:
+            _reset_limits_profile(profile_token)
+            _protector_variables.reset(token)
 
     return wrapper
 
@@ -595,51 +1937,296 @@ def decorate_limits(fn, protector_per_operation_validation):
 def decorate_limits_async(fn, protector_per_operation_validation):
     @wraps(fn)
     async def wrapper(superself, *args, **kwargs):
-        validation_errors = _decorate_limits_helper(
-            superself, args, kwargs, protector_per_operation_validation
+        token = _protector_variables.set(_extract_variables(kwargs))
+        profile_token = _set_limits_profile(
+            superself, _extract_context(kwargs), kwargs.get("operation_name")
         )
-        if validation_errors:
-            return ExecutionResult(errors=validation_errors)
-        return await fn(superself, *args, **kwargs)
+        batch_token = None
+        try:
+            result = _get_cached_introspection(superself, args, kwargs)
+            if result is not None:
+                return result
+            try:
+                batch = await _prefetch_gas(superself, args, kwargs)
+            except GraphQLError as error:
+                # fail closed, without gas the limits cannot be checked
+                return ExecutionResult(errors=[error])
+            if batch is not None:
+                batch_token = _protector_gas_batch.set(batch)
+            validation_errors, usages, document_ast = _decorate_limits_helper(
+                superself, args, kwargs, protector_per_operation_validation
+            )
+            if validation_errors:
+                return ExecutionResult(errors=validation_errors)
+            breaker = superself.get_protector_circuit_breaker()
+            fingerprint = _circuit_fingerprint(breaker, args, kwargs)
+            if fingerprint is not None and not breaker.allow(fingerprint):
+                return _circuit_rejected(breaker, fingerprint, usages, kwargs)
+            admission = superself.get_protector_admission()
+            if admission is None:
+                result = await _call_guarded_async(
+                    breaker, fingerprint, fn, superself, *args, **kwargs
+                )
+            else:
+                weight = _admission_weight(superself, usages, kwargs)
+                start = await admission.acquire_async(weight)
+                if start is None:
+                    return _admission_rejected(admission, usages, kwargs)
+                try:
+                    result = await _call_guarded_async(
+                        breaker, fingerprint, fn, superself, *args, **kwargs
+                    )
+                finally:
+                    admission.release(weight, start)
+            _cache_introspection(superself, args, kwargs, document_ast, result)
+            return result
+        finally:
+            if batch_token is not None:
+                _protector_gas_batch.reset(batch_token)
+            _reset_limits_profile(profile_token)
+            _protector_variables.reset(token)
 
     return wrapper
 
 
+def decorate_subscribe(fn, protector_per_operation_validation):
+    @wraps(fn)
+    async def wrapper(superself, *args, **kwargs):
+        token = _protector_variables.set(_extract_variables(kwargs))
+        context = _extract_context(kwargs)
+        profile_token = _set_limits_profile(
+            superself, context, kwargs.get("operation_name")
+        )
+        try:
+            limits = superself.get_protector_limits()
+            throttle = bool(
+                limits.subscriptions
+                or limits.subscription_events
+                or limits.subscription_cost
+            )
+            # the usages are required for the costs per event
+            validation_errors, usages, _ = _decorate_limits_helper(
+                superself,
+                args,
+                kwargs,
+                protector_per_operation_validation or throttle,
+            )
+            if validation_errors:
+                return ExecutionResult(errors=validation_errors)
+            if not throttle or not usages:
+                return await fn(superself, *args, **kwargs)
+            key = superself.get_protector_subscription_key(context)
+            # without key there is no connection to share a budget with
+            if key is None:
+                return await fn(superself, *args, **kwargs)
+            usage = _select_usage(usages, kwargs.get("operation_name"))
+            budget = superself.get_protector_subscription_budgets().acquire(
+                key, limits
+            )
+            if budget is None:
+                return ExecutionResult(
+                    errors=[
+                        SubscriptionsLimitReached(
+                            "Too many concurrent subscriptions",
+                            used_resources=usage,
+                        )
+                    ]
+                )
+            try:
+                result = await fn(superself, *args, **kwargs)
+            except BaseException:
+                budget.release()
+                raise
+            if isinstance(result, ExecutionResult):
+                budget.release()
+                return result
+            return ThrottledSubscription(
+                result,
+                budget,
+                superself.get_protector_subscription_event_cost(usage),
+            )
+        finally:
+            _reset_limits_profile(profile_token)
+            _protector_variables.reset(token)
+
+    return wrapper
+
+
+def _is_limited(value) -> bool:
+    return value is not MISSING and bool(value)
+
+
+def _check_batch_budget(total: UsagesResult, limits: Limits):
+    if _is_limited(limits.selections) and total.selections > limits.selections:
+        return SelectionsLimitReached(
+            "Batch selects too much", used_resources=total
+        )
+    if _is_limited(limits.gas) and total.gas_used > limits.gas:
+        return GasLimitReached("Batch uses too much gas", used_resources=total)
+    if (
+        _is_limited(limits.deferred_selections)
+        and total.deferred_selections > limits.deferred_selections
+    ):
+        return SelectionsLimitReached(
+            "Deferred parts of batch select too much", used_resources=total
+        )
+    if (
+        _is_limited(limits.deferred_gas)
+        and total.deferred_gas > limits.deferred_gas
+    ):
+        return GasLimitReached(
+            "Deferred parts of batch use too much gas", used_resources=total
+        )
+    return None
+
+
+def _undecorated(fn):
+    # subclasses of protector schemas must not decorate twice
+    if getattr(fn, "_graphene_protector_decorated", False):
+        return fn.__wrapped__
+    return fn
+
+
+def _validate_batch(
+    superself, operations, limits: Optional[Limits], context
+) -> List[Tuple[List[GraphQLError], Optional[Verdict]]]:
+    # errors and verdict (None if not checked) per operation
+    if limits is None:
+        limits = superself.get_protector_batch_limits()
+    total = UsagesResult()
+    exhausted = None
+    results = []
+    for index, (query, variables, operation_name) in enumerate(operations):
+        if exhausted is None and (
+            _is_limited(limits.definitions) and index >= limits.definitions
+        ):
+            exhausted = DefinitionsLimitReached(
+                "Batch has too many operations", used_resources=total
+            )
+        if exhausted is not None:
+            results.append(([exhausted], None))
+            continue
+        try:
+            verdict = superself.protector_check_query(
+                query,
+                variables,
+                context=context,
+                operation_name=operation_name,
+            )
+        except GraphQLError as error:
+            results.append(([error], None))
+            continue
+        if verdict.errors:
+            results.append((list(verdict.errors), verdict))
+            continue
+        if verdict.usages:
+            usage = _select_usage(verdict.usages, operation_name)
+            if usage.max_level_depth > total.max_level_depth:
+                total.max_level_depth = usage.max_level_depth
+            total.selections += usage.selections
+            total.gas_used += usage.gas_used
+            total.deferred_selections += usage.deferred_selections
+            total.deferred_gas += usage.deferred_gas
+        exhausted = _check_batch_budget(total, limits)
+        if exhausted is not None:
+            results.append(([exhausted], verdict))
+            continue
+        results.append(([], verdict))
+    return results
+
+
+def _mark_decorated(fn):
+    fn._graphene_protector_decorated = True
+    return fn
+
+
 class SchemaMixin:
     # better fail then omitting limits
     protector_default_limits = None
     protector_path_ignore_pattern = default_path_ignore_pattern
+    # cached results of introspection only queries, 0 disables the cache
+    protector_introspection_cache_size = 0
+    # cached verdicts of the limit checks, 0 disables the cache
+    protector_verdict_cache_size = 1024
+    # cache instance replacing the in-process cache, e.g. SharedVerdictCache
+    protector_verdict_cache = None
+    # path of a verdict snapshot, loaded at schema creation or via
+    # protector_load_verdict_snapshot if schema and limits match
+    # (see protector_save_verdict_snapshot)
+    protector_verdict_snapshot = None
+    # scales complexity and gas limits under load (e.g. AdaptiveLimits)
+    protector_adaptive_limits = None
+    # cost-weighted admission of executions (AdmissionController)
+    protector_admission = None
+    # gas per type and field overriding gas_usage, e.g. a calibrated table
+    # {"Query": {"person": 10}}
+    protector_gas_overrides = None
+    # replaces the builtin complexity, e.g. TotalNodesCostModel()
+    protector_cost_model = None
+    # attach the costs per path to the limit errors (extensions.explain),
+    # implies full validation
+    protector_explain = False
+    # named limits, e.g. per client, merged with the default limits
+    # {"anonymous": Limits(gas=100), "internal": Limits(depth=None)}
+    # selected by get_protector_limits_profile
+    protector_limits_profiles = None
+    # aggregated limits for batches (selections, gas, deferred_selections,
+    # deferred_gas and definitions for the amount of operations)
+    protector_batch_limits = MISSING_LIMITS
+    # top-K of the checked queries by costs (HeavyHitters)
+    protector_heavy_hitters = None
+    # rejects queries which failed or were slow repeatedly (CircuitBreaker)
+    protector_circuit_breaker = None
 
     def __init_subclass__(cls, protector_per_operation_validation=True, **kwargs):
         if hasattr(cls, "execute_sync"):
-            cls.execute_sync = decorate_limits(
-                cls.execute_sync, protector_per_operation_validation
+            cls.execute_sync = _mark_decorated(
+                decorate_limits(
+                    _undecorated(cls.execute_sync),
+                    protector_per_operation_validation,
+                )
             )
             if hasattr(cls, "execute"):
-                cls.execute = decorate_limits_async(
-                    cls.execute, protector_per_operation_validation
+                cls.execute = _mark_decorated(
+                    decorate_limits_async(
+                        _undecorated(cls.execute),
+                        protector_per_operation_validation,
+                    )
                 )
         else:
             if hasattr(cls, "execute"):
-                cls.execute = decorate_limits(
-                    cls.execute, protector_per_operation_validation
+                cls.execute = _mark_decorated(
+                    decorate_limits(
+                        _undecorated(cls.execute),
+                        protector_per_operation_validation,
+                    )
                 )
             if hasattr(cls, "execute_async"):
-                cls.execute_async = decorate_limits_async(
-                    cls.execute_async, protector_per_operation_validation
+                cls.execute_async = _mark_decorated(
+                    decorate_limits_async(
+                        _undecorated(cls.execute_async),
+                        protector_per_operation_validation,
+                    )
                 )
         if hasattr(cls, "subscribe"):
-            cls.subscribe = decorate_limits_async(
-                cls.subscribe, protector_per_operation_validation
+            cls.subscribe = _mark_decorated(
+                decorate_subscribe(
+                    _undecorated(cls.subscribe),
+                    protector_per_operation_validation,
+                )
             )
 
     def protector_decorate_graphql_schema(self, schema):
         for funcname in (
             "get_protector_default_limits",
+            "get_protector_limits",
             "get_protector_path_ignore_pattern",
             "get_protector_full_validation",
             "get_protector_auto_snakecase",
             "get_protector_camelcase_path",
+            "get_protector_gas_overrides",
+            "get_protector_explain",
+            "get_protector_cost_model",
         ):
             schema.protector_on = True
             setattr(schema, funcname, getattr(self, funcname))
@@ -650,6 +2237,52 @@ class SchemaMixin:
             self.protector_default_limits,
         )
 
+    def get_protector_limits_profile(
+        self, context, operation_name
+    ) -> Optional[str]:
+        """
+        Name of the profile in protector_limits_profiles for an operation,
+        None for the default limits. Only called if there are profiles
+        """
+        return None
+
+    def get_protector_limits_profiles(self) -> Dict[str, Limits]:
+        """
+        The profiles merged with the default limits. Compiled once per
+        table and default limits
+        """
+        profiles = self.protector_limits_profiles or {}
+        default_limits = self.get_protector_default_limits()
+        cached = getattr(self, "_protector_limits_profiles_cache", None)
+        if (
+            cached is not None
+            and cached[0] is profiles
+            and cached[1] == default_limits
+        ):
+            return cached[2]
+        compiled = {
+            name: merge_limits(default_limits, limits)
+            for name, limits in profiles.items()
+        }
+        self._protector_limits_profiles_cache = (
+            profiles,
+            default_limits,
+            compiled,
+        )
+        return compiled
+
+    def get_protector_limits(self) -> Limits:
+        """
+        Limits of the current operation: the limits of the active profile
+        or the default limits
+        """
+        profile = _protector_profile.get()
+        if profile is not None:
+            limits = self.get_protector_limits_profiles().get(profile)
+            if limits is not None:
+                return limits
+        return self.get_protector_default_limits()
+
     def get_protector_path_ignore_pattern(self):
         return self.protector_path_ignore_pattern
 
@@ -661,3 +2294,208 @@ class SchemaMixin:
 
     def get_protector_camelcase_path(self):
         return self.get_protector_auto_snakecase()
+
+    def get_protector_load_limits(self) -> Optional[Limits]:
+        """
+        Limits under load, None if the default limits apply. Only complexity
+        and gas are compared, the verdicts are cached for the default limits
+        """
+        if self.protector_adaptive_limits is None:
+            return None
+        return self.protector_adaptive_limits.scale(
+            self.get_protector_limits()
+        )
+
+    def get_protector_gas_overrides(
+        self,
+    ) -> Optional[Dict[str, Dict[str, int]]]:
+        return self.protector_gas_overrides
+
+    def get_protector_explain(self) -> bool:
+        return self.protector_explain
+
+    def get_protector_cost_model(self):
+        return self.protector_cost_model
+
+    def get_protector_admission(self):
+        return self.protector_admission
+
+    def get_protector_admission_weight(self, usages: UsagesResult) -> int:
+        return max(usages.gas_used, usages.complexity, 1)
+
+    def get_protector_batch_limits(self) -> Limits:
+        return self.protector_batch_limits
+
+    def get_protector_heavy_hitters(self):
+        return self.protector_heavy_hitters
+
+    def get_protector_circuit_breaker(self):
+        return self.protector_circuit_breaker
+
+    def get_protector_verdict_cache(self) -> Optional[VerdictCache]:
+        if self.protector_verdict_cache is not None:
+            return self.protector_verdict_cache
+        if self.protector_verdict_cache_size <= 0:
+            return None
+        cache = getattr(self, "_protector_verdict_cache", None)
+        if cache is None:
+            cache = VerdictCache(self.protector_verdict_cache_size)
+            self._protector_verdict_cache = cache
+        return cache
+
+    def get_protector_schema_hash(self) -> bytes:
+        # the annotations (gas, limits) are not part of the printed schema
+        schema = _get_graphql_schema(self)
+        return fingerprint((print_schema(schema), _annotations_key(schema)))
+
+    def get_protector_limits_hash(self) -> bytes:
+        return fingerprint(limits_key(self.get_protector_default_limits()))
+
+    def protector_attach_verdict_cache(self):
+        """
+        Version a SharedVerdictCache (protector_verdict_cache) by the schema
+        hash, verdicts of other schemas are removed. Called at schema
+        creation
+        """
+        cache = self.protector_verdict_cache
+        if isinstance(cache, SharedVerdictCache):
+            cache.attach(self.get_protector_schema_hash())
+
+    def get_protector_verdict_snapshot(self) -> Optional[VerdictSnapshot]:
+        # loading hashes the schema, it is not done on the request path
+        cached = getattr(self, "_protector_verdict_snapshot", None)
+        if cached is None or cached[0] != self.protector_verdict_snapshot:
+            return None
+        return cached[1]
+
+    def protector_load_verdict_snapshot(
+        self, path=None
+    ) -> Optional[VerdictSnapshot]:
+        """
+        Load the snapshot from path (default: protector_verdict_snapshot),
+        e.g. at app startup. Returns None if it is missing or outdated
+        """
+        if path is None:
+            path = self.protector_verdict_snapshot
+        assert path, "no path for the snapshot"
+        self.protector_verdict_snapshot = path
+        snapshot = VerdictSnapshot.load(
+            path,
+            schema_hash=self.get_protector_schema_hash(),
+            limits_hash=self.get_protector_limits_hash(),
+        )
+        self._protector_verdict_snapshot = (path, snapshot)
+        return snapshot
+
+    def protector_save_verdict_snapshot(self, path=None):
+        """
+        Write the cached verdicts (including the loaded snapshot) to path
+        (default: protector_verdict_snapshot)
+        """
+        if path is None:
+            path = self.protector_verdict_snapshot
+        assert path, "no path for the snapshot"
+        caches = [
+            cache
+            for cache in (
+                self.get_protector_verdict_cache(),
+                self.get_protector_verdict_snapshot(),
+            )
+            if cache is not None
+        ]
+        VerdictSnapshot.write(
+            path,
+            caches,
+            schema_hash=self.get_protector_schema_hash(),
+            limits_hash=self.get_protector_limits_hash(),
+        )
+
+    def protector_check_query(
+        self, query, variables=None, *, context=None, operation_name=None
+    ) -> Verdict:
+        """
+        Check a query against the limits (of the profile selected by context
+        and operation_name). Parsing and the verdict are cached.
+        Raises GraphQLError on syntax errors
+        """
+        schema = _get_graphql_schema(self)
+        self.protector_decorate_graphql_schema(schema)
+        token = _protector_variables.set(variables)
+        profile_token = _set_limits_profile(self, context, operation_name)
+        try:
+            return _check_query(
+                self, schema, query, parse_document(query), operation_name
+            )
+        finally:
+            _reset_limits_profile(profile_token)
+            _protector_variables.reset(token)
+
+    def protector_explain_query(
+        self, query, variables=None, *, context=None, operation_name=None
+    ) -> Explanation:
+        """
+        Costs per path of a query (e.g. for debugging rejected queries).
+        All limits are checked, the caches are bypassed.
+        Raises GraphQLError on syntax errors
+        """
+        schema = _get_graphql_schema(self)
+        self.protector_decorate_graphql_schema(schema)
+        token = _protector_variables.set(variables)
+        profile_token = _set_limits_profile(self, context, operation_name)
+        try:
+            errors, visitor = _run_limits_rule(
+                schema, parse_document(query).document, _ExplainValidationRule
+            )
+        finally:
+            _reset_limits_profile(profile_token)
+            _protector_variables.reset(token)
+        return Explanation(
+            errors=tuple(errors),
+            usages=visitor.usages,
+            paths=visitor.explanations,
+        )
+
+    def protector_validate_batch(
+        self,
+        operations: Iterable[Tuple[str, Optional[dict], Optional[str]]],
+        limits: Optional[Limits] = None,
+        *,
+        context=None,
+    ) -> List[List[GraphQLError]]:
+        """
+        Validate a batch of (query, variables, operation_name) against the
+        limits of the schema and the aggregated limits of the batch.
+        Operations after the exhaustion of the batch budget are rejected
+        without analysis.
+        Returns the errors per operation
+        """
+        return [
+            errors
+            for errors, _ in _validate_batch(self, operations, limits, context)
+        ]
+
+    def get_protector_introspection_cache(self) -> dict:
+        cache = getattr(self, "_protector_introspection_cache", None)
+        if cache is None:
+            cache = {}
+            self._protector_introspection_cache = cache
+        return cache
+
+    def get_protector_subscription_budgets(self) -> SubscriptionBudgets:
+        budgets = getattr(self, "_protector_subscription_budgets", None)
+        if budgets is None:
+            budgets = SubscriptionBudgets()
+            self._protector_subscription_budgets = budgets
+        return budgets
+
+    def get_protector_subscription_key(self, context) -> Optional[Hashable]:
+        # per connection, override e.g. for per user budgets.
+        # None disables the subscription limits
+        if context is None:
+            return None
+        return id(context)
+
+    def get_protector_subscription_event_cost(
+        self, usages: UsagesResult
+    ) -> int:
+        return max(usages.selections + usages.gas_used, 1)
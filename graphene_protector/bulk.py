@@ -0,0 +1,169 @@
+__all__ = ["check_many"]
+
+import importlib
+from collections import deque
+from concurrent.futures import Executor
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, List, Optional, Tuple, Union
+
+from graphql.error import GraphQLError
+
+from .base import (
+    LimitsValidationRule,
+    _get_graphql_schema,
+    _protector_variables,
+    _validate_limits_cacheable,
+)
+from .cache import (
+    _freeze_verdict,
+    _thaw_verdict,
+    parse_document,
+    verdict_key,
+)
+from .misc import DEFAULT_LIMITS, Limits, ResourceLimitReached, Verdict
+
+Document = Union[str, Tuple[str, Optional[dict]]]
+
+
+@lru_cache(maxsize=None)
+def _import_schema(reference: str):
+    module, attribute = reference.split(":", 1)
+    return getattr(importlib.import_module(module), attribute)
+
+
+def _check_documents(
+    schema, documents: Iterable[Document], limits
+) -> List[Verdict]:
+    if isinstance(schema, str):
+        schema = _import_schema(schema)
+    graphql_schema = _get_graphql_schema(schema)
+    if hasattr(schema, "protector_decorate_graphql_schema"):
+        schema.protector_decorate_graphql_schema(graphql_schema)
+    if limits is None:
+        rule = LimitsValidationRule
+        limits = getattr(
+            schema, "get_protector_limits", lambda: DEFAULT_LIMITS
+        )()
+    else:
+
+        class BulkLimitsValidationRule(LimitsValidationRule):
+            default_limits = limits
+
+        rule = BulkLimitsValidationRule
+
+    # verdicts of repeated documents
+    memo = {}
+    verdicts = []
+    for document in documents:
+        if isinstance(document, str):
+            query, variables = document, None
+        else:
+            query, variables = document
+        try:
+            parsed = parse_document(query)
+        except GraphQLError as error:
+            verdicts.append(Verdict(errors=(error,)))
+            continue
+        key = verdict_key(query, limits, parsed, variables)
+        frozen = memo.get(key) if key is not None else None
+        if frozen is not None:
+            # fresh errors, located in this document
+            verdict = _thaw_verdict(frozen, parsed.document)
+        else:
+            token = _protector_variables.set(variables)
+            try:
+                errors, usages, cacheable = _validate_limits_cacheable(
+                    graphql_schema, parsed.document, rule
+                )
+            finally:
+                _protector_variables.reset(token)
+            verdict = Verdict(errors=tuple(errors), usages=usages)
+            if key is not None and cacheable:
+                memo[key] = _freeze_verdict(verdict, parsed.document)
+        verdicts.append(verdict)
+    return verdicts
+
+
+def _dump_verdict(verdict: Verdict) -> tuple:
+    # errors cannot be pickled (used_resources is keyword only), other errors
+    # (syntax errors) are restored as GraphQLError
+    return (
+        tuple(
+            (
+                (type(error), error.message, error.used_resources)
+                if isinstance(error, ResourceLimitReached)
+                else (GraphQLError, error.message, None)
+            )
+            for error in verdict.errors
+        ),
+        verdict.usages,
+    )
+
+
+def _load_verdict(dumped: tuple) -> Verdict:
+    errors, usages = dumped
+    return Verdict(
+        errors=tuple(
+            (
+                error_class(message)
+                if used_resources is None
+                else error_class(message, used_resources=used_resources)
+            )
+            for error_class, message, used_resources in errors
+        ),
+        usages=usages,
+    )
+
+
+def _check_chunk(reference: str, limits, chunk: List[Document]) -> List[tuple]:
+    return [
+        _dump_verdict(verdict)
+        for verdict in _check_documents(reference, chunk, limits)
+    ]
+
+
+def _chunks(documents: Iterable[Document], chunksize: int):
+    iterator = iter(documents)
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def check_many(
+    schema,
+    documents: Iterable[Document],
+    limits: Optional[Limits] = None,
+    *,
+    executor: Optional[Executor] = None,
+    chunksize: int = 1000,
+    window: Optional[int] = None,
+) -> List[Verdict]:
+    """
+    Check many documents (query strings or (query, variables)) against the
+    limits (default: the limits of the schema). Parsing is cached and
+    repeated documents are checked once. Syntax errors are returned as
+    errors of the verdict.
+    With an executor (e.g. ProcessPoolExecutor) the documents are checked
+    in chunks, schema must be a "module:attribute" reference then. At most
+    window chunks (default: twice the workers) are in flight. The errors
+    of these verdicts have no locations
+    """
+    if executor is None:
+        return _check_documents(schema, documents, limits)
+    if not isinstance(schema, str):
+        raise TypeError('schema must be a "module:attribute" reference')
+    if window is None:
+        window = 2 * (getattr(executor, "_max_workers", None) or 1)
+    # bounded amount of chunks in flight, documents are consumed lazily
+    pending = deque()
+    verdicts = []
+    for chunk in _chunks(documents, chunksize):
+        if len(pending) >= window:
+            verdicts.extend(map(_load_verdict, pending.popleft().result()))
+        pending.append(executor.submit(_check_chunk, schema, limits, chunk))
+    while pending:
+        verdicts.extend(map(_load_verdict, pending.popleft().result()))
+    return verdicts
@@ -0,0 +1,855 @@
+__all__ = [
+    "ParsedDocument",
+    "parse_document",
+    "canonicalize",
+    "query_fingerprint",
+    "limits_key",
+    "verdict_key",
+    "VerdictCache",
+    "fingerprint",
+    "SharedVerdictCache",
+    "VerdictSnapshot",
+]
+
+import hashlib
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from copy import copy, deepcopy
+from dataclasses import fields
+from functools import lru_cache
+from multiprocessing import resource_tracker, shared_memory
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from graphql.error import GraphQLError
+from graphql.language import (
+    BREAK,
+    DocumentNode,
+    ListValueNode,
+    NameNode,
+    Node,
+    ObjectValueNode,
+    ValueNode,
+    VariableNode,
+    Visitor,
+    parse,
+    print_ast,
+    visit,
+)
+
+from .misc import (
+    AliasesLimitReached,
+    ComplexityLimitReached,
+    DefinitionsLimitReached,
+    DepthLimitReached,
+    FragmentDefinitionsLimitReached,
+    FragmentSpreadsLimitReached,
+    GasLimitReached,
+    Limits,
+    ResourceLimitReached,
+    RootFieldsLimitReached,
+    SelectionsLimitReached,
+    SubscriptionsLimitReached,
+    UsagesResult,
+    Verdict,
+)
+
+_limits_fields = tuple(field.name for field in fields(Limits))
+_condition_directives = frozenset({"skip", "include", "defer", "stream"})
+
+
+class ParsedDocument(NamedTuple):
+    document: DocumentNode
+    # variables used in conditions of directives, they are part of the
+    # verdict key. None if the document cannot be cached
+    directive_variables: Optional[Tuple[str, ...]]
+    # document without comments and formatting, part of the verdict key
+    canonical: Optional[str] = None
+
+
+def _collect_directive_variables(document: DocumentNode) -> Tuple[str, ...]:
+    names = set()
+    stack = [
+        definition.selection_set
+        for definition in document.definitions
+        if getattr(definition, "selection_set", None)
+    ]
+    while stack:
+        for selection in stack.pop().selections:
+            for directive in selection.directives or ():
+                if directive.name.value not in _condition_directives:
+                    continue
+                for argument in directive.arguments or ():
+                    if isinstance(argument.value, VariableNode):
+                        names.add(argument.value.name.value)
+            if getattr(selection, "selection_set", None):
+                stack.append(selection.selection_set)
+    return tuple(sorted(names))
+
+
+@lru_cache(maxsize=1024)
+def _parse_document(query: str) -> ParsedDocument:
+    document = parse(query)
+    return ParsedDocument(
+        document, _collect_directive_variables(document), print_ast(document)
+    )
+
+
+def parse_document(query) -> ParsedDocument:
+    """
+    Parse a query. Query strings are cached (raises GraphQLError on syntax
+    errors)
+    """
+    if isinstance(query, str):
+        return _parse_document(query)
+    return ParsedDocument(parse(query), None)
+
+
+_lifted = VariableNode(name=NameNode(value="_"))
+
+
+def _contains_variable(value: ValueNode) -> bool:
+    if isinstance(value, VariableNode):
+        return True
+    if isinstance(value, ListValueNode):
+        return any(map(_contains_variable, value.values))
+    if isinstance(value, ObjectValueNode):
+        return any(_contains_variable(field.value) for field in value.fields)
+    return False
+
+
+def _lift_literals(value: ValueNode) -> ValueNode:
+    if not _contains_variable(value):
+        return _lifted
+    if isinstance(value, ListValueNode):
+        value = copy(value)
+        value.values = tuple(map(_lift_literals, value.values))
+    elif isinstance(value, ObjectValueNode):
+        value = copy(value)
+        value.fields = tuple(
+            _lift_literal_field(field) for field in value.fields
+        )
+    return value
+
+
+def _lift_literal_field(node):
+    # arguments and fields of input objects
+    node = copy(node)
+    node.value = _lift_literals(node.value)
+    return node
+
+
+def _sorted_arguments(node):
+    if not node.arguments:
+        return node
+    node = copy(node)
+    node.arguments = tuple(
+        sorted(node.arguments, key=lambda argument: argument.name.value)
+    )
+    return node
+
+
+class _CanonicalVisitor(Visitor):
+    def __init__(self, lift_literals: bool, sort_selections: bool):
+        super().__init__()
+        self.lift_literals = lift_literals
+        self.sort_selections = sort_selections
+
+    def leave_argument(self, node, *args):
+        if self.lift_literals:
+            return _lift_literal_field(node)
+        return None
+
+    def leave_field(self, node, *args):
+        if self.sort_selections:
+            return _sorted_arguments(node)
+        return None
+
+    def leave_directive(self, node, *args):
+        if self.sort_selections:
+            return _sorted_arguments(node)
+        return None
+
+    def leave_object_value(self, node, *args):
+        if self.sort_selections:
+            node = copy(node)
+            node.fields = tuple(
+                sorted(node.fields, key=lambda field: field.name.value)
+            )
+            return node
+        return None
+
+    def leave_selection_set(self, node, *args):
+        if self.sort_selections:
+            node = copy(node)
+            # children are already sorted
+            node.selections = tuple(sorted(node.selections, key=print_ast))
+            return node
+        return None
+
+
+def canonicalize(
+    query, *, lift_literals: bool = False, sort_selections: bool = False
+) -> str:
+    """
+    Canonical form of a query (string or DocumentNode) without comments
+    and formatting. lift_literals replaces the literals of arguments by
+    the variable $_, sort_selections sorts selections, arguments and
+    fields of input objects.
+    Both change the costs (page sizes, @skip(if: true), first error), so
+    only the plain form is used for the verdict keys
+    """
+    if isinstance(query, str):
+        parsed = parse_document(query)
+        if not lift_literals and not sort_selections:
+            return parsed.canonical
+        document = parsed.document
+    else:
+        document = query
+    if lift_literals or sort_selections:
+        document = visit(
+            document, _CanonicalVisitor(lift_literals, sort_selections)
+        )
+    return print_ast(document)
+
+
+def _canonical_fingerprint(
+    query, lift_literals: bool, sort_selections: bool
+) -> str:
+    return hashlib.blake2b(
+        canonicalize(
+            query, lift_literals=lift_literals, sort_selections=sort_selections
+        ).encode("utf8"),
+        digest_size=16,
+    ).hexdigest()
+
+
+_query_fingerprint = lru_cache(maxsize=1024)(_canonical_fingerprint)
+
+
+def query_fingerprint(
+    query, *, lift_literals: bool = True, sort_selections: bool = True
+) -> str:
+    """
+    Stable fingerprint (hex) of a query (string or DocumentNode), the
+    same for formatting, comments, literals and order of the selections
+    (by default). Usable as key for metrics
+    """
+    if isinstance(query, str):
+        return _query_fingerprint(query, lift_literals, sort_selections)
+    return _canonical_fingerprint(query, lift_literals, sort_selections)
+
+
+def limits_key(limits: Limits) -> tuple:
+    """hashable representation of limits (passthrough can be a set)"""
+    return tuple(
+        frozenset(value) if isinstance(value, set) else value
+        for value in (getattr(limits, name) for name in _limits_fields)
+    )
+
+
+def verdict_key(
+    query: str,
+    limits: Limits,
+    parsed: ParsedDocument,
+    variables: Optional[dict],
+    *extra: Hashable,
+) -> Optional[tuple]:
+    """
+    Key for the verdict cache, formatting and comments of the query are
+    ignored. Returns None if the verdict cannot be cached
+    """
+    if parsed.directive_variables is None:
+        return None
+    key = (
+        query if parsed.canonical is None else parsed.canonical,
+        limits_key(limits),
+        tuple(
+            (variables or {}).get(name) for name in parsed.directive_variables
+        ),
+        *extra,
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class _FrozenError(NamedTuple):
+    error_class: type
+    message: str
+    # paths of the nodes from the document root
+    node_paths: Tuple[Tuple[Union[str, int], ...], ...]
+    path: Optional[Tuple[Union[str, int], ...]]
+    used_resources: Any
+    extensions: Optional[Dict[str, Any]]
+
+
+class _FrozenVerdict(NamedTuple):
+    errors: Tuple[_FrozenError, ...]
+    usages: Tuple[Tuple[Optional[str], UsagesResult], ...]
+
+
+class _NodePathVisitor(Visitor):
+    def __init__(self, nodes: Iterable[Node]):
+        super().__init__()
+        self.paths = {id(node): None for node in nodes}
+        self.missing = len(self.paths)
+
+    def enter(self, node, key, parent, path, ancestors):
+        if self.paths.get(id(node), False) is None:
+            self.paths[id(node)] = tuple(path)
+            self.missing -= 1
+            if not self.missing:
+                return BREAK
+
+
+def _freeze_verdict(
+    verdict: Verdict, document: Optional[DocumentNode]
+) -> _FrozenVerdict:
+    # errors are mutable and located in the document which produced them
+    paths = {}
+    nodes = [node for error in verdict.errors for node in error.nodes or ()]
+    if document is not None and nodes:
+        visitor = _NodePathVisitor(nodes)
+        visit(document, visitor)
+        paths = visitor.paths
+    return _FrozenVerdict(
+        tuple(
+            _FrozenError(
+                (
+                    type(error)
+                    if isinstance(error, ResourceLimitReached)
+                    else GraphQLError
+                ),
+                error.message,
+                tuple(
+                    paths[id(node)]
+                    for node in error.nodes or ()
+                    if paths.get(id(node)) is not None
+                ),
+                tuple(error.path) if error.path else None,
+                copy(getattr(error, "used_resources", None)),
+                deepcopy(error.extensions) or None,
+            )
+            for error in verdict.errors
+        ),
+        tuple((name, copy(usages)) for name, usages in verdict.usages.items()),
+    )
+
+
+def _follow_path(document: DocumentNode, path) -> Node:
+    node = document
+    for key in path:
+        node = node[key] if isinstance(key, int) else getattr(node, key)
+    return node
+
+
+def _thaw_verdict(
+    frozen: _FrozenVerdict, document: Optional[DocumentNode]
+) -> Verdict:
+    errors = []
+    for error in frozen.errors:
+        kwargs = {
+            "path": error.path,
+            "extensions": deepcopy(error.extensions),
+        }
+        if document is not None and error.node_paths:
+            # same canonical form, so the same structure
+            kwargs["nodes"] = [
+                _follow_path(document, node_path)
+                for node_path in error.node_paths
+            ]
+        if issubclass(error.error_class, ResourceLimitReached):
+            kwargs["used_resources"] = copy(error.used_resources)
+        errors.append(error.error_class(error.message, **kwargs))
+    return Verdict(
+        errors=tuple(errors),
+        usages={name: copy(usages) for name, usages in frozen.usages},
+    )
+
+
+class VerdictCache:
+    """
+    Bounded (LRU) in-process cache for verdicts. Every hit returns fresh
+    errors, located in the passed document
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, _FrozenVerdict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self, key: Hashable, document: Optional[DocumentNode] = None
+    ) -> Optional[Verdict]:
+        with self._lock:
+            frozen = self._data.get(key)
+            if frozen is None:
+                return None
+            self._data.move_to_end(key)
+        return _thaw_verdict(frozen, document)
+
+    def set(
+        self,
+        key: Hashable,
+        verdict: Verdict,
+        document: Optional[DocumentNode] = None,
+    ):
+        """document: the document the errors of verdict are located in"""
+        frozen = _freeze_verdict(verdict, document)
+        with self._lock:
+            self._data[key] = frozen
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def items(self) -> List[Tuple[Hashable, Verdict]]:
+        with self._lock:
+            items = list(self._data.items())
+        return [(key, _thaw_verdict(frozen, None)) for key, frozen in items]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _stable_repr(value) -> str:
+    # repr which is stable across processes (no hash ordering)
+    if isinstance(value, (tuple, list)):
+        return "(%s)" % ",".join(map(_stable_repr, value))
+    if isinstance(value, (set, frozenset)):
+        return "{%s}" % ",".join(sorted(map(_stable_repr, value)))
+    if isinstance(value, re.Pattern):
+        return "re(%r,%d)" % (value.pattern, value.flags)
+    if isinstance(value, type):
+        return "%s.%s" % (value.__module__, value.__qualname__)
+    return repr(value)
+
+
+def fingerprint(key: Hashable) -> bytes:
+    """stable 16 bytes fingerprint of a verdict key"""
+    return hashlib.blake2b(
+        _stable_repr(key).encode("utf8"), digest_size=16
+    ).digest()
+
+
+_usages_fields = tuple(field.name for field in fields(UsagesResult))
+_error_classes = (
+    ResourceLimitReached,
+    DepthLimitReached,
+    SelectionsLimitReached,
+    ComplexityLimitReached,
+    GasLimitReached,
+    AliasesLimitReached,
+    RootFieldsLimitReached,
+    FragmentDefinitionsLimitReached,
+    FragmentSpreadsLimitReached,
+    DefinitionsLimitReached,
+    SubscriptionsLimitReached,
+)
+_error_codes = {
+    error_class: code for code, error_class in enumerate(_error_classes, 1)
+}
+_max_message = 96
+_max_int = 2**63 - 1
+
+
+def _open_shared_memory(name: str, size: int):
+    # lifetime is managed explicitly (unlink), the resource tracker would
+    # remove the segment on exit of the first process
+    if sys.version_info >= (3, 13):
+        try:
+            return (
+                shared_memory.SharedMemory(
+                    name, create=True, size=size, track=False
+                ),
+                True,
+            )
+        except FileExistsError:
+            return shared_memory.SharedMemory(name, track=False), False
+    try:
+        shm = shared_memory.SharedMemory(name, create=True, size=size)
+        created = True
+    except FileExistsError:
+        shm = shared_memory.SharedMemory(name)
+        created = False
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm, created
+
+
+class SharedVerdictCache:
+    """
+    Verdict cache shared between processes (e.g. prefork workers).
+    Fixed-size open-addressing table in shared memory (name) or in a
+    memory-mapped file (path).
+
+    Lookups take no locks: every entry carries a checksum, torn entries
+    of concurrent writes are detected and treated as miss.
+
+    Only verdicts with at most one resource limit error are stored, the
+    usages are reduced to the most expensive operation.
+
+    Create it in the master process before forking (e.g. preload_app) or
+    attach in every worker via the same name/path. The shared memory
+    segment is not removed on exit, call unlink() for this.
+
+    The table is versioned by schema_hash (set by the schema via attach):
+    entries of another schema hash are removed, processes with another
+    schema hash miss.
+    """
+
+    magic = b"GPVC0002"
+    _header = struct.Struct("<8sII16s")
+    # offset of the schema hash in the header
+    _hash_offset = 16
+    _entry = struct.Struct(
+        "<I16sB%ds%dq" % (_max_message, len(_usages_fields))
+    )
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        *,
+        path: Optional[str] = None,
+        slots: int = 16384,
+        probes: int = 8,
+        schema_hash: bytes = bytes(16),
+    ):
+        assert (name is None) != (path is None), "either name or path"
+        self.schema_hash = schema_hash
+        self.slots = slots
+        self.probes = min(probes, slots)
+        self.entry_size = self._entry.size
+        size = self._header.size + slots * self.entry_size
+        self.path = path
+        self._shm = None
+        self._mmap = None
+        created = False
+        if name is not None:
+            self._shm, created = _open_shared_memory(name, size)
+            self.buf = self._shm.buf
+        else:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if os.fstat(fd).st_size == 0:
+                    os.ftruncate(fd, size)
+                    created = True
+                self._mmap = mmap.mmap(fd, 0)
+            finally:
+                os.close(fd)
+            self.buf = memoryview(self._mmap)
+        if created:
+            self._write_header()
+        self._check_header(size)
+        self.attach(schema_hash)
+
+    def _write_header(self):
+        self.buf[: self._header.size] = self._header.pack(
+            self.magic, self.slots, self.entry_size, self.schema_hash
+        )
+
+    def _check_header(self, size):
+        # wait for the creator
+        for _ in range(100):
+            magic, slots, entry_size, _ = self._header.unpack_from(self.buf, 0)
+            if magic != b"\0" * len(self.magic):
+                break
+            time.sleep(0.01)
+        if (
+            magic != self.magic
+            or slots != self.slots
+            or entry_size != self.entry_size
+            or len(self.buf) < size
+        ):
+            raise ValueError("incompatible shared verdict cache")
+
+    def _is_current(self) -> bool:
+        # False if another schema attached the table
+        return (
+            self.buf[self._hash_offset : self._hash_offset + 16]
+            == self.schema_hash
+        )
+
+    def attach(self, schema_hash: bytes):
+        """
+        Use the table for schema_hash, e.g. get_protector_schema_hash of
+        the schema. The entries of another schema hash are removed
+        """
+        assert len(schema_hash) == 16, "16 bytes schema hash"
+        self.schema_hash = schema_hash
+        if not self._is_current():
+            # processes with the old schema hash stop writing first
+            self.buf[self._hash_offset : self._hash_offset + 16] = schema_hash
+            self.clear()
+
+    def _offsets(self, key_fingerprint: bytes):
+        start = int.from_bytes(key_fingerprint[:8], "little") % self.slots
+        for probe in range(self.probes):
+            yield self._header.size + (
+                (start + probe) % self.slots
+            ) * self.entry_size
+
+    def _read(self, offset):
+        entry = bytes(self.buf[offset : offset + self.entry_size])
+        if zlib.crc32(entry[4:]) != int.from_bytes(entry[:4], "little"):
+            # empty or torn
+            return None
+        return self._entry.unpack(entry)
+
+    def get(
+        self, key: Hashable, document: Optional[DocumentNode] = None
+    ) -> Optional[Verdict]:
+        # errors are restored without locations
+        if not self._is_current():
+            return None
+        key_fingerprint = fingerprint(key)
+        for offset in self._offsets(key_fingerprint):
+            entry = self._read(offset)
+            if entry is None:
+                return None
+            if entry[1] == key_fingerprint:
+                return self._decode(entry)
+        return None
+
+    def set(
+        self,
+        key: Hashable,
+        verdict: Verdict,
+        document: Optional[DocumentNode] = None,
+    ):
+        if not self._is_current():
+            return
+        data = self._encode(verdict)
+        if data is None:
+            return
+        key_fingerprint = fingerprint(key)
+        data = key_fingerprint + data
+        data = zlib.crc32(data).to_bytes(4, "little") + data
+        target = None
+        for offset in self._offsets(key_fingerprint):
+            entry = self._read(offset)
+            if entry is None or entry[1] == key_fingerprint:
+                target = offset
+                break
+        if target is None:
+            # evict the entry in the home slot
+            target = next(self._offsets(key_fingerprint))
+        self.buf[target : target + self.entry_size] = data
+
+    @staticmethod
+    def _encode(verdict: Verdict) -> Optional[bytes]:
+        if len(verdict.errors) > 1:
+            return None
+        usages = None
+        code = 0
+        message = b""
+        if verdict.errors:
+            error = verdict.errors[0]
+            code = _error_codes.get(type(error))
+            message = error.message.encode("utf8")
+            if code is None or len(message) > _max_message:
+                return None
+            if isinstance(error.used_resources, UsagesResult):
+                usages = error.used_resources
+        if usages is None and verdict.usages:
+            usages = max(
+                verdict.usages.values(),
+                key=lambda x: x.selections + x.gas_used,
+            )
+        if usages is None:
+            usages = UsagesResult()
+        return struct.pack(
+            "<B%ds%dq" % (_max_message, len(_usages_fields)),
+            code,
+            message,
+            *(min(getattr(usages, name), _max_int) for name in _usages_fields),
+        )
+
+    @staticmethod
+    def _decode(entry) -> Verdict:
+        code = entry[2]
+        usages = UsagesResult(**dict(zip(_usages_fields, entry[4:])))
+        if not code:
+            return Verdict(usages={None: usages})
+        error_class = _error_classes[code - 1]
+        message = entry[3].rstrip(b"\0").decode("utf8")
+        return Verdict(errors=(error_class(message, used_resources=usages),))
+
+    def _entries(self) -> Iterator[Tuple[bytes, bytes]]:
+        # valid entries as (key fingerprint, payload)
+        if not self._is_current():
+            return
+        for slot in range(self.slots):
+            offset = self._header.size + slot * self.entry_size
+            entry = bytes(self.buf[offset : offset + self.entry_size])
+            if zlib.crc32(entry[4:]) == int.from_bytes(entry[:4], "little"):
+                yield entry[4:20], entry[20:]
+
+    def __len__(self):
+        return sum(1 for _ in self._entries())
+
+    def clear(self):
+        start = self._header.size
+        self.buf[start : start + self.slots * self.entry_size] = bytes(
+            self.slots * self.entry_size
+        )
+
+    def close(self):
+        self.buf.release()
+        if self._shm is not None:
+            self._shm.close()
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def unlink(self):
+        """remove the shared memory segment/file"""
+        if self._shm is not None:
+            if sys.version_info < (3, 13):
+                # unlink unregisters
+                resource_tracker.register(self._shm._name, "shared_memory")
+            self._shm.unlink()
+        elif os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class VerdictSnapshot(SharedVerdictCache):
+    """
+    Read-only on-disk snapshot of verdicts for warm restarts.
+    The file is memory-mapped, lookups read the entries in place.
+    It is versioned by a schema hash and a limits hash and rejected
+    (ValueError) if one of them differs.
+    """
+
+    magic = b"GPVS0001"
+    _header = struct.Struct("<8sII16s16s")
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        schema_hash: bytes,
+        limits_hash: bytes,
+        probes: int = 8,
+    ):
+        self.path = path
+        self.schema_hash = schema_hash
+        self._shm = None
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buf = memoryview(self._mmap)
+        self.entry_size = self._entry.size
+        try:
+            if len(self.buf) < self._header.size:
+                raise ValueError("invalid verdict snapshot")
+            magic, slots, entry_size, _schema_hash, _limits_hash = (
+                self._header.unpack_from(self.buf, 0)
+            )
+            if (
+                magic != self.magic
+                or entry_size != self.entry_size
+                or len(self.buf) < self._header.size + slots * entry_size
+            ):
+                raise ValueError("invalid verdict snapshot")
+            if _schema_hash != schema_hash or _limits_hash != limits_hash:
+                raise ValueError("outdated verdict snapshot")
+        except ValueError:
+            self.close()
+            raise
+        self.slots = slots
+        self.probes = min(probes, slots)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> Optional["VerdictSnapshot"]:
+        """returns None if the snapshot is missing, invalid or outdated"""
+        try:
+            return cls(path, **kwargs)
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def write(
+        cls,
+        path: str,
+        caches: Iterable,
+        *,
+        schema_hash: bytes,
+        limits_hash: bytes,
+        probes: int = 8,
+    ):
+        """
+        Write the verdicts of caches (VerdictCache, SharedVerdictCache,
+        VerdictSnapshot) atomically to path. Earlier caches take precedence
+        """
+        entries = {}
+        for cache in caches:
+            if isinstance(cache, SharedVerdictCache):
+                items = cache._entries()
+            else:
+                items = (
+                    (fingerprint(key), cls._encode(verdict))
+                    for key, verdict in cache.items()
+                )
+            for key_fingerprint, payload in items:
+                if payload is not None:
+                    entries.setdefault(key_fingerprint, payload)
+        # load factor of 0.5
+        slots = max(16, 2 * len(entries))
+        entry_size = cls._entry.size
+        table = bytearray(cls._header.size + slots * entry_size)
+        cls._header.pack_into(
+            table, 0, cls.magic, slots, entry_size, schema_hash, limits_hash
+        )
+        used = set()
+        for key_fingerprint, payload in entries.items():
+            start = int.from_bytes(key_fingerprint[:8], "little") % slots
+            data = key_fingerprint + payload
+            data = zlib.crc32(data).to_bytes(4, "little") + data
+            for probe in range(min(probes, slots)):
+                offset = (
+                    cls._header.size + ((start + probe) % slots) * entry_size
+                )
+                if offset not in used:
+                    used.add(offset)
+                    table[offset : offset + entry_size] = data
+                    break
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            f.write(table)
+        os.replace(tmp_path, path)
+
+    def set(
+        self,
+        key: Hashable,
+        verdict: Verdict,
+        document: Optional[DocumentNode] = None,
+    ):
+        # read-only
+        pass
+
+    def attach(self, schema_hash: bytes):
+        pass
+
+    def clear(self):
+        pass
@@ -0,0 +1,167 @@
+__all__ = [
+    "GasCalibrator",
+    "CalibrationMiddleware",
+    "static_gas_table",
+    "load_gas_table",
+]
+
+import json
+import threading
+from inspect import isawaitable
+from time import perf_counter
+from typing import IO, Dict, Optional, Tuple, Union
+
+from graphql.type import GraphQLObjectType
+
+from .base import _annotated_field, _get_graphql_schema, gas_for_field
+
+GasTable = Dict[str, Dict[str, int]]
+
+
+def static_gas_table(schema) -> GasTable:
+    """
+    The gas of the fields of all object types as annotated via gas_usage.
+    Callables are called with the parent type and fieldname, failing
+    callables are ignored
+    """
+    graphql_schema = _get_graphql_schema(schema)
+    table: GasTable = {}
+    for type_name, graphql_type in graphql_schema.type_map.items():
+        if type_name.startswith("__") or not isinstance(
+            graphql_type, GraphQLObjectType
+        ):
+            continue
+        for field_name in graphql_type.fields:
+            try:
+                field = _annotated_field(
+                    graphql_schema, graphql_type, field_name
+                )
+                if field is None:
+                    continue
+                gas = gas_for_field(
+                    field,
+                    parent=graphql_type,
+                    fieldname=field_name,
+                    graphql_path="",
+                )
+            except Exception:
+                continue
+            if gas:
+                table.setdefault(type_name, {})[field_name] = gas
+    return table
+
+
+def load_gas_table(source: Union[str, IO]) -> GasTable:
+    """load a gas table (JSON) from a path or file object"""
+    if isinstance(source, str):
+        with open(source) as f:
+            return json.load(f)
+    return json.load(source)
+
+
+class GasCalibrator:
+    """
+    Records the execution time per (type, field) and suggests gas values
+    by regressing the timings against the static gas of the fields
+    """
+
+    def __init__(self):
+        # (type, field): (count, total time)
+        self.timings: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, type_name: str, field_name: str, seconds: float):
+        key = (type_name, field_name)
+        with self._lock:
+            count, total = self.timings.get(key, (0, 0.0))
+            self.timings[key] = (count + 1, total + seconds)
+
+    def mean_timings(self) -> Dict[Tuple[str, str], float]:
+        with self._lock:
+            return {
+                key: total / count
+                for key, (count, total) in self.timings.items()
+            }
+
+    def gas_per_second(
+        self, static_gas: GasTable, default: float = 1000.0
+    ) -> float:
+        """
+        Least squares fit (through the origin) of the static gas on the
+        mean timings. default (1 gas per ms) if there are no annotated
+        fields with timings
+        """
+        numerator = 0.0
+        denominator = 0.0
+        for (type_name, field_name), seconds in self.mean_timings().items():
+            gas = static_gas.get(type_name, {}).get(field_name)
+            if gas:
+                numerator += gas * seconds
+                denominator += seconds * seconds
+        if not denominator:
+            return default
+        return numerator / denominator
+
+    def suggest(
+        self,
+        schema=None,
+        static_gas: Optional[GasTable] = None,
+        *,
+        gas_per_second: Optional[float] = None,
+    ) -> GasTable:
+        """
+        Suggested gas table for all recorded fields. The static gas is taken
+        from schema if not provided
+        """
+        if static_gas is None:
+            static_gas = static_gas_table(schema) if schema is not None else {}
+        if gas_per_second is None:
+            gas_per_second = self.gas_per_second(static_gas)
+        table: GasTable = {}
+        for (type_name, field_name), seconds in sorted(
+            self.mean_timings().items()
+        ):
+            table.setdefault(type_name, {})[field_name] = round(
+                gas_per_second * seconds
+            )
+        return table
+
+    def dump(self, fp: IO, schema=None, **kwargs):
+        """write the suggested gas table as JSON"""
+        json.dump(self.suggest(schema, **kwargs), fp, indent=2, sort_keys=True)
+
+    def clear(self):
+        with self._lock:
+            self.timings.clear()
+
+    def measure(self, next_, root, info, **kwargs):
+        if info.field_name.startswith("__"):
+            return next_(root, info, **kwargs)
+        start = perf_counter()
+        result = next_(root, info, **kwargs)
+        if isawaitable(result):
+            return self._measure_async(result, info, start)
+        self.record(
+            info.parent_type.name, info.field_name, perf_counter() - start
+        )
+        return result
+
+    async def _measure_async(self, result, info, start):
+        try:
+            return await result
+        finally:
+            self.record(
+                info.parent_type.name, info.field_name, perf_counter() - start
+            )
+
+
+class CalibrationMiddleware:
+    """
+    graphene/graphql-core middleware recording the resolver timings
+    """
+
+    def __init__(self, calibrator: GasCalibrator):
+        self.calibrator = calibrator
+
+    def resolve(self, next_, root, info, **kwargs):
+        return self.calibrator.measure(next_, root, info, **kwargs)
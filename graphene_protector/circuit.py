@@ -0,0 +1,141 @@
+__all__ = ["CircuitBreaker"]
+
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Callable, Optional, Tuple, Type
+
+from graphql.error import GraphQLError
+
+try:
+    from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
+except ImportError:
+    DEFAULT_EXPECTED_ERRORS: Tuple[Type[BaseException], ...] = ()
+else:
+    DEFAULT_EXPECTED_ERRORS = (ObjectDoesNotExist, PermissionDenied)
+
+
+class _Circuit:
+    __slots__ = ("failures", "opened_at")
+
+    def __init__(self):
+        # consecutive failures
+        self.failures = 0
+        # None: closed
+        self.opened_at: Optional[float] = None
+
+
+class CircuitBreaker:
+    """
+    Opens the circuit of a query fingerprint after failure_threshold
+    consecutive failed (unexpected exceptions, also of resolvers) or slow
+    (more than slow_threshold seconds) executions. Exceptions of
+    expected_errors (by default DoesNotExist and PermissionDenied of
+    django) are no failures, failure_predicate(result, duration) replaces
+    the check. Queries with an open circuit are
+    rejected for cooldown seconds, then one execution is let through per
+    cooldown (half-open): a success closes the circuit, a failure opens it
+    again.
+    Only failing fingerprints are stored, at most max_entries (the oldest
+    are dropped)
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        *,
+        slow_threshold: Optional[float] = None,
+        cooldown: float = 30.0,
+        max_entries: int = 4096,
+        expected_errors: Tuple[
+            Type[BaseException], ...
+        ] = DEFAULT_EXPECTED_ERRORS,
+        failure_predicate: Optional[Callable[[Any, float], bool]] = None,
+    ):
+        self.failure_threshold = failure_threshold
+        self.slow_threshold = slow_threshold
+        self.expected_errors = expected_errors
+        self.failure_predicate = failure_predicate
+        self.cooldown = cooldown
+        self.max_entries = max_entries
+        self.circuits: "OrderedDict[str, _Circuit]" = OrderedDict()
+        self._lock = threading.Lock()
+        # counters
+        self.opened = 0
+        self.rejected = 0
+
+    def is_failure(self, result, duration: float) -> bool:
+        """
+        result is the ExecutionResult, exceptions raised by the execution
+        are passed as its errors
+        """
+        if self.failure_predicate is not None:
+            return self.failure_predicate(result, duration)
+        if self.slow_threshold is not None and duration > self.slow_threshold:
+            return True
+        return any(
+            map(self.is_unexpected, getattr(result, "errors", None) or ())
+        )
+
+    def is_unexpected(self, error: BaseException) -> bool:
+        if isinstance(error, GraphQLError):
+            # GraphQLErrors raised on purpose have no original_error
+            error = error.original_error
+            if error is None:
+                return False
+        return not isinstance(error, self.expected_errors)
+
+    def allow(self, fingerprint: str) -> bool:
+        with self._lock:
+            circuit = self.circuits.get(fingerprint)
+            if circuit is None or circuit.opened_at is None:
+                return True
+            now = monotonic()
+            if now - circuit.opened_at < self.cooldown:
+                self.rejected += 1
+                return False
+            # half-open: the next probe after another cooldown
+            circuit.opened_at = now
+            return True
+
+    def record(self, fingerprint: str, failed: bool):
+        with self._lock:
+            if not failed:
+                self.circuits.pop(fingerprint, None)
+                return
+            circuit = self.circuits.get(fingerprint)
+            if circuit is None:
+                while len(self.circuits) >= self.max_entries:
+                    self.circuits.popitem(last=False)
+                circuit = _Circuit()
+                self.circuits[fingerprint] = circuit
+            else:
+                self.circuits.move_to_end(fingerprint)
+            circuit.failures += 1
+            if circuit.failures >= self.failure_threshold:
+                if circuit.opened_at is None:
+                    self.opened += 1
+                circuit.opened_at = monotonic()
+
+    def retry_after(self, fingerprint: str) -> float:
+        with self._lock:
+            circuit = self.circuits.get(fingerprint)
+            if circuit is None or circuit.opened_at is None:
+                return 0.0
+            return max(self.cooldown - (monotonic() - circuit.opened_at), 0.0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "open": sum(
+                    1
+                    for circuit in self.circuits.values()
+                    if circuit.opened_at is not None
+                ),
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+    def clear(self):
+        with self._lock:
+            self.circuits.clear()
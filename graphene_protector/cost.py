@@ -0,0 +1,160 @@
+__all__ = ["CostModel", "DepthSelectionsCostModel", "TotalNodesCostModel"]
+
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import FrozenSet, Hashable, Optional, Tuple
+
+from graphql.language import (
+    ArgumentNode,
+    DocumentNode,
+    FieldNode,
+    IntValueNode,
+    Node,
+    VariableNode,
+    Visitor,
+    visit,
+)
+
+from .misc import UsagesResult
+
+
+class CostModel(ABC):
+    """
+    Strategy for the complexity of a query. For every field with selections
+    complexity is called with the usages of the selections, the result is
+    checked against the complexity limit and combined into the complexity
+    of the parent selection (UsagesResult.complexity)
+    """
+
+    # check the complexity of the whole operation, for totals
+    check_operation = False
+
+    @abstractmethod
+    def complexity(
+        self,
+        field: Node,
+        local_result: UsagesResult,
+        level_depth: int,
+        variables: Optional[dict],
+    ) -> int:
+        pass
+
+    def combine(self, complexity: int, field_complexity: int) -> int:
+        return max(complexity, field_complexity)
+
+    def key(
+        self, variables: Optional[dict], document: Optional[DocumentNode]
+    ) -> Hashable:
+        """
+        Part of the verdict key, must contain everything (besides the
+        document and the limits) the complexity depends on
+        """
+        return (type(self).__name__,)
+
+
+class DepthSelectionsCostModel(CostModel):
+    """
+    The builtin model: depth times selections of a field, the max is
+    checked
+    """
+
+    def complexity(self, field, local_result, level_depth, variables):
+        return (
+            local_result.max_level_depth - level_depth
+        ) * local_result.selections
+
+
+class _PageVariablesVisitor(Visitor):
+    def __init__(self, page_arguments: Tuple[str, ...]):
+        super().__init__()
+        self.page_arguments = page_arguments
+        self.names = set()
+
+    def enter_argument(self, node: ArgumentNode, *args):
+        if node.name.value in self.page_arguments and isinstance(
+            node.value, VariableNode
+        ):
+            self.names.add(node.value.name.value)
+
+
+class TotalNodesCostModel(CostModel):
+    """
+    Total nodes (like the node limit of GitHub): every object counts,
+    multiplied with the page sizes (first/last arguments) of the parents.
+    E.g. `users(first: 50) { issues(first: 10) { id } }` costs 50 + 50 * 10
+    """
+
+    check_operation = True
+
+    def __init__(
+        self,
+        page_arguments: Tuple[str, ...] = ("first", "last"),
+        default_page_size: int = 1,
+    ):
+        self.page_arguments = page_arguments
+        self.default_page_size = default_page_size
+        # id of document: (document, page size variables), parsed documents
+        # are cached so the same query string hits
+        self._page_variables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def page_variables(self, document: DocumentNode) -> FrozenSet[str]:
+        """names of the variables used as page arguments"""
+        with self._lock:
+            entry = self._page_variables.get(id(document))
+            # the document is kept, so the id is not reused
+            if entry is not None and entry[0] is document:
+                self._page_variables.move_to_end(id(document))
+                return entry[1]
+        visitor = _PageVariablesVisitor(self.page_arguments)
+        visit(document, visitor)
+        names = frozenset(visitor.names)
+        with self._lock:
+            self._page_variables[id(document)] = (document, names)
+            while len(self._page_variables) > 1024:
+                self._page_variables.popitem(last=False)
+        return names
+
+    def page_size(self, field: Node, variables: Optional[dict]) -> int:
+        size = None
+        for argument in getattr(field, "arguments", None) or ():
+            if argument.name.value not in self.page_arguments:
+                continue
+            value = argument.value
+            if isinstance(value, VariableNode):
+                value = (variables or {}).get(value.name.value)
+            elif isinstance(value, IntValueNode):
+                value = int(value.value)
+            if isinstance(value, int) and (size is None or value > size):
+                size = value
+        if size is None:
+            return self.default_page_size
+        return size
+
+    def complexity(self, field, local_result, level_depth, variables):
+        # local_result.complexity: total nodes of the selections
+        if not isinstance(field, FieldNode):
+            # fragments are no nodes, their selections belong to the parent
+            return local_result.complexity
+        return self.page_size(field, variables) * (1 + local_result.complexity)
+
+    def combine(self, complexity, field_complexity):
+        return complexity + field_complexity
+
+    def key(self, variables, document):
+        # page sizes can be variables, other variables do not matter
+        names = None if document is None else self.page_variables(document)
+        return (
+            type(self).__name__,
+            self.page_arguments,
+            self.default_page_size,
+            tuple(
+                sorted(
+                    (name, value)
+                    for name, value in (variables or {}).items()
+                    if isinstance(value, int)
+                    and (names is None or name in names)
+                )
+            ),
+        )
@@ -1,4 +1,10 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 
 from .. import base
 
@@ -9,35 +15,85 @@ def _get_default_limit_from_settings(name):
     return base.MISSING
 
 
-class GetDefaultsMixin:
-    def get_protector_default_limits(self):
-        return base.merge_limits(
-            base.merge_limits(
-                base.DEFAULT_LIMITS,
-                base.Limits(
-                    depth=_get_default_limit_from_settings(
-                        "GRAPHENE_PROTECTOR_DEPTH_LIMIT"
-                    ),
-                    selections=_get_default_limit_from_settings(
-                        "GRAPHENE_PROTECTOR_SELECTIONS_LIMIT"
-                    ),
-                    complexity=_get_default_limit_from_settings(
-                        "GRAPHENE_PROTECTOR_COMPLEXITY_LIMIT"
-                    ),
-                    gas=_get_default_limit_from_settings(
-                        "GRAPHENE_PROTECTOR_GAS_LIMIT"
-                    ),
+class _ProtectorSettings(NamedTuple):
+    limits: base.Limits
+    path_ignore_pattern: Optional[str]
+
+
+@lru_cache(maxsize=None)
+def _get_protector_settings() -> _ProtectorSettings:
+    return _ProtectorSettings(
+        limits=base.merge_limits(
+            base.DEFAULT_LIMITS,
+            base.Limits(
+                depth=_get_default_limit_from_settings(
+                    "GRAPHENE_PROTECTOR_DEPTH_LIMIT"
+                ),
+                selections=_get_default_limit_from_settings(
+                    "GRAPHENE_PROTECTOR_SELECTIONS_LIMIT"
+                ),
+                complexity=_get_default_limit_from_settings(
+                    "GRAPHENE_PROTECTOR_COMPLEXITY_LIMIT"
+                ),
+                gas=_get_default_limit_from_settings(
+                    "GRAPHENE_PROTECTOR_GAS_LIMIT"
                 ),
             ),
+        ),
+        path_ignore_pattern=getattr(
+            settings, "GRAPHENE_PROTECTOR_PATH_INGORE_PATTERN", None
+        ),
+    )
+
+
+@receiver(setting_changed)
+def _reset_protector_settings(*, setting, **kwargs):
+    if setting.startswith("GRAPHENE_PROTECTOR_"):
+        _get_protector_settings.cache_clear()
+
+
+class GetDefaultsMixin:
+    def get_protector_default_limits(self):
+        protector_settings = _get_protector_settings()
+        # cached per schema, invalidated by changed settings or limits
+        cached = getattr(self, "_protector_default_limits_cache", None)
+        if (
+            cached is not None
+            and cached[0] is protector_settings
+            and cached[1] is self.protector_default_limits
+        ):
+            return cached[2]
+        limits = base.merge_limits(
+            protector_settings.limits,
+            self.protector_default_limits,
+        )
+        self._protector_default_limits_cache = (
+            protector_settings,
             self.protector_default_limits,
+            limits,
         )
+        return limits
 
     def get_protector_path_ignore_pattern(self):
-        return getattr(
-            settings,
-            "GRAPHENE_PROTECTOR_PATH_INGORE_PATTERN",
+        protector_settings = _get_protector_settings()
+        cached = getattr(self, "_protector_path_ignore_pattern_cache", None)
+        if (
+            cached is not None
+            and cached[0] is protector_settings
+            and cached[1] is self.protector_path_ignore_pattern
+        ):
+            return cached[2]
+        pattern = protector_settings.path_ignore_pattern
+        if pattern is None:
+            pattern = self.protector_path_ignore_pattern
+        if not isinstance(pattern, re.Pattern):
+            pattern = re.compile(pattern)
+        self._protector_path_ignore_pattern_cache = (
+            protector_settings,
             self.protector_path_ignore_pattern,
+            pattern,
         )
+        return pattern
 
     def get_protector_full_validation(self):
         return settings.DEBUG
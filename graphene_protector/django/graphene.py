@@ -1,6 +1,267 @@
+import math
+from time import perf_counter
+
+from django.db import connection, transaction
+from django.http import HttpResponseNotAllowed
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView as BaseGraphQLView
+from graphene_django.views import HttpError
+from graphql import (
+    ExecutionResult,
+    OperationType,
+    execute,
+    get_operation_ast,
+    validate_schema,
+)
+from graphql.validation import validate
+
 from .. import graphene
+from ..base import (
+    SchemaMixin,
+    _admission_rejected,
+    _admission_weight,
+    _circuit_fingerprint,
+    _circuit_rejected,
+    _validate_batch,
+)
+from ..cache import parse_document
+from ..misc import Verdict
 from . import base
 
 
 class Schema(base.GetDefaultsMixin, graphene.Schema):
     pass
+
+
+class GraphQLView(BaseGraphQLView):
+    """
+    GraphQLView which checks the limits before the graphql validation.
+    The parsed document and the verdicts are cached and shared between
+    limit checks, validation and execution.
+    Rejected operations are not executed and answered with
+    `protector_limit_status_code`, operations rejected by the admission
+    control or the circuit breaker with `protector_busy_status_code` and a
+    Retry-After header
+    """
+
+    protector_limit_status_code = 400
+    protector_busy_status_code = 503
+    # cache the graphql validation results (the validation rules must not
+    # depend on the request)
+    protector_cache_validation = True
+
+    def parse_body(self, request):
+        data = super().parse_body(request)
+        # errors and verdict of the batch validation by id of the entry
+        self._protector_batch_verdicts = {}
+        if (
+            self.batch
+            and isinstance(data, list)
+            and isinstance(self.schema, SchemaMixin)
+        ):
+            entries = []
+            operations = []
+            for entry in data:
+                query, variables, operation_name, _ = self.get_graphql_params(
+                    request, entry
+                )
+                if query:
+                    entries.append(entry)
+                    operations.append((query, variables, operation_name))
+            for entry, result in zip(
+                entries,
+                _validate_batch(
+                    self.schema,
+                    operations,
+                    None,
+                    self.get_context(request),
+                ),
+            ):
+                self._protector_batch_verdicts[id(entry)] = result
+        return data
+
+    def dispatch(self, request, *args, **kwargs):
+        self._protector_retry_after = None
+        response = super().dispatch(request, *args, **kwargs)
+        if self._protector_retry_after is not None:
+            response["Retry-After"] = str(
+                math.ceil(self._protector_retry_after)
+            )
+        return response
+
+    def get_response(self, request, data, show_graphiql=False):
+        self._protector_status_code = None
+        result, status_code = super().get_response(
+            request, data, show_graphiql
+        )
+        if self._protector_status_code is not None:
+            status_code = self._protector_status_code
+        return result, status_code
+
+    def protector_validate(self, schema, query, document):
+        cache = (
+            self.schema.get_protector_verdict_cache()
+            if self.protector_cache_validation
+            else None
+        )
+        key = None
+        if cache is not None and isinstance(query, str):
+            key = (
+                "validation",
+                query,
+                tuple(self.validation_rules or ()),
+                graphene_settings.MAX_VALIDATION_ERRORS,
+            )
+            verdict = cache.get(key, document)
+            if verdict is not None:
+                return list(verdict.errors)
+        errors = validate(
+            schema,
+            document,
+            self.validation_rules,
+            graphene_settings.MAX_VALIDATION_ERRORS,
+        )
+        if key is not None:
+            cache.set(key, Verdict(errors=tuple(errors)), document)
+        return errors
+
+    def execute_graphql_request(
+        self,
+        request,
+        data,
+        query,
+        variables,
+        operation_name,
+        show_graphiql=False,
+    ):
+        if not query or not isinstance(self.schema, SchemaMixin):
+            return super().execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        try:
+            document = parse_document(query).document
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+        context = self.get_context(request)
+        # limits first (of the profile of the client), batches are already
+        # checked
+        errors, verdict = getattr(self, "_protector_batch_verdicts", {}).get(
+            id(data), (None, None)
+        )
+        if errors is None:
+            verdict = self.schema.protector_check_query(
+                query,
+                variables,
+                context=context,
+                operation_name=operation_name,
+            )
+            errors = list(verdict.errors)
+        if errors:
+            self._protector_status_code = self.protector_limit_status_code
+            return ExecutionResult(data=None, errors=errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        validation_errors = self.protector_validate(schema, query, document)
+
+        if validation_errors:
+            return ExecutionResult(data=None, errors=validation_errors)
+
+        breaker = self.schema.get_protector_circuit_breaker()
+        fingerprint = _circuit_fingerprint(
+            breaker,
+            (query,),
+            {"operation_name": operation_name, "variables": variables},
+        )
+        if fingerprint is not None and not breaker.allow(fingerprint):
+            self._protector_status_code = self.protector_busy_status_code
+            self._protector_retry_after = breaker.retry_after(fingerprint)
+            return _circuit_rejected(
+                breaker,
+                fingerprint,
+                verdict.usages,
+                {"operation_name": operation_name},
+            )
+
+        admission = self.schema.get_protector_admission()
+        if admission is not None:
+            options = {"operation_name": operation_name}
+            weight = _admission_weight(self.schema, verdict.usages, options)
+            start = admission.acquire(weight)
+            if start is None:
+                self._protector_status_code = self.protector_busy_status_code
+                self._protector_retry_after = admission.retry_after()
+                return _admission_rejected(admission, verdict.usages, options)
+
+        result = None
+        execution_start = perf_counter()
+        try:
+            execute_options = {
+                "root_value": self.get_root_value(request),
+                "context_value": context,
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options["execution_context_class"] = (
+                    self.execution_context_class
+                )
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False)
+                    is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute(schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            result = execute(schema, document, **execute_options)
+            return result
+        except Exception as e:
+            result = ExecutionResult(errors=[e])
+            return result
+        finally:
+            if admission is not None:
+                admission.release(weight, start)
+            # result is None: cancelled or interrupted
+            if fingerprint is not None and result is not None:
+                breaker.record(
+                    fingerprint,
+                    breaker.is_failure(
+                        result, perf_counter() - execution_start
+                    ),
+                )
@@ -0,0 +1,51 @@
+from dataclasses import asdict
+
+from django.http import (
+    HttpResponseBadRequest,
+    HttpResponseNotFound,
+    JsonResponse,
+)
+from django.views import View
+
+
+class HeavyHittersView(View):
+    """
+    The heavy hitters of a schema (protector_heavy_hitters) as JSON,
+    ?limit=n limits the amount of entries (default 20).
+    The queries are included, protect the view (e.g. staff only)
+
+    Example:
+
+    >>> path("graphql/heavy-hitters", staff_member_required(
+    ...     HeavyHittersView.as_view(schema=schema)
+    ... ))
+    """
+
+    schema = None
+    # HeavyHitters instance, default: the one of schema
+    heavy_hitters = None
+    default_limit = 20
+
+    def get_heavy_hitters(self):
+        if self.heavy_hitters is not None:
+            return self.heavy_hitters
+        return getattr(
+            self.schema, "get_protector_heavy_hitters", lambda: None
+        )()
+
+    def get(self, request, *args, **kwargs):
+        heavy_hitters = self.get_heavy_hitters()
+        if heavy_hitters is None:
+            return HttpResponseNotFound("no heavy hitters")
+        try:
+            limit = int(request.GET.get("limit", self.default_limit))
+        except ValueError:
+            return HttpResponseBadRequest("invalid limit")
+        return JsonResponse(
+            {
+                "capacity": heavy_hitters.capacity,
+                "heavyHitters": [
+                    asdict(entry) for entry in heavy_hitters.top(max(limit, 0))
+                ],
+            }
+        )
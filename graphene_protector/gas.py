@@ -0,0 +1,86 @@
+__all__ = ["BatchGas", "GasBatch"]
+
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional
+
+# batch of the current operation, set by the async execution
+_protector_gas_batch: ContextVar[Optional["GasBatch"]] = ContextVar(
+    "graphene_protector_gas_batch", default=None
+)
+
+
+def _default_key(parent=None, fieldname=None, **kwargs) -> Hashable:
+    return (
+        getattr(getattr(parent, "_meta", None), "name", None)
+        or getattr(parent, "name", ""),
+        fieldname,
+    )
+
+
+class BatchGas:
+    """
+    Gas loaded by an async function, e.g. from tenant data in a database.
+    The keys of all visits of a document are collected first and loaded
+    in one call of load(keys, context), which returns the gas per key
+    (in the order of keys), the keys are collected without charging gas.
+    Outside of async executions default is used, it is required as it
+    decides whether sync executions pass the limits (e.g. the max of the
+    loaded values)
+    """
+
+    def __init__(
+        self,
+        load: Callable[[list, Any], Awaitable[Iterable[int]]],
+        *,
+        default: int,
+        key: Callable[..., Hashable] = _default_key,
+        name: Optional[str] = None,
+    ):
+        self.load = load
+        self.key = key
+        self.default = default
+        # stable name, part of the verdict key
+        self.name = name or getattr(load, "__qualname__", repr(load))
+
+    def __call__(self, **kwargs) -> int:
+        batch = _protector_gas_batch.get()
+        if batch is None:
+            return self.default
+        key = self.key(**kwargs)
+        if batch.values is None:
+            batch.keys.setdefault(self, set()).add(key)
+            # uncharged while collecting, otherwise the gas limit stops the
+            # collection before all keys are known
+            return 0
+        return batch.values.get(self, {}).get(key, self.default)
+
+
+class GasBatch:
+    """keys and loaded values of the BatchGas providers of a document"""
+
+    def __init__(self):
+        self.keys: Dict[BatchGas, set] = {}
+        # None while collecting
+        self.values: Optional[Dict[BatchGas, Dict[Hashable, int]]] = None
+
+    async def resolve(self, context):
+        providers = [
+            (provider, list(keys)) for provider, keys in self.keys.items()
+        ]
+        results = await asyncio.gather(
+            *(provider.load(keys, context) for provider, keys in providers)
+        )
+        self.values = {
+            provider: dict(zip(keys, result))
+            for (provider, keys), result in zip(providers, results)
+        }
+
+    def key(self) -> tuple:
+        """the loaded values, part of the verdict key"""
+        return tuple(
+            (provider.name, tuple(sorted(values.items(), key=repr)))
+            for provider, values in sorted(
+                (self.values or {}).items(), key=lambda item: item[0].name
+            )
+        )
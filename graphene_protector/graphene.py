@@ -16,6 +16,9 @@ class Schema(base.SchemaMixin, GrapheneSchema):
         self.protector_path_ignore_pattern = path_ignore_pattern
         self.auto_camelcase = auto_camelcase
         super().__init__(*args, auto_camelcase=auto_camelcase, **kwargs)
+        self.protector_attach_verdict_cache()
+        if self.protector_verdict_snapshot:
+            self.protector_load_verdict_snapshot()
 
     def get_protector_auto_snakecase(self):
         return self.auto_camelcase
@@ -0,0 +1,137 @@
+__all__ = ["Protector", "protect", "graphql", "graphql_sync"]
+
+from inspect import isawaitable, iscoroutine
+from typing import Optional
+
+from graphql.error import GraphQLError
+from graphql.execution import ExecutionResult, execute
+from graphql.type import GraphQLSchema, validate_schema
+from graphql.validation import validate
+
+from . import base
+from .cache import parse_document
+
+
+def _assume_not_awaitable(value) -> bool:
+    return False
+
+
+def _validated_document(schema: GraphQLSchema, source):
+    """
+    Like graphql-core before execution but with the cached parsed document
+    of the limit checks. Returns the document or the failed ExecutionResult
+    """
+    errors = validate_schema(schema)
+    if errors:
+        return ExecutionResult(data=None, errors=errors)
+    try:
+        document = parse_document(source).document
+    except GraphQLError as error:
+        return ExecutionResult(data=None, errors=[error])
+    errors = validate(schema, document)
+    if errors:
+        return ExecutionResult(data=None, errors=errors)
+    return document
+
+
+class Protector(base.SchemaMixin):
+    """
+    Protection of a plain graphql-core schema, created via protect.
+    The protector_ attributes and get_protector_ methods work like for
+    the graphene and strawberry Schema
+    """
+
+    def __init__(
+        self,
+        graphql_schema: GraphQLSchema,
+        *,
+        limits=base.MISSING_LIMITS,
+        path_ignore_pattern=base.default_path_ignore_pattern,
+        auto_snakecase=False,
+    ):
+        self.graphql_schema = graphql_schema
+        self.protector_default_limits = limits
+        self.protector_path_ignore_pattern = path_ignore_pattern
+        self.auto_snakecase = auto_snakecase
+        self.protector_attach_verdict_cache()
+        if self.protector_verdict_snapshot:
+            self.protector_load_verdict_snapshot()
+
+    def get_protector_auto_snakecase(self):
+        return self.auto_snakecase
+
+    def execute(
+        self, source, *, check_sync=False, **kwargs
+    ) -> ExecutionResult:
+        document = _validated_document(self.graphql_schema, source)
+        if isinstance(document, ExecutionResult):
+            return document
+        # like graphql_sync: everything is assumed to be synchronous
+        if callable(check_sync):
+            kwargs["is_awaitable"] = check_sync
+        elif not check_sync:
+            kwargs["is_awaitable"] = _assume_not_awaitable
+        result = execute(self.graphql_schema, document, **kwargs)
+        if isawaitable(result):
+            if iscoroutine(result):
+                result.close()
+            raise RuntimeError(
+                "GraphQL execution failed to complete synchronously."
+            )
+        return result
+
+    async def execute_async(self, source, **kwargs) -> ExecutionResult:
+        document = _validated_document(self.graphql_schema, source)
+        if isinstance(document, ExecutionResult):
+            return document
+        result = execute(self.graphql_schema, document, **kwargs)
+        if isawaitable(result):
+            return await result
+        return result
+
+
+def protect(
+    schema: GraphQLSchema,
+    limits=base.MISSING_LIMITS,
+    *,
+    protector_class=Protector,
+    **kwargs,
+) -> Protector:
+    """
+    Attach a Protector to a graphql-core schema. The schema is decorated
+    (validate(schema, ast, [LimitsValidationRule]) uses the limits) and
+    the type cost index is built upfront. Protecting again replaces the
+    protector
+    """
+    protector = protector_class(schema, limits=limits, **kwargs)
+    protector.protector_decorate_graphql_schema(schema)
+    base._type_cost_index(schema)
+    base._has_batch_gas(schema)
+    schema._graphene_protector = protector
+    return protector
+
+
+def _get_protector(schema: GraphQLSchema) -> Protector:
+    protector: Optional[Protector] = getattr(
+        schema, "_graphene_protector", None
+    )
+    if protector is None:
+        # better fail then omitting limits: default limits
+        protector = protect(schema)
+    return protector
+
+
+def graphql_sync(schema: GraphQLSchema, source, **kwargs) -> ExecutionResult:
+    """
+    graphql_sync of graphql-core with cached limit checks, check_limits=False
+    disables the checks once
+    """
+    return _get_protector(schema).execute(source, **kwargs)
+
+
+async def graphql(schema: GraphQLSchema, source, **kwargs) -> ExecutionResult:
+    """
+    graphql of graphql-core with cached limit checks, check_limits=False
+    disables the checks once
+    """
+    return await _get_protector(schema).execute_async(source, **kwargs)
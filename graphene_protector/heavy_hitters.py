@@ -0,0 +1,93 @@
+__all__ = ["HeavyHitter", "HeavyHitters"]
+
+import threading
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional
+
+from .misc import UsagesResult, _deco_options
+
+
+def _default_weight(usages: UsagesResult) -> int:
+    return max(usages.gas_used, usages.complexity, 1)
+
+
+@dataclass(**_deco_options)
+class HeavyHitter:
+    fingerprint: str
+    # first query seen with this fingerprint
+    query: Optional[str] = None
+    count: int = 0
+    gas_used: int = 0
+    complexity: int = 0
+    rejected: int = 0
+    # accumulated weight, overestimated by at most error
+    weight: int = 0
+    error: int = 0
+
+
+class HeavyHitters:
+    """
+    Top-K of the query fingerprints by accumulated weight (default: max of
+    gas and complexity per check) in bounded memory (Space-Saving).
+    When full, the entry with the lowest weight is replaced and the new
+    entry inherits its weight as error. count, gas_used, complexity and
+    rejected are exact since the entry was (re)created
+    """
+
+    def __init__(
+        self,
+        capacity: int = 100,
+        *,
+        weight: Callable[[UsagesResult], int] = _default_weight,
+    ):
+        self.capacity = capacity
+        self.weight = weight
+        self.entries: Dict[str, HeavyHitter] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        fingerprint: str,
+        usages: UsagesResult,
+        *,
+        query: Optional[str] = None,
+        rejected: bool = False,
+    ):
+        weight = self.weight(usages)
+        with self._lock:
+            entry = self.entries.get(fingerprint)
+            if entry is None:
+                if len(self.entries) >= self.capacity:
+                    evicted = min(
+                        self.entries.values(), key=lambda x: x.weight
+                    )
+                    del self.entries[evicted.fingerprint]
+                    entry = HeavyHitter(
+                        fingerprint=fingerprint,
+                        query=query,
+                        weight=evicted.weight,
+                        error=evicted.weight,
+                    )
+                else:
+                    entry = HeavyHitter(fingerprint=fingerprint, query=query)
+                self.entries[fingerprint] = entry
+            entry.count += 1
+            entry.gas_used += usages.gas_used
+            entry.complexity += usages.complexity
+            entry.rejected += rejected
+            entry.weight += weight
+
+    def top(self, n: Optional[int] = None) -> List[HeavyHitter]:
+        """the n (default: all) heaviest entries (copies)"""
+        with self._lock:
+            entries = sorted(
+                self.entries.values(), key=lambda x: x.weight, reverse=True
+            )[:n]
+            return [replace(entry) for entry in entries]
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
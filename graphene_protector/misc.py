@@ -2,6 +2,10 @@ __all__ = [
     "MISSING",
     "Limits",
     "UsagesResult",
+    "DocumentUsagesResult",
+    "Verdict",
+    "PathCost",
+    "Explanation",
     "DEFAULT_LIMITS",
     "MISSING_LIMITS",
     "EarlyStop",
@@ -10,13 +14,21 @@ __all__ = [
     "SelectionsLimitReached",
     "ComplexityLimitReached",
     "GasLimitReached",
+    "AliasesLimitReached",
+    "RootFieldsLimitReached",
+    "FragmentDefinitionsLimitReached",
+    "FragmentSpreadsLimitReached",
+    "DefinitionsLimitReached",
+    "SubscriptionsLimitReached",
+    "ConcurrencyLimitReached",
+    "CircuitOpen",
     "default_path_ignore_pattern",
 ]
 
 import copy
 import sys
-from dataclasses import dataclass
-from typing import Set, Union
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 from graphql.error import GraphQLError
 
@@ -45,6 +57,26 @@ class Limits:
     selections: Union[int, None, MISSING] = MISSING
     complexity: Union[int, None, MISSING] = MISSING
     gas: Union[int, None, MISSING] = MISSING
+    # limits for introspection fields (e.g. __schema)
+    introspection_depth: Union[int, None, MISSING] = MISSING
+    introspection_selections: Union[int, None, MISSING] = MISSING
+    # budget for @defer and @stream parts (not part of selections and gas)
+    deferred_selections: Union[int, None, MISSING] = MISSING
+    deferred_gas: Union[int, None, MISSING] = MISSING
+    # document shape limits, only evaluated for the main Limit instance
+    aliases: Union[int, None, MISSING] = MISSING
+    root_fields: Union[int, None, MISSING] = MISSING
+    fragment_definitions: Union[int, None, MISSING] = MISSING
+    fragment_spreads: Union[int, None, MISSING] = MISSING
+    definitions: Union[int, None, MISSING] = MISSING
+    # subscription limits per connection/context key, only evaluated for the
+    # main Limit instance
+    # max concurrent subscriptions
+    subscriptions: Union[int, None, MISSING] = MISSING
+    # max events per second
+    subscription_events: Union[int, None, MISSING] = MISSING
+    # max event costs per second
+    subscription_cost: Union[int, None, MISSING] = MISSING
     # only for sublimits not for main Limit instance
     # passthrough for not missing limits
     passthrough: Set[str] = _empty_set
@@ -61,10 +93,74 @@ class UsagesResult:
     max_level_complexity: int = 0
     selections: int = 0
     gas_used: int = 0
+    deferred_selections: int = 0
+    deferred_gas: int = 0
+    # max complexity (depth * selections) of a selection
+    complexity: int = 0
+
+
+@dataclass(**_deco_options)
+class DocumentUsagesResult:
+    aliases: int = 0
+    # max root fields of an operation
+    root_fields: int = 0
+    fragment_definitions: int = 0
+    fragment_spreads: int = 0
+    definitions: int = 0
+
+
+@dataclass(frozen=True, **_deco_options)
+class Verdict:
+    errors: Tuple[GraphQLError, ...] = ()
+    # usages per operation name
+    usages: Dict[Optional[str], UsagesResult] = field(default_factory=dict)
+
+
+@dataclass(**_deco_options)
+class PathCost:
+    # path of a field with selections, "" for the operation
+    path: str = ""
+    # level depth and complexity of the deepest selection below
+    max_level_depth: int = 0
+    complexity: int = 0
+    selections: int = 0
+    # including the gas of the field itself
+    gas_used: int = 0
+    deferred: bool = False
+    # limits applied to the selections of the field
+    limits: Optional[Limits] = None
+    # sub limits of the field restarted the counters
+    reset: bool = False
+
+
+@dataclass(frozen=True, **_deco_options)
+class Explanation:
+    errors: Tuple[GraphQLError, ...] = ()
+    # usages per operation name
+    usages: Dict[Optional[str], UsagesResult] = field(default_factory=dict)
+    # costs per path (pre-order) per operation name
+    paths: Dict[Optional[str], List[PathCost]] = field(default_factory=dict)
 
 
 MISSING_LIMITS = Limits()
-DEFAULT_LIMITS = Limits(depth=20, selections=None, complexity=100, gas=None)
+DEFAULT_LIMITS = Limits(
+    depth=20,
+    selections=None,
+    complexity=100,
+    gas=None,
+    introspection_depth=20,
+    introspection_selections=None,
+    deferred_selections=None,
+    deferred_gas=None,
+    aliases=None,
+    root_fields=None,
+    fragment_definitions=None,
+    fragment_spreads=None,
+    definitions=None,
+    subscriptions=None,
+    subscription_events=None,
+    subscription_cost=None,
+)
 
 
 class EarlyStop(Exception):
@@ -72,7 +168,7 @@ class EarlyStop(Exception):
 
 
 class ResourceLimitReached(GraphQLError):
-    used_resources: UsagesResult
+    used_resources: Union[UsagesResult, DocumentUsagesResult]
 
     def __init__(self, *args, used_resources, **kwargs):
         super().__init__(*args, **kwargs)
@@ -95,6 +191,44 @@ class GasLimitReached(ResourceLimitReached):
     pass
 
 
+class AliasesLimitReached(ResourceLimitReached):
+    pass
+
+
+class RootFieldsLimitReached(ResourceLimitReached):
+    pass
+
+
+class FragmentDefinitionsLimitReached(ResourceLimitReached):
+    pass
+
+
+class FragmentSpreadsLimitReached(ResourceLimitReached):
+    pass
+
+
+class DefinitionsLimitReached(ResourceLimitReached):
+    pass
+
+
+class SubscriptionsLimitReached(ResourceLimitReached):
+    pass
+
+
+class ConcurrencyLimitReached(ResourceLimitReached):
+    # seconds, also in the extensions of the error
+    retry_after: float
+
+    def __init__(self, *args, retry_after: float, **kwargs):
+        kwargs.setdefault("extensions", {"retry_after": retry_after})
+        super().__init__(*args, **kwargs)
+        self.retry_after = retry_after
+
+
+class CircuitOpen(ConcurrencyLimitReached):
+    """the query failed repeatedly, rejected until retry_after"""
+
+
 # the worst problem for calculations is edges/node as it increases the
 # complexity and depth count by 2
 # the other parts does not affect the calculations by these magnitudes
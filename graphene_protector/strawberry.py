@@ -1,14 +1,23 @@
-from typing import Optional
+from typing import List, Optional
 
+from graphql import GraphQLError
 from strawberry import Schema as StrawberrySchema
-from strawberry.extensions import AddValidationRules
+from strawberry.extensions import SchemaExtension
 
 from . import base
+from .cache import ParsedDocument, VerdictCache, parse_document, verdict_key
+from .calibration import GasCalibrator
+from .misc import DEFAULT_LIMITS, Verdict
 
 
-class CustomGrapheneProtector(AddValidationRules):
+class CustomGrapheneProtector(SchemaExtension):
     """
-    Add a validator to limit the used resources
+    Add a validator to limit the used resources.
+    The document is parsed once (cached, shared with the schema wrapper)
+    and the limits are checked via the verdict cache before the validation
+    of strawberry, so the limits rule is not part of the validation rules
+    (which the ValidationCache extension caches without the variables).
+    Place it after ParserCache and ValidationCache
 
     Example:
 
@@ -27,6 +36,10 @@ class CustomGrapheneProtector(AddValidationRules):
 
     `limits: Limits`
         The limits definition
+
+    `verdict_cache_size: int`
+        Size of the verdict cache for schemas without SchemaMixin (0
+        disables it). SchemaMixin schemas use their verdict cache
     """
 
     def __init__(
@@ -36,6 +49,7 @@ class CustomGrapheneProtector(AddValidationRules):
         full_validation: Optional[bool] = None,
         auto_snakecase: Optional[bool] = None,
         camelcase_path: Optional[bool] = None,
+        verdict_cache_size: int = 1024,
     ):
         # if there is a custom option, create a subclass
         if (
@@ -57,7 +71,123 @@ class CustomGrapheneProtector(AddValidationRules):
         else:
             CustomLimitsValidationRule = base.LimitsValidationRule
 
-        super().__init__([CustomLimitsValidationRule])
+        self.validation_rule = CustomLimitsValidationRule
+        self.verdict_cache = (
+            VerdictCache(verdict_cache_size)
+            if verdict_cache_size > 0
+            else None
+        )
+
+    def _parsed_document(self) -> ParsedDocument:
+        execution_context = self.execution_context
+        if isinstance(execution_context.query, str) and not getattr(
+            execution_context, "parse_options", None
+        ):
+            return parse_document(execution_context.query)
+        # not cacheable
+        return ParsedDocument(execution_context.graphql_document, None)
+
+    def on_parse(self):
+        execution_context = self.execution_context
+        if (
+            not execution_context.graphql_document
+            and isinstance(execution_context.query, str)
+            and not getattr(execution_context, "parse_options", None)
+        ):
+            try:
+                execution_context.graphql_document = parse_document(
+                    execution_context.query
+                ).document
+            except GraphQLError:
+                # reported by the parsing of strawberry
+                pass
+        yield
+
+    def check_limits(self) -> List[GraphQLError]:
+        execution_context = self.execution_context
+        schema = execution_context.schema
+        graphql_schema = base._get_graphql_schema(schema)
+        if not getattr(graphql_schema, "protector_on", True):
+            return []
+        query = execution_context.query
+        parsed = self._parsed_document()
+        if self.validation_rule is base.LimitsValidationRule and isinstance(
+            schema, base.SchemaMixin
+        ):
+            # verdict cache, profiles and load limits of the schema
+            return list(
+                base._check_query(
+                    schema,
+                    graphql_schema,
+                    query,
+                    parsed,
+                    execution_context.operation_name,
+                ).errors
+            )
+        key = None
+        # the rule options of schemas with SchemaMixin can be dynamic
+        if self.verdict_cache is not None and not isinstance(
+            schema, base.SchemaMixin
+        ):
+            key = verdict_key(
+                query,
+                self.validation_rule.default_limits or DEFAULT_LIMITS,
+                parsed,
+                execution_context.variables,
+            )
+            if key is not None:
+                verdict = self.verdict_cache.get(key, parsed.document)
+                if verdict is not None:
+                    return list(verdict.errors)
+        errors, usages, cacheable = base._validate_limits_cacheable(
+            graphql_schema, parsed.document, self.validation_rule
+        )
+        if key is not None and cacheable:
+            self.verdict_cache.set(
+                key,
+                Verdict(errors=tuple(errors), usages=usages),
+                parsed.document,
+            )
+        return errors
+
+    def on_validate(self):
+        execution_context = self.execution_context
+        # required for evaluating @skip/@include, @defer and @stream
+        token = base._protector_variables.set(execution_context.variables)
+        try:
+            # skip if an earlier extension (ValidationCache) found errors
+            if not execution_context.errors:
+                errors = self.check_limits()
+                if errors:
+                    # the validation of strawberry is skipped
+                    execution_context.errors = errors
+            yield
+        finally:
+            base._protector_variables.reset(token)
+
+
+class CalibrationExtension(SchemaExtension):
+    """
+    Records the resolver timings for gas calibration
+
+    Example:
+
+    >>> calibrator = GasCalibrator()
+    >>> schema = Schema(Query, extensions=[CalibrationExtension(calibrator)])
+    """
+
+    def __init__(self, calibrator: GasCalibrator, *, execution_context=None):
+        self.calibrator = calibrator
+        if execution_context is not None:
+            self.execution_context = execution_context
+
+    def resolve(self, _next, root, info, *args, **kwargs):
+        return self.calibrator.measure(
+            lambda root, info, **kwargs: _next(root, info, *args, **kwargs),
+            root,
+            info,
+            **kwargs
+        )
 
 
 class Schema(
@@ -75,13 +205,27 @@ class Schema(
     ):
         self.protector_default_limits = limits
         self.protector_path_ignore_pattern = path_ignore_pattern
-        for extension in extensions:
-            if isinstance(extension, CustomGrapheneProtector):
-                break
-        else:
-            extensions = (CustomGrapheneProtector(), *extensions)
+        protectors = [
+            extension
+            for extension in extensions
+            if isinstance(extension, CustomGrapheneProtector)
+        ]
+        if not protectors:
+            protectors = [CustomGrapheneProtector()]
+        # last: after ParserCache and ValidationCache
+        extensions = (
+            *(
+                extension
+                for extension in extensions
+                if not isinstance(extension, CustomGrapheneProtector)
+            ),
+            *protectors,
+        )
 
         super().__init__(*args, extensions=extensions, **kwargs)
+        self.protector_attach_verdict_cache()
+        if self.protector_verdict_snapshot:
+            self.protector_load_verdict_snapshot()
 
     def get_protector_auto_snakecase(self):
         return self.config.name_converter.auto_camel_case
@@ -0,0 +1,166 @@
+__all__ = [
+    "TokenBucket",
+    "SubscriptionBudget",
+    "SubscriptionBudgets",
+    "ThrottledSubscription",
+]
+
+import asyncio
+import threading
+import weakref
+from time import monotonic
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Dict,
+    Hashable,
+    Optional,
+)
+
+from .misc import Limits
+
+
+class TokenBucket:
+    """
+    Token bucket which can go into debt. The debt is returned as delay
+    so expensive events are delayed instead of dropped
+    """
+
+    __slots__ = ("rate", "tokens", "last")
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        # burst of one second
+        self.tokens = rate
+        self.last = monotonic()
+
+    def consume(self, amount: int) -> float:
+        now = monotonic()
+        self.tokens = min(
+            self.rate, self.tokens + (now - self.last) * self.rate
+        )
+        self.last = now
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class SubscriptionBudget:
+    """
+    Shared budget of all subscriptions of a connection/context key
+    """
+
+    __slots__ = ("budgets", "key", "active", "events", "cost")
+
+    def __init__(
+        self, budgets: "SubscriptionBudgets", key: Hashable, limits: Limits
+    ):
+        self.budgets = budgets
+        self.key = key
+        self.active = 0
+        self.events = (
+            TokenBucket(limits.subscription_events)
+            if limits.subscription_events
+            else None
+        )
+        self.cost = (
+            TokenBucket(limits.subscription_cost)
+            if limits.subscription_cost
+            else None
+        )
+
+    def consume(self, cost: int) -> float:
+        delay = 0.0
+        if self.events:
+            delay = self.events.consume(1)
+        if self.cost:
+            delay = max(delay, self.cost.consume(cost))
+        return delay
+
+    def release(self):
+        self.budgets.release(self)
+
+
+class SubscriptionBudgets:
+    """
+    Registry of the subscription budgets of a schema
+    """
+
+    def __init__(self):
+        self._budgets: Dict[Hashable, SubscriptionBudget] = {}
+        self._lock = threading.Lock()
+
+    def acquire(
+        self, key: Hashable, limits: Limits
+    ) -> Optional[SubscriptionBudget]:
+        """
+        returns None in case there are too many concurrent subscriptions
+        """
+        with self._lock:
+            budget = self._budgets.get(key)
+            if budget is None:
+                budget = SubscriptionBudget(self, key, limits)
+                self._budgets[key] = budget
+            elif (
+                limits.subscriptions and budget.active >= limits.subscriptions
+            ):
+                return None
+            budget.active += 1
+            return budget
+
+    def release(self, budget: SubscriptionBudget):
+        with self._lock:
+            budget.active -= 1
+            if budget.active <= 0:
+                self._budgets.pop(budget.key, None)
+
+    def active(self, key: Hashable) -> int:
+        budget = self._budgets.get(key)
+        return budget.active if budget else 0
+
+
+class ThrottledSubscription:
+    """
+    Wraps the source iterator of a subscription and delays events
+    according to the budget of the connection
+    """
+
+    def __init__(
+        self, iterator: AsyncIterator, budget: SubscriptionBudget, cost: int
+    ):
+        self.iterator = iterator
+        self.budget = budget
+        self.cost = cost
+        # also released if the subscription is dropped without being
+        # started or closed, the budget key (id of the context) can be
+        # reused afterwards
+        self._release = weakref.finalize(self, budget.release)
+        self._events = self._throttle()
+
+    async def _throttle(self) -> AsyncIterator:
+        # finalized by the event loop if the subscription is abandoned
+        try:
+            async for event in self.iterator:
+                delay = self.budget.consume(self.cost)
+                if delay:
+                    await asyncio.sleep(delay)
+                yield event
+        finally:
+            self._release()
+            if hasattr(self.iterator, "aclose"):
+                await self.iterator.aclose()
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self) -> Awaitable[Any]:
+        return self._events.__anext__()
+
+    async def aclose(self):
+        try:
+            await self._events.aclose()
+        finally:
+            # not started generators skip the finally block of _throttle
+            self._release()
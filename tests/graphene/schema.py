@@ -47,3 +47,11 @@ class Query(graphene.ObjectType):
             kwargs,
             [SomeNode(id=f"id-{x}") for x in range(200)],
         )
+
+
+class Subscription(graphene.ObjectType):
+    count = graphene.Int(up_to=graphene.Int())
+
+    async def subscribe_count(root, info, up_to=3):
+        for i in range(up_to):
+            yield i
@@ -0,0 +1,90 @@
+__package__ = "tests"
+
+import asyncio
+import threading
+import unittest
+
+from graphene_protector.admission import AdmissionController
+
+
+class TestAdmissionController(unittest.TestCase):
+    def test_weights(self):
+        admission = AdmissionController(10, max_wait=0)
+        expensive = admission.acquire(8)
+        self.assertIsNotNone(expensive)
+        # cheap queries still fit
+        cheap = admission.acquire(2)
+        self.assertIsNotNone(cheap)
+        self.assertIsNone(admission.acquire(1))
+        admission.release(2, cheap)
+        admission.release(8, expensive)
+        # weights above the capacity are clamped
+        self.assertIsNotNone(admission.acquire(100))
+        stats = admission.stats()
+        self.assertEqual(stats["admitted"], 3)
+        self.assertEqual(stats["rejected"], 1)
+        self.assertGreater(admission.retry_after(), 0)
+
+    def test_threads(self):
+        admission = AdmissionController(10, max_wait=5)
+        start = admission.acquire(10)
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(admission.acquire(5))
+        )
+        thread.start()
+        while admission.queue_depth == 0:
+            pass
+        self.assertEqual(admission.stats()["max_queue_depth"], 1)
+        admission.release(10, start)
+        thread.join()
+        self.assertIsNotNone(results[0])
+        self.assertEqual(admission.waited, 1)
+        self.assertGreater(admission.wait_time, 0)
+
+    def test_max_queue(self):
+        admission = AdmissionController(1, max_wait=5, max_queue=0)
+        admission.acquire(1)
+        self.assertIsNone(admission.acquire(1))
+
+    def test_asyncio(self):
+        admission = AdmissionController(10, max_wait=5)
+
+        async def main():
+            start = await admission.acquire_async(10)
+            waiter = asyncio.ensure_future(admission.acquire_async(3))
+            await asyncio.sleep(0.01)
+            self.assertEqual(admission.queue_depth, 1)
+            admission.release(10, start)
+            self.assertIsNotNone(await waiter)
+            # timeout
+            admission.max_wait = 0.01
+            self.assertIsNone(await admission.acquire_async(10))
+
+        asyncio.run(main())
+        self.assertEqual(admission.rejected, 1)
+
+    def test_cancel(self):
+        admission = AdmissionController(10, max_wait=5, max_queue=2)
+
+        async def main():
+            start = await admission.acquire_async(10)
+            # e.g. disconnected clients
+            for _ in range(2):
+                waiter = asyncio.ensure_future(admission.acquire_async(3))
+                await asyncio.sleep(0.01)
+                waiter.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await waiter
+            self.assertEqual(admission.queue_depth, 0)
+            waiter = asyncio.ensure_future(admission.acquire_async(3))
+            await asyncio.sleep(0.01)
+            admission.release(10, start)
+            self.assertIsNotNone(await waiter)
+
+        asyncio.run(main())
+        self.assertEqual(admission.stats()["queue_depth"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+__package__ = "tests"
+
+import multiprocessing
+import unittest
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+
+from graphene_protector import GasLimitReached, Limits
+from graphene_protector.bulk import check_many
+
+from .graphql.schema import Query
+from .test_graphql_core import Schema
+
+schema = Schema(query=Query)
+documents = [
+    "{ hello }",
+    "{ hello hello }",
+    (
+        "query($skip: Boolean!) { hello a: hello @skip(if: $skip) }",
+        {"skip": True},
+    ),
+    (
+        "query($skip: Boolean!) { hello a: hello @skip(if: $skip) }",
+        {"skip": False},
+    ),
+    "{ hello",
+    "{ hello }",
+]
+
+
+class LazyExecutor(Executor):
+    """runs a submitted call only when its result is requested"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def submit(self, fn, *args, **kwargs):
+        executor = self
+        executor.in_flight += 1
+        executor.max_in_flight = max(
+            executor.max_in_flight, executor.in_flight
+        )
+
+        class LazyFuture(Future):
+            def result(self, timeout=None):
+                executor.in_flight -= 1
+                return fn(*args, **kwargs)
+
+        return LazyFuture()
+
+
+class TestCheckMany(unittest.TestCase):
+    def check(self, verdicts):
+        self.assertEqual(len(verdicts), 6)
+        self.assertEqual(verdicts[0].errors, ())
+        self.assertEqual(verdicts[0].usages[None].gas_used, 1)
+        self.assertIsInstance(verdicts[1].errors[0], GasLimitReached)
+        self.assertEqual(verdicts[1].errors[0].used_resources.gas_used, 2)
+        self.assertEqual(verdicts[2].errors, ())
+        self.assertIsInstance(verdicts[3].errors[0], GasLimitReached)
+        self.assertEqual(verdicts[4].errors[0].message[:12], "Syntax Error")
+        self.assertEqual(verdicts[5].usages, verdicts[0].usages)
+
+    def test_check_many(self):
+        self.check(check_many(schema, documents))
+        verdicts = check_many(schema, documents, Limits(gas=2))
+        self.assertEqual(verdicts[1].errors, ())
+        # repeated documents get own errors, located in their document
+        verdicts = check_many(schema, ["{ hello hello }", "  { hello hello }"])
+        self.assertIsNot(verdicts[0].errors[0], verdicts[1].errors[0])
+        self.assertEqual(verdicts[1].errors[0].locations[0].column, 3)
+
+    def test_executor(self):
+        with ProcessPoolExecutor(
+            2, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            self.check(
+                check_many(
+                    "tests.test_bulk:schema",
+                    documents,
+                    executor=executor,
+                    chunksize=4,
+                )
+            )
+        with self.assertRaises(TypeError):
+            check_many(schema, documents, executor=executor)
+
+    def test_window(self):
+        executor = LazyExecutor()
+        consumed = []
+
+        def gen():
+            for document in documents:
+                consumed.append(document)
+                yield document
+
+        self.check(
+            check_many(
+                "tests.test_bulk:schema",
+                gen(),
+                executor=executor,
+                chunksize=1,
+                window=2,
+            )
+        )
+        self.assertEqual(len(consumed), 6)
+        self.assertEqual(executor.max_in_flight, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,313 @@
+__package__ = "tests"
+
+import multiprocessing
+import os
+import re
+import tempfile
+import unittest
+import uuid
+
+from graphql.error import GraphQLError
+from graphql.type import GraphQLField, GraphQLObjectType, GraphQLString
+
+from graphene_protector import (
+    DepthLimitReached,
+    Limits,
+    UsagesResult,
+    Verdict,
+    gas_usage,
+)
+from graphene_protector.cache import (
+    SharedVerdictCache,
+    VerdictSnapshot,
+    canonicalize,
+    fingerprint,
+    query_fingerprint,
+)
+
+from .graphql.schema import Query, field
+from .test_graphql_core import Schema
+
+
+def _set_in_child(name, key):
+    cache = SharedVerdictCache(name, slots=64)
+    cache.set(
+        key,
+        Verdict(
+            errors=(
+                DepthLimitReached(
+                    "Query is too deep",
+                    used_resources=UsagesResult(max_level_depth=3),
+                ),
+            )
+        ),
+    )
+    cache.close()
+
+
+class TestSharedVerdictCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = SharedVerdictCache(
+            "gp_test_%s" % uuid.uuid4().hex[:12], slots=64
+        )
+
+    def tearDown(self):
+        self.cache.close()
+        self.cache.unlink()
+
+    def test_fingerprint(self):
+        key = ("{ a }", frozenset({"a", "b", "c"}), re.compile("x$"))
+        self.assertEqual(
+            fingerprint(key),
+            fingerprint(
+                ("{ a }", frozenset({"c", "b", "a"}), re.compile("x$"))
+            ),
+        )
+        self.assertNotEqual(
+            fingerprint(key), fingerprint(("{ b }",) + key[1:])
+        )
+
+    def test_roundtrip(self):
+        self.assertIsNone(self.cache.get(("q",)))
+        self.cache.set(
+            ("q",),
+            Verdict(usages={"op": UsagesResult(selections=3, gas_used=4)}),
+        )
+        verdict = self.cache.get(("q",))
+        self.assertEqual(verdict.errors, ())
+        self.assertEqual(verdict.usages[None].selections, 3)
+        self.assertEqual(verdict.usages[None].gas_used, 4)
+        # overwrite
+        self.cache.set(
+            ("q",),
+            Verdict(usages={"op": UsagesResult(selections=5)}),
+        )
+        self.assertEqual(self.cache.get(("q",)).usages[None].selections, 5)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(("q",)))
+
+    def test_unsupported_errors(self):
+        self.cache.set(("q",), Verdict(errors=(GraphQLError("foo"),)))
+        self.assertIsNone(self.cache.get(("q",)))
+
+    def test_torn_entry(self):
+        self.cache.set(("q",), Verdict())
+        offset = next(self.cache._offsets(fingerprint(("q",))))
+        self.cache.buf[offset + 30] ^= 0xFF
+        self.assertIsNone(self.cache.get(("q",)))
+
+    def test_eviction(self):
+        for i in range(200):
+            self.cache.set(
+                ("q", i), Verdict(usages={None: UsagesResult(gas_used=i)})
+            )
+        self.assertEqual(self.cache.get(("q", 199)).usages[None].gas_used, 199)
+        self.assertLessEqual(len(self.cache), 64)
+
+    def test_processes(self):
+        ctx = multiprocessing.get_context("fork")
+        process = ctx.Process(
+            target=_set_in_child, args=(self.cache._shm.name, ("q",))
+        )
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        verdict = self.cache.get(("q",))
+        self.assertIsInstance(verdict.errors[0], DepthLimitReached)
+        self.assertEqual(verdict.errors[0].message, "Query is too deep")
+        self.assertEqual(verdict.errors[0].used_resources.max_level_depth, 3)
+        # segment survives the exit of the attached process
+        self.assertEqual(
+            SharedVerdictCache(self.cache._shm.name, slots=64).slots, 64
+        )
+
+    def test_incompatible(self):
+        with self.assertRaises(ValueError):
+            SharedVerdictCache(self.cache._shm.name, slots=32)
+
+
+class TestSharedVerdictCacheFile(unittest.TestCase):
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "verdicts")
+            cache = SharedVerdictCache(path=path, slots=16)
+            cache.set(("q",), Verdict(usages={None: UsagesResult(gas_used=2)}))
+            cache.close()
+            cache = SharedVerdictCache(path=path, slots=16)
+            self.assertEqual(cache.get(("q",)).usages[None].gas_used, 2)
+            cache.close()
+            cache.unlink()
+            self.assertFalse(os.path.exists(path))
+
+    def test_schema(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = SharedVerdictCache(
+                path=os.path.join(tmpdir, "v"), slots=16
+            )
+            schema = Schema(query=Query)
+            schema.protector_verdict_cache = cache
+            self.assertIs(schema.get_protector_verdict_cache(), cache)
+            verdict = schema.protector_check_query("{ hello }")
+            self.assertEqual(verdict.errors, ())
+            self.assertEqual(len(cache), 1)
+            # served from the shared cache
+            verdict = schema.protector_check_query("{ hello }")
+            self.assertEqual(verdict.errors, ())
+            self.assertEqual(verdict.usages[None].gas_used, 1)
+            cache.close()
+
+    def test_schema_hash(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "v")
+            caches = []
+            for gas, rejected in ((1, False), (100, True), (100, True)):
+                hello = gas_usage(gas)(
+                    GraphQLField(GraphQLString, resolve=lambda *_: "World")
+                )
+                schema = Schema(
+                    query=GraphQLObjectType("Query", {"hello": hello})
+                )
+                schema.protector_verdict_cache_size = 0
+                # e.g. a restart with changed annotations
+                cache = SharedVerdictCache(path=path, slots=16)
+                caches.append(cache)
+                schema.protector_verdict_cache = cache
+                schema.protector_attach_verdict_cache()
+                verdict = schema.protector_check_query("{ hello }")
+                self.assertEqual(bool(verdict.errors), rejected)
+                self.assertEqual(len(cache), 1)
+            # the table was cleared for the second schema, the process with
+            # the first schema misses now
+            self.assertEqual(len(caches[0]), 0)
+            self.assertIsNone(caches[0].get(("q",)))
+            for cache in caches:
+                cache.close()
+
+
+class TestVerdictSnapshot(unittest.TestCase):
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "snapshot")
+            schema = Schema(query=Query)
+            self.assertIsNone(schema.get_protector_verdict_snapshot())
+            self.assertEqual(
+                schema.protector_check_query("{ hello }").errors, ()
+            )
+            self.assertEqual(
+                len(schema.protector_check_query("{ hello hello }").errors), 1
+            )
+            schema.protector_save_verdict_snapshot(path)
+
+            schema = Schema(query=Query)
+            schema.protector_verdict_cache_size = 0
+            schema.protector_verdict_snapshot = path
+            # not loaded on the request path
+            self.assertIsNone(schema.get_protector_verdict_snapshot())
+            snapshot = schema.protector_load_verdict_snapshot()
+            self.assertIs(schema.get_protector_verdict_snapshot(), snapshot)
+            self.assertIsInstance(snapshot, VerdictSnapshot)
+            self.assertEqual(len(snapshot), 2)
+            # served from the snapshot
+            verdict = schema.protector_check_query("{ hello }")
+            self.assertEqual(verdict.usages[None].gas_used, 1)
+            verdict = schema.protector_check_query("{ hello hello }")
+            self.assertEqual(
+                verdict.errors[0].message, "Query uses too much gas"
+            )
+            self.assertEqual(verdict.errors[0].used_resources.gas_used, 2)
+            snapshot.close()
+
+            # changed limits
+            schema = Schema(query=Query)
+            schema.protector_default_limits = Limits(gas=5)
+            self.assertIsNone(schema.protector_load_verdict_snapshot(path))
+            # changed schema
+            schema = Schema(query=GraphQLObjectType("Query", {"other": field}))
+            self.assertIsNone(schema.protector_load_verdict_snapshot(path))
+            # changed gas annotation
+            hello = gas_usage(100)(
+                GraphQLField(GraphQLString, resolve=lambda *_: "World")
+            )
+            schema = Schema(query=GraphQLObjectType("Query", {"hello": hello}))
+            self.assertIsNone(schema.protector_load_verdict_snapshot(path))
+
+
+class TestCanonical(unittest.TestCase):
+    def test_canonicalize(self):
+        query = """
+        # comment
+        query q($id: ID!) { b(id: $id, first: 10) { y x }  a(f: {n: "x", v: [$id]}) }
+        """
+        self.assertEqual(
+            canonicalize(query), canonicalize(query.replace("  ", " "))
+        )
+        self.assertNotIn("comment", canonicalize(query))
+        self.assertEqual(
+            canonicalize(query, lift_literals=True, sort_selections=True),
+            "query q($id: ID!) {\n  a(f: {n: $_, v: [$id]})\n"
+            "  b(first: $_, id: $id) {\n    x\n    y\n  }\n}",
+        )
+        self.assertEqual(
+            query_fingerprint(query),
+            query_fingerprint(
+                'query q($id: ID!) { a(f: {v: [$id], n: "y"}) '
+                "b(first: 20, id: $id) { x y } }"
+            ),
+        )
+        self.assertNotEqual(
+            query_fingerprint(query, lift_literals=False),
+            query_fingerprint(query.replace("10", "20"), lift_literals=False),
+        )
+
+    def test_verdict_key(self):
+        schema = Schema(query=Query)
+        schema.protector_check_query("{ hello }")
+        schema.protector_check_query("# comment\n{\n  hello\n}")
+        self.assertEqual(len(schema.get_protector_verdict_cache()), 1)
+
+
+class TestVerdictCache(unittest.TestCase):
+    def test_fresh_errors(self):
+        schema = Schema(query=Query)
+        first = schema.protector_check_query("{ hello, h1: hello }")
+        first.errors[0].extensions["modified"] = True
+        second = schema.protector_check_query("{ hello, h1: hello }")
+        self.assertIsNot(second.errors[0], first.errors[0])
+        self.assertNotIn("modified", second.errors[0].extensions)
+        self.assertEqual(
+            second.errors[0].used_resources, first.errors[0].used_resources
+        )
+
+    def test_dynamic_gas(self):
+        gas = [1]
+        for cache_on, cached in ((None, 0), ((), 1)):
+            hello = gas_usage(lambda **_kwargs: gas[0], cache_on=cache_on)(
+                GraphQLField(GraphQLString, resolve=lambda *_: "World")
+            )
+            schema = Schema(query=GraphQLObjectType("Query", {"hello": hello}))
+            schema.protector_default_limits = Limits(gas=5)
+            gas[0] = 1
+            self.assertEqual(
+                schema.protector_check_query("{ hello }").errors, ()
+            )
+            gas[0] = 100
+            # verdicts of gas callables are only cached if declared pure
+            self.assertEqual(
+                len(schema.protector_check_query("{  hello }").errors),
+                1 - cached,
+            )
+            self.assertEqual(len(schema.get_protector_verdict_cache()), cached)
+
+    def test_locations(self):
+        schema = Schema(query=Query)
+        first = schema.protector_check_query("{ hello, h1: hello }")
+        # same canonical form, so the same verdict key
+        second = schema.protector_check_query("\n\n  { hello h1: hello }")
+        self.assertEqual(len(schema.get_protector_verdict_cache()), 1)
+        self.assertEqual(first.errors[0].locations[0].line, 1)
+        self.assertEqual(second.errors[0].locations[0].line, 3)
+        self.assertEqual(second.errors[0].locations[0].column, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+__package__ = "tests"
+
+import asyncio
+import time
+import unittest
+
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
+from graphql import GraphQLError
+from graphql.execution import ExecutionResult
+from graphql.type import (
+    GraphQLField,
+    GraphQLObjectType,
+    GraphQLSchema,
+    GraphQLString,
+)
+
+from graphene_protector import CircuitOpen
+from graphene_protector.circuit import CircuitBreaker
+from graphene_protector.graphql import graphql, graphql_sync, protect
+
+
+def _fail(*args):
+    raise ValueError("database timeout")
+
+
+def _missing(*args):
+    raise ObjectDoesNotExist("missing")
+
+
+async def _cancel(*args):
+    raise asyncio.CancelledError()
+
+
+FailingQuery = GraphQLObjectType(
+    "Query",
+    {
+        "fail": GraphQLField(GraphQLString, resolve=_fail),
+        "missing": GraphQLField(GraphQLString, resolve=_missing),
+        "cancel": GraphQLField(GraphQLString, resolve=_cancel),
+        "hello": GraphQLField(GraphQLString, resolve=lambda *_: "World"),
+    },
+)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_states(self):
+        breaker = CircuitBreaker(2, cooldown=0.05)
+        self.assertTrue(breaker.allow("a"))
+        breaker.record("a", True)
+        breaker.record("a", False)
+        # consecutive failures
+        breaker.record("a", True)
+        self.assertTrue(breaker.allow("a"))
+        breaker.record("a", True)
+        self.assertFalse(breaker.allow("a"))
+        self.assertTrue(breaker.allow("b"))
+        self.assertGreater(breaker.retry_after("a"), 0)
+        time.sleep(0.06)
+        # half-open: one probe
+        self.assertTrue(breaker.allow("a"))
+        self.assertFalse(breaker.allow("a"))
+        breaker.record("a", True)
+        self.assertFalse(breaker.allow("a"))
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow("a"))
+        breaker.record("a", False)
+        self.assertTrue(breaker.allow("a"))
+        self.assertEqual(
+            breaker.stats(), {"open": 0, "opened": 1, "rejected": 3}
+        )
+
+    def test_failures(self):
+        breaker = CircuitBreaker(slow_threshold=1.0, max_entries=2)
+        self.assertTrue(breaker.is_failure(ExecutionResult(), 2.0))
+        self.assertFalse(breaker.is_failure(ExecutionResult(), 0.5))
+        self.assertFalse(
+            breaker.is_failure(ExecutionResult(errors=[GraphQLError("no")]), 0)
+        )
+        self.assertTrue(
+            breaker.is_failure(
+                ExecutionResult(
+                    errors=[GraphQLError("no", original_error=ValueError())]
+                ),
+                0,
+            )
+        )
+        for fingerprint in "abc":
+            breaker.record(fingerprint, True)
+        self.assertEqual(list(breaker.circuits), ["b", "c"])
+        # expected errors
+        for error in (ObjectDoesNotExist(), PermissionDenied()):
+            self.assertFalse(
+                breaker.is_failure(
+                    ExecutionResult(
+                        errors=[GraphQLError("no", original_error=error)]
+                    ),
+                    0,
+                )
+            )
+        self.assertTrue(
+            CircuitBreaker(expected_errors=()).is_failure(
+                ExecutionResult(errors=[ObjectDoesNotExist()]), 0
+            )
+        )
+        breaker = CircuitBreaker(
+            failure_predicate=lambda result, duration: duration > 5
+        )
+        self.assertFalse(
+            breaker.is_failure(ExecutionResult(errors=[ValueError()]), 1)
+        )
+        self.assertTrue(breaker.is_failure(ExecutionResult(), 6))
+
+    def test_schema(self):
+        schema = GraphQLSchema(query=FailingQuery)
+        protector = protect(schema)
+        protector.protector_circuit_breaker = CircuitBreaker(2, cooldown=60)
+        for _ in range(2):
+            result = graphql_sync(schema, "{ fail }")
+            self.assertEqual(result.errors[0].message, "database timeout")
+        result = graphql_sync(schema, "# other formatting\n{\n  fail\n}")
+        self.assertIsInstance(result.errors[0], CircuitOpen)
+        self.assertGreater(result.errors[0].retry_after, 0)
+        result = asyncio.run(graphql(schema, "{ fail }"))
+        self.assertIsInstance(result.errors[0], CircuitOpen)
+        self.assertEqual(
+            graphql_sync(schema, "{ hello }").data, {"hello": "World"}
+        )
+        # per operation
+        query = "query a { fail } query b { hello }"
+        for _ in range(2):
+            graphql_sync(schema, query, operation_name="a")
+        result = graphql_sync(schema, query, operation_name="a")
+        self.assertIsInstance(result.errors[0], CircuitOpen)
+        result = graphql_sync(schema, query, operation_name="b")
+        self.assertEqual(result.data, {"hello": "World"})
+        # expected errors and cancellations are no failures
+        for _ in range(3):
+            result = graphql_sync(schema, "{ missing }")
+            self.assertEqual(result.errors[0].message, "missing")
+        for _ in range(3):
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(graphql(schema, "{ cancel }"))
+        self.assertEqual(
+            protector.protector_circuit_breaker.stats()["open"], 2
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
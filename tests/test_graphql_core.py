@@ -1,13 +1,33 @@
 __package__ = "tests"
 
+import asyncio
 import unittest
+from unittest import mock
 
 from graphql import parse, validate
-from graphql.type import GraphQLSchema
+from graphql.type import (
+    GraphQLField,
+    GraphQLObjectType,
+    GraphQLSchema,
+    GraphQLString,
+)
 
-from graphene_protector import Limits, LimitsValidationRule, SchemaMixin
+from graphene_protector import (
+    AliasesLimitReached,
+    DefinitionsLimitReached,
+    FragmentDefinitionsLimitReached,
+    FragmentSpreadsLimitReached,
+    GasLimitReached,
+    Limits,
+    LimitsValidationRule,
+    RootFieldsLimitReached,
+    SchemaMixin,
+    gas_usage,
+)
+from graphene_protector.graphql import graphql, graphql_sync, protect
+from graphene_protector.heavy_hitters import HeavyHitters
 
-from .graphql.schema import Query
+from .graphql.schema import Query, field
 
 
 class Schema(GraphQLSchema, SchemaMixin):
@@ -15,6 +35,38 @@ class Schema(GraphQLSchema, SchemaMixin):
     auto_camelcase = False
 
 
+class ShapeLimitsValidationRule(LimitsValidationRule):
+    default_limits = Limits(
+        aliases=2,
+        root_fields=3,
+        fragment_definitions=1,
+        fragment_spreads=2,
+        definitions=3,
+    )
+
+
+class DeferLimitsValidationRule(LimitsValidationRule):
+    default_limits = Limits(gas=1, deferred_gas=2)
+
+
+Report = gas_usage(2)(
+    GraphQLObjectType("Report", {"id": GraphQLField(GraphQLString)})
+)
+ReportQuery = GraphQLObjectType(
+    "Query", {"report": GraphQLField(Report), "hello": gas_usage(1)(field)}
+)
+Box = GraphQLObjectType(
+    "Box", {"a": field, "b": field, "c": field, "hello": field}
+)
+BoxQuery = GraphQLObjectType(
+    "Query",
+    {
+        "box": Limits(deferred_gas=3)(GraphQLField(Box)),
+        "hello": field,
+    },
+)
+
+
 class TestCore(unittest.TestCase):
     def test_simple(self):
         schema = Schema(
@@ -24,3 +76,146 @@ class TestCore(unittest.TestCase):
         self.assertFalse(validate(schema, query_ast, [LimitsValidationRule]))
         query_ast = parse("{ hello, hello1: hello }")
         self.assertTrue(validate(schema, query_ast, [LimitsValidationRule]))
+
+    def test_document_shape(self):
+        schema = Schema(
+            query=Query,
+        )
+        query_ast = parse(
+            "query a { hello, h1: hello, ...F } fragment F on Query { h2: hello }"
+        )
+        self.assertFalse(
+            validate(schema, query_ast, [ShapeLimitsValidationRule])
+        )
+        for query, error_class in [
+            ("{ h1: hello, h2: hello, h3: hello }", AliasesLimitReached),
+            (
+                "query a { h1: hello, h2: hello, h3: hello } "
+                "query b { h4: hello }",
+                AliasesLimitReached,
+            ),
+            (
+                "{ hello, hello, ...F, ... on Query { hello } } "
+                "fragment F on Query { hello }",
+                RootFieldsLimitReached,
+            ),
+            (
+                "{ ...F, ...G } fragment F on Query { hello } "
+                "fragment G on Query { hello }",
+                FragmentDefinitionsLimitReached,
+            ),
+            (
+                "{ ...F, ...F, ...F } fragment F on Query { hello }",
+                FragmentSpreadsLimitReached,
+            ),
+            (
+                "query a { hello } query b { hello } query c { hello } query d { hello }",
+                DefinitionsLimitReached,
+            ),
+        ]:
+            with self.subTest(query):
+                errors = validate(
+                    schema, parse(query), [ShapeLimitsValidationRule]
+                )
+                self.assertEqual(len(errors), 1)
+                self.assertIsInstance(errors[0], error_class)
+
+    def test_defer(self):
+        schema = Schema(
+            query=Query,
+        )
+        query_ast = parse("{ hello ... @defer { h1: hello, h2: hello } }")
+        self.assertFalse(
+            validate(schema, query_ast, [DeferLimitsValidationRule])
+        )
+        query_ast = parse("{ hello ... @defer(if: false) { h1: hello } }")
+        errors = validate(schema, query_ast, [DeferLimitsValidationRule])
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], GasLimitReached)
+        query_ast = parse(
+            "{ hello ... @defer { h1: hello, h2: hello, h3: hello } }"
+        )
+        errors = validate(schema, query_ast, [DeferLimitsValidationRule])
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], GasLimitReached)
+        # defaults of variables are used for conditions
+        query_ast = parse(
+            "query q($s: Boolean = true) { hello, h1: hello @skip(if: $s) }"
+        )
+        self.assertFalse(
+            validate(schema, query_ast, [DeferLimitsValidationRule])
+        )
+
+    def test_defer_sub_limits(self):
+        schema = Schema(
+            query=BoxQuery,
+        )
+        # box redefines deferred_gas, its deferred part is not passed through
+        query_ast = parse("{ box { hello ... @defer { a b c } } }")
+        self.assertFalse(
+            validate(schema, query_ast, [DeferLimitsValidationRule])
+        )
+        query_ast = parse("{ box { hello ... @defer { a b c h: hello } } }")
+        errors = validate(schema, query_ast, [DeferLimitsValidationRule])
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], GasLimitReached)
+
+    def test_type_level(self):
+        schema = Schema(
+            query=ReportQuery,
+        )
+        schema.protector_default_limits = Limits(gas=3)
+        query_ast = parse("{ report { id } hello }")
+        self.assertFalse(validate(schema, query_ast, [LimitsValidationRule]))
+        query_ast = parse("{ report { id } r: report { id } }")
+        errors = validate(schema, query_ast, [LimitsValidationRule])
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], GasLimitReached)
+        # the type gas is charged once, also through fragments
+        verdict = schema.protector_check_query("{ report { id } }")
+        self.assertEqual(verdict.usages[None].gas_used, 2)
+        for query in (
+            "{ report { ... on Report { id } } }",
+            "{ report { ...F } } fragment F on Report { id }",
+        ):
+            with self.subTest(query):
+                verdict = schema.protector_check_query(query)
+                self.assertFalse(verdict.errors)
+                self.assertEqual(verdict.usages[None].gas_used, 2)
+
+    def test_protect(self):
+        schema = GraphQLSchema(query=Query)
+        protector = protect(schema, Limits(gas=2))
+        self.assertEqual(
+            graphql_sync(schema, "{ hello }").data, {"hello": "World"}
+        )
+        result = graphql_sync(schema, "{ hello h1: hello h2: hello }")
+        self.assertIsInstance(result.errors[0], GasLimitReached)
+        self.assertIsNone(result.data)
+        result = graphql_sync(
+            schema, "{ hello h1: hello h2: hello }", check_limits=False
+        )
+        self.assertFalse(result.errors)
+        self.assertTrue(protector.get_protector_verdict_cache().items())
+        result = asyncio.run(graphql(schema, "{ hello h1: hello h2: hello }"))
+        self.assertIsInstance(result.errors[0], GasLimitReached)
+        # the parsed document of the limit checks is executed
+        with mock.patch("graphql.graphql.parse", side_effect=AssertionError):
+            result = graphql_sync(schema, "{ hello h3: hello }")
+            self.assertEqual(result.data, {"hello": "World", "h3": "World"})
+            result = asyncio.run(graphql(schema, "{ h4: hello }"))
+            self.assertEqual(result.data, {"h4": "World"})
+        self.assertIn(
+            "Syntax Error", graphql_sync(schema, "{").errors[0].message
+        )
+        # heavy hitters get the costs of the executed operation
+        protector.protector_heavy_hitters = HeavyHitters(10)
+        query = "query cheap { hello } query expensive { hello a: hello }"
+        result = graphql_sync(schema, query, operation_name="cheap")
+        self.assertEqual(result.data, {"hello": "World"})
+        self.assertEqual(
+            protector.protector_heavy_hitters.top()[0].gas_used, 1
+        )
+        # the limits also apply to plain validations
+        query_ast = parse("{ hello h1: hello h2: hello }")
+        self.assertTrue(validate(schema, query_ast, [LimitsValidationRule]))
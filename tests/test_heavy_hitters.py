@@ -0,0 +1,48 @@
+__package__ = "tests"
+
+import unittest
+
+from graphene_protector import UsagesResult
+from graphene_protector.heavy_hitters import HeavyHitters
+
+from .graphql.schema import Query
+from .test_graphql_core import Schema
+
+
+class TestHeavyHitters(unittest.TestCase):
+    def test_space_saving(self):
+        heavy_hitters = HeavyHitters(2)
+        heavy_hitters.record("a", UsagesResult(gas_used=10), query="{ a }")
+        heavy_hitters.record("b", UsagesResult(complexity=3))
+        heavy_hitters.record("b", UsagesResult(gas_used=2))
+        # replaces b (weight 5)
+        heavy_hitters.record("c", UsagesResult(gas_used=1), rejected=True)
+        self.assertEqual(len(heavy_hitters), 2)
+        a, c = heavy_hitters.top()
+        self.assertEqual(
+            (a.fingerprint, a.query, a.weight, a.count), ("a", "{ a }", 10, 1)
+        )
+        self.assertEqual((c.fingerprint, c.weight, c.error), ("c", 6, 5))
+        self.assertEqual((c.count, c.gas_used, c.rejected), (1, 1, 1))
+        self.assertEqual(len(heavy_hitters.top(1)), 1)
+        heavy_hitters.clear()
+        self.assertEqual(heavy_hitters.top(), [])
+
+    def test_schema(self):
+        schema = Schema(query=Query)
+        schema.protector_heavy_hitters = HeavyHitters()
+        schema.protector_check_query("{ hello }")
+        # same fingerprint, served from the verdict cache
+        schema.protector_check_query("{\n  hello\n}")
+        schema.protector_check_query("{ hello, hello1: hello }")
+        top = schema.protector_heavy_hitters.top()
+        self.assertEqual(len(top), 2)
+        self.assertEqual(
+            (top[0].count, top[0].gas_used, top[0].rejected), (2, 2, 0)
+        )
+        self.assertEqual(top[0].query, "{ hello }")
+        self.assertEqual((top[1].count, top[1].rejected), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
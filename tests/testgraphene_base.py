@@ -1,11 +1,24 @@
 __package__ = "tests"
 
+import io
 import unittest
 
 from graphene.types import Schema as GrapheneSchema
+from graphql import get_introspection_query, parse
 from graphql_relay import from_global_id, to_global_id
 
 from graphene_protector import Limits
+from graphene_protector.calibration import (
+    CalibrationMiddleware,
+    GasCalibrator,
+    load_gas_table,
+    static_gas_table,
+)
+from graphene_protector.cost import (
+    CostModel,
+    DepthSelectionsCostModel,
+    TotalNodesCostModel,
+)
 from graphene_protector.graphene import Schema as ProtectorSchema
 
 from .graphene.schema import Query, SomeNode
@@ -112,3 +125,142 @@ class TestGraphene(unittest.TestCase):
                 } }"""
             )
             self.assertTrue(result.errors)
+
+    def test_introspection(self):
+        schema = ProtectorSchema(
+            query=Query,
+            types=[SomeNode],
+        )
+        with self.subTest("disabled"):
+            query = get_introspection_query()
+            schema.execute(query)
+            self.assertFalse(schema.get_protector_introspection_cache())
+        schema.protector_introspection_cache_size = 16
+        with self.subTest("standard"):
+            result = schema.execute(query)
+            self.assertFalse(result.errors)
+            cached = schema.execute(query)
+            self.assertIsNot(cached, result)
+            self.assertEqual(cached.data, result.data)
+            cached.data.clear()
+            self.assertEqual(schema.execute(query).data, result.data)
+        with self.subTest("context"):
+            schema.get_protector_introspection_cache().clear()
+            schema.execute(query, context=object())
+            self.assertFalse(schema.get_protector_introspection_cache())
+        with self.subTest("deep"):
+            result = schema.execute(
+                "{ __schema { types { fields { type { %s name %s } } } } }"
+                % ("ofType {" * 18, "}" * 18)
+            )
+            self.assertTrue(result.errors)
+        with self.subTest("not cached"):
+            schema.execute("{ __typename hello }")
+            self.assertFalse(schema.get_protector_introspection_cache())
+
+    def test_calibration(self):
+        schema = ProtectorSchema(
+            query=Query,
+            limits=Limits(
+                depth=None, selections=None, complexity=None, gas=10
+            ),
+            types=[SomeNode],
+        )
+        self.assertEqual(
+            static_gas_table(schema),
+            {"Query": {"hello": 1}, "SomeNode": {"bar": 1}},
+        )
+        calibrator = GasCalibrator()
+        result = schema.execute(
+            "{ hello someNodes(first: 2) { edges { node { bar } } } }",
+            middleware=[CalibrationMiddleware(calibrator)],
+        )
+        self.assertFalse(result.errors)
+        self.assertEqual(calibrator.timings[("SomeNode", "bar")][0], 2)
+        self.assertEqual(calibrator.timings[("Query", "hello")][0], 1)
+        # hello and bar: 1 gas, take 1 ms, some_nodes 5 ms
+        calibrator.timings = {
+            ("Query", "hello"): (1, 0.001),
+            ("Query", "someNodes"): (2, 0.01),
+            ("SomeNode", "bar"): (3, 0.003),
+        }
+        table = calibrator.suggest(schema)
+        self.assertEqual(
+            table,
+            {"Query": {"hello": 1, "someNodes": 5}, "SomeNode": {"bar": 1}},
+        )
+        fp = io.StringIO()
+        calibrator.dump(fp, schema)
+        fp.seek(0)
+        schema.protector_gas_overrides = load_gas_table(fp)
+        self.assertEqual(schema.protector_gas_overrides, table)
+        verdict = schema.protector_check_query(
+            "{ hello someNodes(first: 2) { edges { cursor } } }"
+        )
+        self.assertFalse(verdict.errors)
+        self.assertEqual(verdict.usages[None].gas_used, 6)
+        result = schema.execute(
+            "{ hello someNodes(first: 2) { edges { cursor } } "
+            "other: someNodes(first: 2) { edges { cursor } } }"
+        )
+        self.assertEqual(result.errors[0].message, "Query uses too much gas")
+
+    def test_cost_model(self):
+        schema = ProtectorSchema(
+            query=Query,
+            limits=Limits(
+                depth=None, selections=None, complexity=30, gas=None
+            ),
+        )
+        query = """query($first: Int) {
+            someNodes(first: $first) { edges { node { id hello } } }
+            hello
+        }"""
+        with self.subTest("builtin"):
+            builtin = schema.protector_check_query(query, {"first": 10})
+            schema.protector_cost_model = DepthSelectionsCostModel()
+            verdict = schema.protector_check_query(query, {"first": 10})
+            self.assertEqual(verdict.usages, builtin.usages)
+        schema.protector_cost_model = TotalNodesCostModel()
+        with self.subTest("total nodes"):
+            # someNodes: 10 * (1 + edges: 1 * (1 + node: 1))
+            verdict = schema.protector_check_query(query, {"first": 10})
+            self.assertFalse(verdict.errors)
+            self.assertEqual(verdict.usages[None].complexity, 30)
+            # the page size is part of the verdict key
+            verdict = schema.protector_check_query(query, {"first": 11})
+            self.assertEqual(verdict.errors[0].message, "Query is too complex")
+            # only page size variables are part of the key
+            cost_model = schema.protector_cost_model
+            self.assertEqual(
+                cost_model.key({"first": 10, "other": 1}, parse(query)),
+                cost_model.key({"first": 10}, parse(query)),
+            )
+            with self.assertRaises(TypeError):
+                CostModel()
+            verdict = schema.protector_check_query(
+                "{ a: someNodes(first: 5) { edges { cursor } } "
+                "b: someNodes(first: 5) { edges { cursor } } }"
+            )
+            self.assertEqual(verdict.usages[None].complexity, 20)
+        with self.subTest("fragments"):
+            # fragments are no nodes
+            for selection in (
+                "... on SomeNode { id hello }",
+                "...F",
+            ):
+                verdict = schema.protector_check_query(
+                    "query($first: Int) { someNodes(first: $first) "
+                    "{ edges { node { %s } } } hello } "
+                    "fragment F on SomeNode { id hello }" % selection,
+                    {"first": 10},
+                )
+                self.assertFalse(verdict.errors)
+                self.assertEqual(verdict.usages[None].complexity, 30)
+        with self.subTest("operation"):
+            # the sum is checked
+            result = schema.execute(
+                "{ a: someNodes(first: 10) { edges { cursor } } "
+                "b: someNodes(first: 10) { edges { cursor } } }"
+            )
+            self.assertEqual(result.errors[0].message, "Query is too complex")
@@ -1,14 +1,18 @@
-from django.test import TestCase
-from django.conf import settings
+import json
 
+from django.conf import settings
+from django.test import RequestFactory, TestCase
 from graphene_django.settings import graphene_settings
+from graphql import print_schema
 
 from graphene_protector import Limits
+from graphene_protector.admission import AdmissionController
 from graphene_protector.django.graphene import (
+    GraphQLView,
     Schema as ProtectorGrapheneSchema,
 )
-
-from graphql import print_schema
+from graphene_protector.django.views import HeavyHittersView
+from graphene_protector.heavy_hitters import HeavyHitters
 
 from .django.schema_graphene import Query
 
@@ -25,6 +29,33 @@ class TestDjango(TestCase):
             settings.GRAPHENE_PROTECTOR_SELECTIONS_LIMIT, limits.selections
         )
 
+    def test_settings_cache(self):
+        limits = custom_schema.get_protector_default_limits()
+        self.assertIs(custom_schema.get_protector_default_limits(), limits)
+        pattern = custom_schema.get_protector_path_ignore_pattern()
+        self.assertIs(
+            custom_schema.get_protector_path_ignore_pattern(), pattern
+        )
+        with self.settings(
+            GRAPHENE_PROTECTOR_DEPTH_LIMIT=5,
+            GRAPHENE_PROTECTOR_PATH_INGORE_PATTERN="node$",
+        ):
+            self.assertEqual(
+                custom_schema.get_protector_default_limits().depth, 5
+            )
+            self.assertEqual(
+                custom_schema.get_protector_path_ignore_pattern().pattern,
+                "node$",
+            )
+        self.assertEqual(
+            custom_schema.get_protector_default_limits().depth,
+            settings.GRAPHENE_PROTECTOR_DEPTH_LIMIT,
+        )
+        self.assertEqual(
+            custom_schema.get_protector_path_ignore_pattern().pattern,
+            pattern.pattern,
+        )
+
     def test_field_overwrites(self):
         schema = graphene_settings.SCHEMA
         limits = schema.get_protector_default_limits()
@@ -70,3 +101,110 @@ class TestDjango(TestCase):
         print_schema(getattr(schema, "graphql_schema", schema))
         # doesn't work
         # print_schema(schema)
+
+    def test_view(self):
+        view = GraphQLView.as_view(schema=custom_schema)
+        factory = RequestFactory()
+        with self.subTest("success"):
+            response = view(
+                factory.post(
+                    "/graphql",
+                    json.dumps({"query": "{ person { id } }"}),
+                    content_type="application/json",
+                )
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                json.loads(response.content)["data"], {"person": {"id": "100"}}
+            )
+        with self.subTest("rejected"):
+            response = view(
+                factory.post(
+                    "/graphql",
+                    json.dumps(
+                        {"query": "{ person { child { child { id } } } }"}
+                    ),
+                    content_type="application/json",
+                )
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertNotIn("data", json.loads(response.content))
+        with self.subTest("busy"):
+            schema = ProtectorGrapheneSchema(query=Query)
+            schema.protector_admission = AdmissionController(1, max_wait=0)
+            start = schema.protector_admission.acquire(1)
+            response = GraphQLView.as_view(schema=schema)(
+                factory.post(
+                    "/graphql",
+                    json.dumps({"query": "{ person { id } }"}),
+                    content_type="application/json",
+                )
+            )
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response["Retry-After"], "1")
+            schema.protector_admission.release(1, start)
+
+    def test_heavy_hitters_view(self):
+        schema = ProtectorGrapheneSchema(query=Query)
+        factory = RequestFactory()
+        response = HeavyHittersView.as_view(schema=schema)(
+            factory.get("/heavy-hitters")
+        )
+        self.assertEqual(response.status_code, 404)
+        schema.protector_heavy_hitters = HeavyHitters(10)
+        view = GraphQLView.as_view(schema=schema)
+        for query in (
+            "{ person { id } }",
+            "{ person { id } }",
+            "{ __typename }",
+        ):
+            view(
+                factory.post(
+                    "/graphql",
+                    json.dumps({"query": query}),
+                    content_type="application/json",
+                )
+            )
+        response = HeavyHittersView.as_view(schema=schema)(
+            factory.get("/heavy-hitters", {"limit": "1"})
+        )
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.content)
+        self.assertEqual(result["capacity"], 10)
+        self.assertEqual(len(result["heavyHitters"]), 1)
+        self.assertEqual(
+            result["heavyHitters"][0]["query"], "{ person { id } }"
+        )
+        self.assertEqual(result["heavyHitters"][0]["count"], 2)
+        response = HeavyHittersView.as_view(schema=schema)(
+            factory.get("/heavy-hitters", {"limit": "x"})
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_view_batch(self):
+        schema = ProtectorGrapheneSchema(
+            query=Query, limits=Limits(selections=100)
+        )
+        schema.protector_batch_limits = Limits(selections=2)
+        schema.protector_heavy_hitters = HeavyHitters(10)
+        view = GraphQLView.as_view(schema=schema, batch=True)
+        response = view(
+            RequestFactory().post(
+                "/graphql",
+                json.dumps(
+                    [
+                        {"id": 1, "query": "{ person { id } }"},
+                        {"id": 2, "query": "{ person { id } }"},
+                        {"id": 3, "query": "{ person { id } }"},
+                    ]
+                ),
+                content_type="application/json",
+            )
+        )
+        self.assertEqual(response.status_code, 400)
+        result = json.loads(response.content)
+        self.assertEqual(
+            [entry["status"] for entry in result], [200, 200, 400]
+        )
+        # the verdicts of the batch validation are reused
+        self.assertEqual(schema.protector_heavy_hitters.top(1)[0].count, 3)
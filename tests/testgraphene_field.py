@@ -4,7 +4,7 @@ import unittest
 
 import graphene
 
-from graphene_protector import Limits
+from graphene_protector import Limits, gas_usage
 from graphene_protector.graphene import Schema as ProtectorSchema
 
 from .graphene_base import Person
@@ -43,12 +43,30 @@ class Person4(graphene.ObjectType):
         return Person(id=self.id + 1, depth=self.depth - 1, age=34)
 
 
+@gas_usage(5)
+@Limits(depth=2)
+class Report(graphene.ObjectType):
+    id = graphene.ID()
+    child = graphene.Field(lambda: Report)
+
+    def resolve_child(self, info):
+        return Report(id=self.id)
+
+
 class Query(graphene.ObjectType):
+    report = graphene.Field(Report)
+    reportOverwritten = Limits(depth=3)(graphene.Field(Report))
     setDirectly = Limits(depth=2)(graphene.Field(Person))
     unsetDirectly = Limits(depth=None)(graphene.Field(Person))
     unsetHierachy = Limits(depth=1)(graphene.Field(Person3))
     setHierachy = Limits(depth=1)(graphene.Field(Person4))
 
+    def resolve_report(root, info):
+        return Report(id=1)
+
+    def resolve_reportOverwritten(root, info):
+        return Report(id=2)
+
     def resolve_setDirectly(root, info):
         return Person(id=100, depth=10, age=34)
 
@@ -185,3 +203,24 @@ class TestField(unittest.TestCase):
 """
             result = schema.execute(query)
             self.assertTrue(result.errors)
+
+    def test_type_level(self):
+        with self.subTest("success"):
+            query = "{ report { child { id } } }"
+            result = schema.execute(query)
+            self.assertFalse(result.errors)
+            self.assertEqual(
+                schema.protector_check_query(query).usages[None].gas_used, 10
+            )
+            result = schema.execute(
+                "{ reportOverwritten { child { child { id } } } }"
+            )
+            self.assertFalse(result.errors)
+        with self.subTest("rejected"):
+            # the type limits are reset only once
+            result = schema.execute("{ report { child { child { id } } } }")
+            self.assertTrue(result.errors)
+            result = schema.execute(
+                "{ reportOverwritten { child { child { child { id } } } } }"
+            )
+            self.assertTrue(result.errors)
@@ -1,11 +1,16 @@
 __package__ = "tests"
 
+import asyncio
 import unittest
 from dataclasses import fields
 
 import graphene
 
-from graphene_protector import Limits
+from graphene_protector import ConcurrencyLimitReached, Limits, gas_usage
+from graphene_protector.adaptive import AdaptiveLimits
+from graphene_protector.admission import AdmissionController
+from graphene_protector.analysis import FieldCost, analyze_schema
+from graphene_protector.gas import BatchGas
 from graphene_protector.graphene import Schema as ProtectorSchema
 
 from .graphene_base import Person
@@ -260,3 +265,398 @@ class TestGlobal(unittest.TestCase):
 """
             result = schema.execute(query)
             self.assertTrue(result.errors)
+
+    def test_skip_include(self):
+        schema = ProtectorSchema(
+            query=Query,
+            limits=Limits(selections=2, depth=None, complexity=None, gas=None),
+        )
+        query = """
+    query something($withChild: Boolean!){
+      person {
+        id
+        child @include(if: $withChild) {
+            id
+            age
+        }
+        age @skip(if: true)
+      }
+    }
+"""
+        with self.subTest("success literal and variable"):
+            result = schema.execute(query, variables={"withChild": False})
+            self.assertFalse(result.errors)
+        with self.subTest("rejected variable"):
+            result = schema.execute(query, variables={"withChild": True})
+            self.assertTrue(result.errors)
+        with self.subTest("rejected unresolvable"):
+            result = schema.execute(query)
+            self.assertTrue(result.errors)
+
+    def test_batch(self):
+        schema = ProtectorSchema(
+            query=Query,
+            limits=Limits(selections=2, depth=None, complexity=None, gas=None),
+        )
+        operations = [
+            ("{ person { id age } }", None, None),
+            ("{ person { id } }", None, None),
+            ("{ person {", None, None),
+            ("{ person { id, age, child { id } } }", None, None),
+            ("{ person2 { id } }", None, None),
+            ("{ person2 { id } }", None, None),
+        ]
+        with self.subTest("aggregated selections"):
+            results = schema.protector_validate_batch(
+                operations, limits=Limits(selections=3)
+            )
+            self.assertEqual(len(results), 6)
+            self.assertFalse(results[0])
+            self.assertFalse(results[1])
+            # syntax error
+            self.assertTrue(results[2])
+            # exceeds the limits of the schema
+            self.assertTrue(results[3])
+            # exceeds the batch budget
+            self.assertTrue(results[4])
+            # remaining operations are rejected early
+            self.assertIs(results[5][0], results[4][0])
+        with self.subTest("operations"):
+            results = schema.protector_validate_batch(
+                operations[:2], limits=Limits(definitions=1)
+            )
+            self.assertFalse(results[0])
+            self.assertTrue(results[1])
+        with self.subTest("unlimited"):
+            results = schema.protector_validate_batch(operations[:2])
+            self.assertEqual(results, [[], []])
+
+    def test_adaptive_limits(self):
+        schema = ProtectorSchema(
+            query=Query,
+            limits=Limits(
+                depth=None, selections=None, complexity=10, gas=None
+            ),
+        )
+        load = [0.0]
+        schema.protector_adaptive_limits = AdaptiveLimits(
+            lambda: load[0], interval=0, decrease=0.5
+        )
+        expensive = "{ person { id age child { id age } } }"
+        cheap = "{ person { id } }"
+        verdict = schema.protector_check_query(expensive)
+        self.assertFalse(verdict.errors)
+        self.assertEqual(verdict.usages[None].complexity, 8)
+        with self.subTest("overload"):
+            load[0] = 2.0
+            # complexity limit: 5
+            result = schema.execute(expensive)
+            self.assertTrue(result.errors)
+            self.assertEqual(result.errors[0].message, "Query is too complex")
+            # complexity limit: 2
+            self.assertFalse(schema.execute(cheap).errors)
+        with self.subTest("hysteresis"):
+            load[0] = 0.8
+            # no change between low and high
+            self.assertTrue(schema.protector_check_query(expensive).errors)
+            load[0] = 0.0
+            # complexity limit: 5
+            self.assertTrue(schema.protector_check_query(expensive).errors)
+            # restored
+            self.assertFalse(schema.protector_check_query(expensive).errors)
+            self.assertIsNone(schema.get_protector_load_limits())
+
+    def test_admission(self):
+        schema = ProtectorSchema(
+            query=Query,
+            limits=Limits(
+                depth=None, selections=None, complexity=None, gas=None
+            ),
+        )
+        admission = AdmissionController(8, max_wait=0)
+        schema.protector_admission = admission
+        expensive = "{ person { id age child { id age } } }"
+        self.assertFalse(schema.execute(expensive).errors)
+        # complexity 8 is the weight
+        start = admission.acquire(1)
+        result = schema.execute(expensive)
+        self.assertIsInstance(result.errors[0], ConcurrencyLimitReached)
+        self.assertIn("retry_after", result.errors[0].extensions)
+        # cheap queries pass
+        self.assertFalse(schema.execute("{ person { id } }").errors)
+        self.assertFalse(
+            asyncio.run(schema.execute_async("{ person { id } }")).errors
+        )
+        admission.release(1, start)
+        self.assertFalse(asyncio.run(schema.execute_async(expensive)).errors)
+        self.assertEqual(admission.free, 8)
+
+    def test_analysis(self):
+        with self.subTest("unbounded"):
+            schema = ProtectorSchema(
+                query=Query,
+                limits=Limits(
+                    depth=None, selections=None, complexity=None, gas=None
+                ),
+            )
+            report = analyze_schema(schema)
+            self.assertEqual(report.unbounded, [("Person",)])
+            self.assertIsNone(report.fields["Query.person"].max_depth)
+        with self.subTest("bounded"):
+            schema = ProtectorSchema(
+                query=Query,
+                limits=Limits(
+                    depth=3, selections=None, complexity=None, gas=None
+                ),
+            )
+            report = analyze_schema(schema)
+            self.assertEqual(report.unbounded, [])
+            self.assertEqual(
+                report.fields["Query.person"],
+                FieldCost(max_depth=3, selections=9, gas=0),
+            )
+        with self.subTest("gas and caps"):
+            schema.protector_gas_overrides = {"Person": {"child": 2}}
+            report = analyze_schema(schema)
+            self.assertEqual(report.fields["Query.person2"].gas, 4)
+            report = analyze_schema(
+                schema, Limits(depth=3, selections=5, gas=3)
+            )
+            self.assertEqual(
+                report.fields["Query.person2"],
+                FieldCost(max_depth=3, selections=5, gas=3),
+            )
+        with self.subTest("field limits"):
+
+            class LimitedQuery(graphene.ObjectType):
+                person = Limits(depth=1)(graphene.Field(Person))
+
+            schema = ProtectorSchema(
+                query=LimitedQuery,
+                limits=Limits(
+                    depth=None, selections=None, complexity=None, gas=None
+                ),
+            )
+            report = analyze_schema(schema)
+            self.assertEqual(report.unbounded, [])
+            self.assertEqual(
+                report.fields["LimitedQuery.person"].selections, 3
+            )
+
+    def test_explain(self):
+        class LimitedQuery(graphene.ObjectType):
+            class Meta:
+                name = "Query"
+
+            person = Limits(depth=1)(graphene.Field(Person))
+            person2 = graphene.Field(Person)
+
+        schema = ProtectorSchema(
+            query=LimitedQuery,
+            limits=Limits(depth=2, selections=None, complexity=None, gas=None),
+        )
+        query = """
+    {
+      person { child { id } }
+      person2 { child { child { id } } }
+    }
+"""
+        with self.subTest("api"):
+            explanation = schema.protector_explain_query(query)
+            self.assertEqual(len(explanation.errors), 2)
+            self.assertEqual(
+                [
+                    (
+                        path_cost.path,
+                        path_cost.max_level_depth,
+                        path_cost.reset,
+                    )
+                    for path_cost in explanation.paths[None]
+                ],
+                [
+                    ("", 3, False),
+                    ("/person", 2, True),
+                    ("/person/child", 2, False),
+                    ("/person2", 3, False),
+                    ("/person2/child", 3, False),
+                    ("/person2/child/child", 3, False),
+                ],
+            )
+            self.assertEqual(explanation.paths[None][1].limits.depth, 1)
+            self.assertEqual(explanation.paths[None][3].complexity, 3)
+        with self.subTest("extensions"):
+            result = schema.execute(query)
+            self.assertNotIn("explain", result.errors[0].extensions or {})
+            schema.protector_explain = True
+            result = schema.execute(query)
+            self.assertEqual(len(result.errors), 2)
+            explain = result.errors[0].extensions["explain"]
+            self.assertEqual(explain[3]["path"], "/person2")
+            self.assertEqual(explain[3]["limits"]["depth"], 2)
+
+    def test_limits_profiles(self):
+        class ProfileSchema(ProtectorSchema):
+            protector_limits_profiles = {
+                "anonymous": Limits(depth=1),
+                "internal": Limits(depth=None),
+            }
+
+            def get_protector_limits_profile(self, context, operation_name):
+                if operation_name == "report":
+                    return "internal"
+                return getattr(context, "profile", None)
+
+        class Context:
+            def __init__(self, profile):
+                self.profile = profile
+
+        schema = ProfileSchema(
+            query=Query,
+            limits=Limits(depth=2, selections=None, complexity=None, gas=None),
+        )
+        shallow = "query other { person { child { id } } }"
+        deep = "query report { person { child { child { id } } } }"
+        # twice, the verdicts are cached per profile
+        for _ in range(2):
+            for query, profile, operation_name, success in (
+                (shallow, None, None, True),
+                (shallow, "anonymous", None, False),
+                (deep, None, None, False),
+                (deep, "internal", None, True),
+                (deep, None, "report", True),
+            ):
+                with self.subTest(
+                    profile=profile, operation_name=operation_name
+                ):
+                    verdict = schema.protector_check_query(
+                        query,
+                        context=Context(profile),
+                        operation_name=operation_name,
+                    )
+                    self.assertEqual(
+                        not verdict.errors, success, verdict.errors
+                    )
+        with self.subTest("execute"):
+            result = schema.execute(shallow, context=Context("anonymous"))
+            self.assertTrue(result.errors)
+            result = schema.execute(deep, context=Context("internal"))
+            self.assertFalse(result.errors)
+            self.assertEqual(
+                schema.get_protector_limits_profiles()["anonymous"].complexity,
+                None,
+            )
+
+    def test_gas_memoization(self):
+        calls = []
+
+        def gas(fieldname, **kwargs):
+            calls.append(fieldname)
+            return 2
+
+        class MemoPerson(graphene.ObjectType):
+            name = gas_usage(gas, cache_on=("parent", "fieldname"))(
+                graphene.String()
+            )
+            child = graphene.Field(lambda: MemoPerson)
+
+        class MemoQuery(graphene.ObjectType):
+            class Meta:
+                name = "Query"
+
+            person = graphene.Field(MemoPerson)
+
+        schema = ProtectorSchema(
+            query=MemoQuery,
+            limits=Limits(
+                depth=None, selections=None, complexity=None, gas=None
+            ),
+        )
+        schema.protector_verdict_cache_size = 0
+        query = "{ person { name child { name child { name } } } }"
+        for _ in range(2):
+            verdict = schema.protector_check_query(query)
+            self.assertEqual(verdict.usages[None].gas_used, 6)
+        self.assertEqual(calls, ["name"])
+        MemoPerson.name._graphene_protector_gas.cache_clear()
+        schema.protector_check_query(query)
+        self.assertEqual(len(calls), 2)
+        with self.assertRaises(ValueError):
+            gas_usage(gas, cache_on=("variables",))
+        # least recently used entries are evicted
+        memoized = gas_usage(gas, cache_on=("fieldname",), maxsize=2)(
+            graphene.String()
+        )._graphene_protector_gas
+        calls.clear()
+        for fieldname in ("a", "b", "a", "c", "a"):
+            memoized(fieldname=fieldname)
+        self.assertEqual(calls, ["a", "b", "c"])
+
+    def test_batch_gas(self):
+        loads = []
+
+        async def load(keys, context):
+            loads.append(sorted(keys))
+            return [context[fieldname] for _, fieldname in keys]
+
+        tenant_gas = BatchGas(load, default=5)
+
+        class BatchPerson(graphene.ObjectType):
+            name = gas_usage(tenant_gas)(graphene.String())
+            email = gas_usage(tenant_gas)(graphene.String())
+            phone = gas_usage(tenant_gas)(graphene.String())
+            child = graphene.Field(lambda: BatchPerson)
+
+        class BatchQuery(graphene.ObjectType):
+            class Meta:
+                name = "Query"
+
+            person = graphene.Field(BatchPerson)
+
+            def resolve_person(root, info):
+                return BatchPerson(name="foo", email="foo@example.com")
+
+        schema = ProtectorSchema(
+            query=BatchQuery,
+            limits=Limits(depth=None, selections=None, complexity=None, gas=5),
+        )
+        query = "{ person { name email child { name } } }"
+        result = asyncio.run(
+            schema.execute_async(query, context={"name": 1, "email": 2})
+        )
+        self.assertFalse(result.errors)
+        # one batch per document
+        self.assertEqual(
+            loads, [[("BatchPerson", "email"), ("BatchPerson", "name")]]
+        )
+        # verdicts are cached per loaded values
+        result = asyncio.run(
+            schema.execute_async(query, context={"name": 2, "email": 2})
+        )
+        self.assertEqual(result.errors[0].message, "Query uses too much gas")
+        self.assertEqual(len(loads), 2)
+        # default outside of async executions
+        result = schema.execute(query, context={"name": 1, "email": 1})
+        self.assertEqual(result.errors[0].message, "Query uses too much gas")
+        # failed loads reject the query
+        result = asyncio.run(schema.execute_async(query, context={}))
+        self.assertEqual(result.errors[0].message, "Gas could not be loaded")
+        self.assertIsInstance(result.errors[0].original_error, KeyError)
+        # all keys are collected, though the default exceeds the limit
+        loads.clear()
+        result = asyncio.run(
+            schema.execute_async(
+                "{ person { name email phone } }",
+                context={"name": 1, "email": 1, "phone": 1},
+            )
+        )
+        self.assertFalse(result.errors)
+        self.assertEqual(
+            loads,
+            [
+                [
+                    ("BatchPerson", "email"),
+                    ("BatchPerson", "name"),
+                    ("BatchPerson", "phone"),
+                ]
+            ],
+        )
@@ -0,0 +1,117 @@
+__package__ = "tests"
+
+import gc
+import time
+import unittest
+
+from graphql import ExecutionResult
+
+from graphene_protector import Limits, SubscriptionsLimitReached
+from graphene_protector.graphene import Schema as ProtectorSchema
+
+from .graphene.schema import Query, Subscription
+
+
+class TestSubscription(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent(self):
+        schema = ProtectorSchema(
+            query=Query,
+            subscription=Subscription,
+            limits=Limits(subscriptions=1),
+        )
+        context = object()
+        first = await schema.subscribe(
+            "subscription { count }", context=context
+        )
+        self.assertNotIsInstance(first, ExecutionResult)
+        with self.subTest("rejected"):
+            result = await schema.subscribe(
+                "subscription { count }", context=context
+            )
+            self.assertIsInstance(result, ExecutionResult)
+            self.assertIsInstance(result.errors[0], SubscriptionsLimitReached)
+        with self.subTest("other connection"):
+            other = await schema.subscribe(
+                "subscription { count }", context=object()
+            )
+            self.assertNotIsInstance(other, ExecutionResult)
+            await other.aclose()
+        with self.subTest("released"):
+            self.assertEqual([x.data["count"] async for x in first], [0, 1, 2])
+            result = await schema.subscribe(
+                "subscription { count }", context=context
+            )
+            self.assertNotIsInstance(result, ExecutionResult)
+            await result.aclose()
+
+    async def test_release(self):
+        schema = ProtectorSchema(
+            query=Query,
+            subscription=Subscription,
+            limits=Limits(subscriptions=1),
+        )
+        context = object()
+        first = await schema.subscribe(
+            "subscription { count }", context=context
+        )
+        # closed without being started
+        await first.aclose()
+        second = await schema.subscribe(
+            "subscription { count }", context=context
+        )
+        self.assertNotIsInstance(second, ExecutionResult)
+        await second.__anext__()
+        await second.aclose()
+        self.assertEqual(
+            schema.get_protector_subscription_budgets().active(id(context)), 0
+        )
+        # dropped without being started or closed
+        third = await schema.subscribe(
+            "subscription { count }", context=context
+        )
+        self.assertNotIsInstance(third, ExecutionResult)
+        del third
+        gc.collect()
+        self.assertEqual(
+            schema.get_protector_subscription_budgets().active(id(context)), 0
+        )
+
+    async def test_without_context(self):
+        schema = ProtectorSchema(
+            query=Query,
+            subscription=Subscription,
+            limits=Limits(subscriptions=1),
+        )
+        # no connection to share a budget with
+        first = await schema.subscribe("subscription { count }")
+        second = await schema.subscribe("subscription { count }")
+        self.assertNotIsInstance(first, ExecutionResult)
+        self.assertNotIsInstance(second, ExecutionResult)
+        await first.aclose()
+        await second.aclose()
+
+    async def test_throttle(self):
+        schema = ProtectorSchema(
+            query=Query,
+            subscription=Subscription,
+            limits=Limits(subscription_events=20),
+        )
+        result = await schema.subscribe(
+            "subscription { count(upTo: 25) }", context=object()
+        )
+        start = time.monotonic()
+        self.assertEqual(len([x async for x in result]), 25)
+        # the first 20 events are within the burst
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+    async def test_validation(self):
+        schema = ProtectorSchema(
+            query=Query,
+            subscription=Subscription,
+            limits=Limits(selections=1, subscription_events=20),
+        )
+        result = await schema.subscribe(
+            "subscription { count, count2: count }", context=object()
+        )
+        self.assertIsInstance(result, ExecutionResult)
+        self.assertTrue(result.errors)
@@ -1,18 +1,56 @@
 __package__ = "tests"
 
 import unittest
+from typing import Optional
 
 #
+import strawberry
 from strawberry import Schema as StrawberrySchema
+from strawberry.extensions import ParserCache, ValidationCache
 from strawberry.relay import from_base64, to_base64
 
-from graphene_protector import Limits, SchemaMixin
-from graphene_protector.strawberry import CustomGrapheneProtector
+from graphene_protector import Limits, SchemaMixin, gas_usage
+from graphene_protector.calibration import GasCalibrator, static_gas_table
+from graphene_protector.strawberry import (
+    CalibrationExtension,
+    CustomGrapheneProtector,
+)
 from graphene_protector.strawberry import Schema as ProtectorSchema
 
 from .strawberry.schema import Query
 
 
+@gas_usage(3)
+@Limits(depth=2)
+@strawberry.type
+class Report:
+    id: int
+    parent: Optional["Report"] = None
+
+
+@strawberry.type(name="Query")
+class ReportQuery:
+    @strawberry.field
+    def report(self) -> Report:
+        return Report(id=1, parent=Report(id=2))
+
+
+gas_calls = []
+
+
+def _keyed_gas(parent, fieldname, **_kwargs):
+    gas_calls.append((parent.name, fieldname))
+    return 1
+
+
+@strawberry.type(name="Query")
+class KeyedGasQuery:
+    @gas_usage(_keyed_gas)
+    @strawberry.field
+    def hello(self) -> str:
+        return "World"
+
+
 class CustomSchema(SchemaMixin, StrawberrySchema):
     protector_default_limits = Limits(
         depth=2, selections=None, complexity=None, gas=None
@@ -105,6 +143,35 @@ class TestStrawberry(unittest.IsolatedAsyncioTestCase):
         )
         self.assertTrue(result.errors)
 
+    def test_validation_cache(self):
+        query = (
+            "query($skip: Boolean!) "
+            "{ inOut(into: []) a: inOut(into: []) @skip(if: $skip) }"
+        )
+        schema = ProtectorSchema(
+            query=Query,
+            limits=Limits(depth=2, selections=None, complexity=None, gas=4),
+            extensions=[ParserCache(), ValidationCache()],
+        )
+        # the protector is moved after the caches
+        self.assertIsInstance(schema.extensions[-1], CustomGrapheneProtector)
+        for skip in (True, False, True, False):
+            result = schema.execute_sync(query, variable_values={"skip": skip})
+            self.assertEqual(bool(result.errors), not skip)
+        self.assertEqual(len(schema.get_protector_verdict_cache().items()), 2)
+        # plain strawberry schema, verdicts are cached by the extension
+        protector = CustomGrapheneProtector(
+            limits=Limits(depth=2, selections=None, complexity=None, gas=4)
+        )
+        schema = StrawberrySchema(
+            query=Query,
+            extensions=[ParserCache(), ValidationCache(), protector],
+        )
+        for skip in (True, False, True, False):
+            result = schema.execute_sync(query, variable_values={"skip": skip})
+            self.assertEqual(bool(result.errors), not skip)
+        self.assertEqual(len(protector.verdict_cache.items()), 2)
+
     def test_in_out(self):
         schema = ProtectorSchema(
             query=Query,
@@ -237,3 +304,51 @@ class TestStrawberry(unittest.IsolatedAsyncioTestCase):
             from_base64(result.data["someNodes"]["edges"][99]["node"]["id"])[1],
             "id-199",
         )
+
+    def test_calibration(self):
+        calibrator = GasCalibrator()
+        schema = ProtectorSchema(
+            query=Query,
+            limits=Limits(
+                depth=None, selections=None, complexity=None, gas=None
+            ),
+            extensions=[CalibrationExtension(calibrator)],
+        )
+        self.assertEqual(static_gas_table(schema)["Query"], {"inOut": 4})
+        result = schema.execute_sync('{ inOut(into: ["a"]) }')
+        self.assertFalse(result.errors)
+        self.assertEqual(calibrator.timings[("Query", "inOut")][0], 1)
+        calibrator.timings = {("Query", "inOut"): (1, 0.002)}
+        self.assertEqual(calibrator.suggest(schema), {"Query": {"inOut": 4}})
+        schema.protector_gas_overrides = {"Query": {"inOut": 2}}
+        result = schema.execute_sync(
+            '{ a: inOut(into: ["a"]) b: inOut(into: ["a"]) }'
+        )
+        self.assertFalse(result.errors)
+        schema.protector_default_limits = Limits(gas=3)
+        result = schema.execute_sync(
+            '{ a: inOut(into: ["a"]) b: inOut(into: ["a"]) }'
+        )
+        self.assertEqual(result.errors[0].message, "Query uses too much gas")
+
+    def test_type_level(self):
+        schema = ProtectorSchema(
+            query=ReportQuery,
+            limits=Limits(depth=None, selections=None, complexity=None, gas=8),
+        )
+        result = schema.execute_sync("{ report { id parent { id } } }")
+        self.assertFalse(result.errors)
+        result = schema.execute_sync("{ report { parent { parent { id } } } }")
+        self.assertEqual(result.errors[0].message, "Query is too deep")
+        result = schema.execute_sync(
+            "{ report { parent { id } } other: report { parent { id } } }"
+        )
+        self.assertEqual(result.errors[0].message, "Query uses too much gas")
+
+    def test_gas_arguments(self):
+        # gas callables (e.g. BatchGas keys) get parent and fieldname
+        schema = ProtectorSchema(query=KeyedGasQuery)
+        gas_calls.clear()
+        result = schema.execute_sync("{ hello }")
+        self.assertFalse(result.errors)
+        self.assertEqual(gas_calls, [("Query", "hello")])